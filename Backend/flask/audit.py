@@ -0,0 +1,94 @@
+"""Audit trail sinks and the durability-aware audit recorder."""
+import json
+import logging
+
+from batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+# Durability modes for a single audit record.
+SYNC = 'sync'        # staged in the caller's DB transaction, committed with the change it describes
+BATCHED = 'batched'  # queued and bulk-inserted by the background writer
+DURABILITY_MODES = (SYNC, BATCHED)
+
+
+class AuditSink:
+    """Destination for batches of audit records (plain dicts)."""
+
+    def write(self, records):
+        raise NotImplementedError
+
+
+class DatabaseAuditSink(AuditSink):
+    """Bulk-insert records into the audit log table in one statement per batch.
+
+    ``on_commit`` is called with each batch once it is committed.
+    """
+
+    def __init__(self, app, db, model, on_commit=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.on_commit = on_commit
+
+    def write(self, records):
+        with self.app.app_context():
+            try:
+                self.db.session.execute(self.db.insert(self.model), records)
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+        if self.on_commit is not None:
+            self.on_commit(records)
+
+
+class LoggingAuditSink(AuditSink):
+    """Write records as JSON lines to a logger, e.g. for shipping to a SIEM."""
+
+    def __init__(self, log=None):
+        self.log = log or logger
+
+    def write(self, records):
+        for record in records:
+            self.log.info(json.dumps(record, default=str))
+
+
+class AuditRecorder:
+    """Route audit records to the caller's transaction or the batch writer.
+
+    ``stage`` adds a record to the current unit of work; SYNC records use it
+    so they commit (or roll back) together with the change they describe.
+    BATCHED records go through a bounded queue; if it is full the record is
+    written straight to the sink rather than dropped.
+    """
+
+    def __init__(self, sink, stage, default_durability=BATCHED, **writer_options):
+        if default_durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown audit durability: {default_durability}")
+        self.sink = sink
+        self.stage = stage
+        self.default_durability = default_durability
+        self.writer = BatchWriter(sink.write, name='audit-writer', **writer_options)
+
+    def record(self, record, durability=None):
+        durability = durability or self.default_durability
+        if durability == SYNC:
+            self.stage(record)
+        elif durability == BATCHED:
+            if not self.writer.submit(record):
+                logger.warning("Audit queue full, writing record synchronously")
+                self.sink.write([record])
+        else:
+            raise ValueError(f"Unknown audit durability: {durability}")
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+    def stats(self):
+        stats = self.writer.stats()
+        stats['default_durability'] = self.default_durability
+        return stats
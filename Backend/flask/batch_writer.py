@@ -0,0 +1,174 @@
+"""Bounded in-process queue drained by a background thread in batches."""
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Collect items on a bounded queue and hand them to ``flush`` in batches.
+
+    A batch is flushed once ``batch_size`` items are waiting or
+    ``flush_interval`` seconds after its first item arrived, whichever comes
+    first. ``flush`` runs on the writer thread and receives a list of items.
+    The thread is started lazily, and restarted after a fork, so importing
+    the module under a pre-forking server does not leak threads.
+    """
+
+    def __init__(self, flush, name='batch-writer', max_queue=10000, batch_size=500,
+                 flush_interval=1.0, retries=3):
+        self._flush = flush
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        # Every submitted item carries a sequence number until it is written
+        # (or given up on), so flush() can wait for batches in flight.
+        self._written = threading.Condition(self._lock)
+        self._seq = 0
+        self._unfinished = set()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'flushed': 0,
+            'lost': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    def submit(self, item):
+        """Queue an item without blocking; returns False if the queue is full."""
+        self._ensure_started()
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._unfinished.add(seq)
+        try:
+            self._queue.put_nowait((seq, item))
+        except queue.Full:
+            with self._lock:
+                self._unfinished.discard(seq)
+                self._stats['rejected'] += 1
+            return False
+        with self._lock:
+            self._stats['submitted'] += 1
+        return True
+
+    def flush(self, timeout=None):
+        """Write everything submitted before the call.
+
+        Drains the queue on the calling thread, then waits for batches the
+        writer thread had already taken. Returns False if ``timeout`` seconds
+        pass before they are written.
+        """
+        with self._lock:
+            target = self._seq
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                break
+            self._write(batch)
+        with self._written:
+            if self._pid != os.getpid():
+                return True  # the writer thread, and its batch, stayed in the parent process
+            return self._written.wait_for(lambda: not any(seq <= target for seq in self._unfinished), timeout)
+
+    def close(self, timeout=5.0):
+        """Stop the writer thread and flush what is left on the queue."""
+        self._stopping.set()
+        thread = self._thread
+        if thread and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats.pop('batches')
+        total_flush_ms = stats.pop('total_flush_ms')
+        stats['batches'] = batches
+        stats['avg_flush_ms'] = round(total_flush_ms / batches, 3) if batches else 0.0
+        stats['queue_depth'] = self._queue.qsize()
+        stats['max_queue'] = self.max_queue
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            if self._pid != os.getpid():
+                # Batches the parent's writer was writing are not ours to wait for.
+                self._unfinished = {seq for seq, _ in list(self._queue.queue)}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take(block=True)
+            if batch:
+                self._write(batch)
+
+    def _take(self, block):
+        try:
+            first = self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait()
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, entries):
+        try:
+            self._write_batch([item for _, item in entries])
+        finally:
+            with self._written:
+                self._unfinished.difference_update(seq for seq, _ in entries)
+                self._written.notify_all()
+
+    def _write_batch(self, batch):
+        for attempt in range(1, self.retries + 1):
+            started = time.perf_counter()
+            try:
+                self._flush(batch)
+            except Exception as e:
+                logger.error(f"{self.name}: flush of {len(batch)} items failed (attempt {attempt}): {str(e)}")
+                with self._lock:
+                    self._stats['failed_batches'] += 1
+                time.sleep(min(0.1 * 2 ** attempt, 2.0))
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['flushed'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['last_flush_ms'] = round(elapsed_ms, 3)
+                self._stats['max_flush_ms'] = round(max(self._stats['max_flush_ms'], elapsed_ms), 3)
+                self._stats['total_flush_ms'] += elapsed_ms
+            return
+        logger.error(f"{self.name}: dropping {len(batch)} items after {self.retries} failed attempts")
+        with self._lock:
+            self._stats['lost'] += len(batch)
@@ -0,0 +1,136 @@
+"""Parsing and vectorized validation for bulk transaction ingestion.
+
+Payloads are a JSON array of objects or NDJSON (one object per line). Rows
+are validated column-wise with pandas; every rejected row is reported with
+its 0-based position in the payload and the reasons it was rejected.
+"""
+import csv
+import hashlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+COLUMNS = ['amount', 'transaction_type', 'description', 'timestamp', 'country', 'counterparty']
+
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)  # how far ahead of the server clock a timestamp may be
+
+
+class PayloadError(ValueError):
+    """The payload as a whole could not be parsed."""
+
+
+def read_payload(stream, mimetype, max_rows):
+    """Parse a request body into (records, row errors, sha256 of the body).
+
+    NDJSON is read line by line from ``stream``; a line that is not valid
+    JSON becomes a row error rather than failing the whole batch.
+    """
+    digest = hashlib.sha256()
+    records = []
+    errors = {}
+    if mimetype in NDJSON_MIMETYPES:
+        for line in stream:
+            digest.update(line)
+            line = line.strip()
+            if not line:
+                continue
+            if len(records) >= max_rows:
+                raise PayloadError(f"At most {max_rows} rows per batch")
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                errors[len(records)] = [f"invalid JSON: {e}"]
+                records.append(None)
+    else:
+        body = stream.read()
+        digest.update(body)
+        try:
+            records = json.loads(body)
+        except ValueError as e:
+            raise PayloadError(f"Invalid JSON: {e}") from e
+        if not isinstance(records, list):
+            raise PayloadError('Expected a JSON array of transactions')
+        if len(records) > max_rows:
+            raise PayloadError(f"At most {max_rows} rows per batch")
+    return records, errors, digest.hexdigest()
+
+
+def _str_len(series):
+    """Length of each string value, NaN where the value is missing or not a string."""
+    try:
+        return series.str.len()
+    except AttributeError:
+        return pd.Series(np.nan, index=series.index)
+
+
+def validate_transactions(records, now, errors=None):
+    """Validate transaction records column-wise.
+
+    Returns a DataFrame of the valid rows (indexed by payload position, with
+    the Transaction column names) and a list of ``{'row', 'errors'}`` dicts
+    sorted by row. ``errors`` holds row errors found while parsing.
+    """
+    errors = {row: list(messages) for row, messages in (errors or {}).items()}
+    objects = [r if isinstance(r, dict) else {} for r in records]
+    for row, record in enumerate(records):
+        if not isinstance(record, dict) and row not in errors:
+            errors[row] = ['expected a JSON object']
+
+    df = pd.DataFrame.from_records(objects, index=pd.RangeIndex(len(objects)))
+    df = df.reindex(columns=['amount', 'type', 'description', 'timestamp', 'country', 'counterparty']).astype(object)
+
+    amount = pd.to_numeric(df['amount'].where(df['amount'].map(type).isin((int, float))), errors='coerce')
+    type_len = _str_len(df['type'])
+    description_len = _str_len(df['description'])
+    country_len = _str_len(df['country'])
+    counterparty_len = _str_len(df['counterparty'])
+    timestamp = pd.to_datetime(df['timestamp'].where(df['timestamp'].map(type).eq(str)),
+                               errors='coerce', utc=True, format='ISO8601')
+
+    checks = [
+        (~np.isfinite(amount.to_numpy(dtype=np.float64)), 'amount must be a finite number'),
+        (type_len.isna() | (type_len == 0) | (type_len > 20), 'type must be a string of 1-20 characters'),
+        (description_len.isna() | (description_len > 200), 'description must be a string of at most 200 characters'),
+        (df['timestamp'].notna() & timestamp.isna(), 'timestamp must be an ISO 8601 string'),
+        (timestamp > pd.Timestamp(now).tz_localize('UTC') + MAX_CLOCK_SKEW, 'timestamp must not be in the future'),
+        (df['country'].notna() & (country_len != 2), 'country must be a 2-letter ISO 3166 code'),
+        (df['counterparty'].notna() & (counterparty_len.isna() | (counterparty_len > 100)),
+         'counterparty must be a string of at most 100 characters'),
+    ]
+    # Rows that were not objects to begin with only get their parse error.
+    unparsed = np.zeros(len(df), dtype=bool)
+    unparsed[list(errors)] = True
+    invalid = unparsed.copy()
+    for mask, message in checks:
+        mask = np.asarray(mask, dtype=bool) & ~unparsed
+        invalid |= mask
+        for row in np.flatnonzero(mask):
+            errors.setdefault(int(row), []).append(message)
+
+    valid = ~invalid
+    timestamps = timestamp[valid].dt.tz_convert(None).astype(object)
+    rows = pd.DataFrame({
+        'amount': amount[valid].astype(float),
+        'transaction_type': df['type'][valid],
+        'description': df['description'][valid],
+        'timestamp': timestamps.where(timestamps.notna(), now),
+        'country': df['country'][valid].map(lambda c: c.upper() if isinstance(c, str) else None),
+        'counterparty': df['counterparty'][valid].where(df['counterparty'][valid].notna(), None),
+    }, columns=COLUMNS)
+    return rows, [{'row': row, 'errors': errors[row]} for row in sorted(errors)]
+
+
+def copy_rows(dbapi_connection, table, columns, rows):
+    """Load rows with PostgreSQL COPY through a psycopg2 connection."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if value is None else value for value in row])
+    buffer.seek(0)
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{table}" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer)
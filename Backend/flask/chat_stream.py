@@ -0,0 +1,46 @@
+"""Server-sent events helpers and latency metrics for streamed chat."""
+import json
+import threading
+from collections import deque
+
+from metrics import percentile
+
+
+def sse_event(data, event=None):
+    """Format one server-sent event carrying ``data`` as JSON."""
+    lines = f"event: {event}\n" if event else ""
+    return f"{lines}data: {json.dumps(data)}\n\n"
+
+
+class StreamMetrics:
+    """Counts and recent-window percentiles of time to first token and total stream time."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=window)
+        self._duration = deque(maxlen=window)
+        self._stats = {'streams': 0, 'completed': 0, 'interrupted': 0, 'errors': 0, 'cached': 0, 'tokens': 0}
+
+    def record(self, outcome, ttft=None, duration=None, tokens=0, cached=False):
+        """``outcome`` is 'completed', 'interrupted' or 'errors'; times are in seconds."""
+        with self._lock:
+            self._stats['streams'] += 1
+            self._stats[outcome] += 1
+            self._stats['tokens'] += tokens
+            if cached:
+                self._stats['cached'] += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            if duration is not None:
+                self._duration.append(duration)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            ttft = list(self._ttft)
+            duration = list(self._duration)
+        stats['ttft_p50'] = percentile(ttft, 0.5)
+        stats['ttft_p95'] = percentile(ttft, 0.95)
+        stats['duration_p50'] = percentile(duration, 0.5)
+        stats['duration_p95'] = percentile(duration, 0.95)
+        return stats
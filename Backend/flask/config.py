@@ -0,0 +1,91 @@
+"""Database configuration read from the environment.
+
+DATABASE_URL             SQLAlchemy URL (default sqlite:///complianceai.db)
+DB_POOL_SIZE             connections kept open per process (default 5)
+DB_MAX_OVERFLOW          extra connections allowed under burst (default 10)
+DB_POOL_TIMEOUT          seconds to wait for a free connection (default 30)
+DB_POOL_RECYCLE          seconds before a connection is replaced (default 1800)
+DB_POOL_PRE_PING         test connections on checkout (default true)
+SQLITE_JOURNAL_MODE      SQLite journal mode (default WAL)
+SQLITE_SYNCHRONOUS       SQLite synchronous level (default NORMAL)
+SQLITE_BUSY_TIMEOUT_MS   how long SQLite waits on a locked database (default 5000)
+"""
+import os
+
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URL = 'sqlite:///complianceai.db'
+
+
+def _env_int(environ, name, default):
+    return int(environ.get(name, default))
+
+
+def _env_bool(environ, name, default):
+    return environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_sqlite(url):
+    return url.startswith('sqlite')
+
+
+def is_sqlite_memory(url):
+    return is_sqlite(url) and (':memory:' in url or url.rstrip('/') in ('sqlite:', 'sqlite:/'))
+
+
+def database_config(environ=None):
+    """Return Flask-SQLAlchemy settings (URI and engine options) for the environment."""
+    environ = os.environ if environ is None else environ
+    url = environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if url.startswith('postgres://'):
+        # Heroku-style URLs use a scheme SQLAlchemy no longer accepts.
+        url = 'postgresql://' + url[len('postgres://'):]
+
+    options = {}
+    if is_sqlite(url):
+        # sqlite3's own lock wait, in seconds; the PRAGMA below mirrors it.
+        options['connect_args'] = {
+            'timeout': _env_int(environ, 'SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+            'check_same_thread': False
+        }
+    if not is_sqlite_memory(url):
+        options.update(
+            pool_size=_env_int(environ, 'DB_POOL_SIZE', 5),
+            max_overflow=_env_int(environ, 'DB_MAX_OVERFLOW', 10),
+            pool_timeout=_env_int(environ, 'DB_POOL_TIMEOUT', 30),
+            pool_recycle=_env_int(environ, 'DB_POOL_RECYCLE', 1800),
+            pool_pre_ping=_env_bool(environ, 'DB_POOL_PRE_PING', not is_sqlite(url))
+        )
+    return {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': options
+    }
+
+
+def sqlite_pragmas(environ=None):
+    environ = os.environ if environ is None else environ
+    return {
+        'journal_mode': environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': _env_int(environ, 'SQLITE_BUSY_TIMEOUT_MS', 5000)
+    }
+
+
+def configure_engine(engine, environ=None):
+    """Apply per-connection SQLite pragmas; a no-op for other databases.
+
+    WAL lets readers proceed while a writer holds the lock, and
+    synchronous=NORMAL is safe under WAL while skipping an fsync per commit.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(environ)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
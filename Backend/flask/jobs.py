@@ -0,0 +1,320 @@
+"""Background jobs kept in a local SQLite file, run by a pool of worker threads.
+
+Endpoints enqueue a job and answer 202 straight away; a worker claims it,
+runs the registered handler and stores its result. Jobs survive restarts:
+queued jobs wait in the file, and a running job whose worker stopped
+heartbeating (the process died) is claimed again. A failing job is retried
+with exponential backoff up to ``max_attempts`` times. Cancellation is
+cooperative: a queued job is cancelled at once, a running one the next time
+its handler reports progress.
+
+Nothing runs until ``start()`` is called, so importing the module (or the
+app) in a CLI command or script does not start workers. Every process that
+calls ``start()`` runs workers; claiming a job is a single write
+transaction, so no job runs twice.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner_id INTEGER,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    run_after REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state_run_after ON jobs (state, run_after);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """What a handler sees of its job: id, payload, attempt number and progress reporting."""
+
+    def __init__(self, queue, row):
+        self.queue = queue
+        self.id = row['id']
+        self.kind = row['kind']
+        self.owner_id = row['owner_id']
+        self.payload = json.loads(row['payload'])
+        self.attempt = row['attempts']
+
+    def progress(self, fraction, message=None):
+        """Record progress (0..1); raises JobCancelled if cancellation was requested."""
+        self.queue._progress(self.id, fraction, message)
+
+    @property
+    def cancel_requested(self):
+        return self.queue._cancel_requested(self.id)
+
+
+def _as_dict(row):
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] is not None else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+
+class JobQueue:
+    def __init__(self, path='jobs.sqlite3', workers=2, max_attempts=3, backoff=5.0, poll_interval=0.5,
+                 stale_after=300):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.handlers = {}
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._heartbeat_thread = None
+        self._pid = None
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stats = {'succeeded': 0, 'failed': 0, 'retried': 0, 'cancelled': 0, 'recovered': 0}
+
+    def handler(self, kind):
+        """Decorator registering ``func(job)`` as the handler for ``kind`` jobs; its return value
+        (JSON-serializable) becomes the job result."""
+        def register(func):
+            self.handlers[kind] = func
+            return func
+        return register
+
+    def enqueue(self, kind, payload, owner_id=None, max_attempts=None):
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connection() as db:
+            db.execute(
+                'INSERT INTO jobs (id, kind, owner_id, payload, state, max_attempts, run_after, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, kind, owner_id, json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now, now)
+            )
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _as_dict(row) if row else None
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop; returns the job, or None if unknown."""
+        now = time.time()
+        with self._connection() as db:
+            db.execute(
+                'UPDATE jobs SET state = ?, finished_at = ?, message = ? WHERE id = ? AND state = ?',
+                (CANCELLED, now, 'Cancelled before it started', job_id, QUEUED)
+            )
+            db.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND state = ?', (job_id, RUNNING))
+        return self.get(job_id)
+
+    @property
+    def running(self):
+        """Whether this process has started workers that are still alive."""
+        return self._pid == os.getpid() and any(thread.is_alive() for thread in self._threads)
+
+    def start(self, workers=None):
+        """Start ``workers`` (default ``self.workers``) worker threads, once per process.
+
+        Does nothing if workers are already running here; their number is
+        not changed.
+        """
+        with self._lock:
+            if self.running:
+                return
+            if workers is not None:
+                self.workers = workers
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(self.workers)
+            ]
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+            for thread in self._threads + [self._heartbeat_thread]:
+                thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        threads = self._threads + ([self._heartbeat_thread] if self._heartbeat_thread else [])
+        for thread in threads:
+            if thread is not threading.current_thread() and thread.ident is not None:
+                thread.join(timeout)
+
+    def run_pending(self):
+        """Claim and run one due job in the calling thread; False if there was none."""
+        job = self._claim()
+        if job is None:
+            return False
+        self._run(job)
+        return True
+
+    def stats(self):
+        counts = dict(self._connection().execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        with self._lock:
+            stats = dict(self._stats, running_here=len(self._running))
+        stats['jobs'] = {state: counts.get(state, 0) for state in (QUEUED, RUNNING) + FINISHED}
+        stats['workers'] = sum(thread.is_alive() for thread in self._threads) if self._pid == os.getpid() else 0
+        return stats
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                ran = self.run_pending()
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _heartbeat(self):
+        # Proves to other processes that this one's running jobs are still alive.
+        while not self._stop.wait(self.stale_after / 3):
+            with self._lock:
+                running = list(self._running)
+            if running:
+                with self._connection() as db:
+                    db.executemany('UPDATE jobs SET heartbeat = ? WHERE id = ?',
+                                   [(time.time(), job_id) for job_id in running])
+
+    def _claim(self):
+        now = time.time()
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs left running by a dead worker go back to the queue (or fail if out of attempts).
+            stale = db.execute(
+                'SELECT id, attempts, max_attempts FROM jobs WHERE state = ? AND heartbeat < ?',
+                (RUNNING, now - self.stale_after)
+            ).fetchall()
+            for row in stale:
+                if row['attempts'] < row['max_attempts']:
+                    db.execute('UPDATE jobs SET state = ?, run_after = ?, message = ? WHERE id = ?',
+                               (QUEUED, now, 'Requeued after its worker stopped', row['id']))
+                else:
+                    db.execute('UPDATE jobs SET state = ?, finished_at = ?, error = ? WHERE id = ?',
+                               (FAILED, now, 'Worker stopped while running the job', row['id']))
+            if stale:
+                self._count('recovered', len(stale))
+            row = db.execute(
+                'SELECT * FROM jobs WHERE state = ? AND run_after <= ? ORDER BY run_after, created_at LIMIT 1',
+                (QUEUED, now)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    'UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, heartbeat = ?, '
+                    'cancel_requested = 0 WHERE id = ?', (RUNNING, now, now, row['id'])
+                )
+                row = db.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return Job(self, row) if row is not None else None
+
+    def _run(self, job):
+        with self._lock:
+            self._running.add(job.id)
+        started = time.monotonic()
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{job.kind}'")
+            result = handler(job)
+        except JobCancelled:
+            self._finish(job.id, CANCELLED, message='Cancelled while running')
+            self._count('cancelled')
+        except Exception as e:
+            row = self.get(job.id)
+            if row['attempts'] < row['max_attempts']:
+                delay = self.backoff * 2 ** (row['attempts'] - 1)
+                with self._connection() as db:
+                    db.execute('UPDATE jobs SET state = ?, run_after = ?, error = ?, message = ? WHERE id = ?',
+                               (QUEUED, time.time() + delay, str(e), f"Retrying in {delay:.1f}s", job.id))
+                self._count('retried')
+                logger.warning(f"Job {job.id} ({job.kind}) attempt {row['attempts']} failed, "
+                               f"retrying in {delay:.1f}s: {str(e)}")
+            else:
+                self._finish(job.id, FAILED, error=str(e))
+                self._count('failed')
+                logger.error(f"Job {job.id} ({job.kind}) failed after {row['attempts']} attempts: {str(e)}")
+        else:
+            self._finish(job.id, SUCCEEDED, result=json.dumps(result))
+            self._count('succeeded')
+            logger.info(f"Job {job.id} ({job.kind}) succeeded in {time.monotonic() - started:.2f}s")
+        finally:
+            with self._lock:
+                self._running.discard(job.id)
+
+    def _finish(self, job_id, state, result=None, error=None, message=None):
+        with self._connection() as db:
+            db.execute(
+                'UPDATE jobs SET state = ?, finished_at = ?, result = ?, error = ?, message = COALESCE(?, message), '
+                'progress = CASE WHEN ? THEN 1 ELSE progress END WHERE id = ?',
+                (state, time.time(), result, error, message, state == SUCCEEDED, job_id)
+            )
+
+    def _progress(self, job_id, fraction, message):
+        with self._connection() as db:
+            db.execute(
+                'UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat = ? WHERE id = ?',
+                (min(max(fraction, 0.0), 1.0), message, time.time(), job_id)
+            )
+        if self._cancel_requested(job_id):
+            raise JobCancelled()
+
+    def _cancel_requested(self, job_id):
+        row = self._connection().execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads; keep one per thread.
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(SCHEMA)
+            self._local.db = db
+        return db
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
@@ -0,0 +1,215 @@
+"""Persistent cache of LLM completions for repeated questions.
+
+Entries live in a local SQLite file, so they are shared by every worker on
+the host and survive restarts. The key is the normalized prompt plus the
+role and model parameters; entries expire after a TTL and the least
+recently used ones are evicted beyond ``max_entries``.
+
+With ``semantic=True`` a miss falls back to the most similar cached prompt
+for the same role and parameters, compared by cosine similarity of local
+embeddings, so "What is the KYC threshold?" can answer "what's the kyc
+threshold". The default embedder hashes words and character trigrams and
+needs nothing beyond numpy.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    embedding BLOB
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_namespace ON llm_cache (namespace);
+"""
+
+
+def normalize_prompt(text):
+    """Case-fold, NFKC-normalize, collapse whitespace and drop trailing punctuation."""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip('?!. ')
+
+
+class HashingEmbedder:
+    """Bag of hashed words, word bigrams and character trigrams, L2-normalized."""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def __call__(self, text):
+        words = re.findall(r'\w+', text)
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        padded = f" {' '.join(words)} "
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Embeddings from a local sentence-transformers model, if that package is installed."""
+
+    def __init__(self, model_name='all-MiniLM-L6-v2'):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError('The sentence-transformers package is required for this embedder') from e
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, text):
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+class LLMCache:
+    def __init__(self, path='llm_cache.sqlite3', ttl=86400, max_entries=5000, enabled=True,
+                 semantic=False, similarity_threshold=0.9, embedder=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder or (HashingEmbedder() if semantic else None)
+        self._local = threading.local()
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'semantic_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, prompt, role, params):
+        """Return the cached response for this question, or None."""
+        if not self.enabled:
+            return None
+        normalized = normalize_prompt(prompt)
+        namespace = self._namespace(role, params)
+        key = self._key(normalized, namespace)
+        now = time.time()
+        db = self._connection()
+        row = db.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        if row and row[1] + self.ttl > now:
+            with db:
+                db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            self._count('hits')
+            return row[0]
+        if self.semantic:
+            match = self._nearest(db, namespace, normalized)
+            if match is not None:
+                with db:
+                    db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, match[0]))
+                self._count('semantic_hits')
+                return match[1]
+        self._count('misses')
+        return None
+
+    def put(self, prompt, role, params, response):
+        if not self.enabled:
+            return
+        normalized = normalize_prompt(prompt)
+        namespace = self._namespace(role, params)
+        embedding = self.embedder(normalized).astype(np.float32).tobytes() if self.semantic else None
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, namespace, prompt, response, created_at, last_access, embedding) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self._key(normalized, namespace), namespace, normalized, response, now, now, embedding)
+            )
+            evicted = db.execute('DELETE FROM llm_cache WHERE created_at <= ?', (now - self.ttl,)).rowcount
+            size = db.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+            if size > self.max_entries:
+                evicted += db.execute(
+                    'DELETE FROM llm_cache WHERE key IN '
+                    '(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)', (size - self.max_entries,)
+                ).rowcount
+        self._count('stores')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute('DELETE FROM llm_cache')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['semantic_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['semantic_hits']) / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        stats['semantic'] = self.semantic
+        if self.enabled:
+            stats['entries'] = self._connection().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        return stats
+
+    def _nearest(self, db, namespace, normalized):
+        keys, responses, matrix = self._embeddings(db, namespace)
+        if not keys:
+            return None
+        query = self.embedder(normalized).astype(np.float32)
+        if matrix.shape[1] != query.shape[0]:
+            return None
+        similarity = matrix @ query
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.similarity_threshold:
+            return None
+        return keys[best], responses[best]
+
+    def _embeddings(self, db, namespace):
+        """The namespace's live embeddings as one matrix, reloaded only when its entries change."""
+        signature = db.execute(
+            'SELECT COUNT(*), MAX(created_at), MIN(created_at) FROM llm_cache WHERE namespace = ?', (namespace,)
+        ).fetchone()
+        with self._lock:
+            cached = self._matrices.get(namespace)
+        if cached is not None and cached[0] == signature and (signature[2] or 0) + self.ttl > time.time():
+            return cached[1:]
+        rows = db.execute(
+            'SELECT key, response, embedding FROM llm_cache WHERE namespace = ? AND created_at > ? '
+            'AND embedding IS NOT NULL', (namespace, time.time() - self.ttl)
+        ).fetchall()
+        keys = [row[0] for row in rows]
+        responses = [row[1] for row in rows]
+        matrix = np.frombuffer(b''.join(row[2] for row in rows), dtype=np.float32).reshape(len(rows), -1) \
+            if rows else np.zeros((0, 0), dtype=np.float32)
+        with self._lock:
+            self._matrices[namespace] = (signature, keys, responses, matrix)
+        return keys, responses, matrix
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads; keep one per thread.
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(SCHEMA)
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _namespace(role, params):
+        return hashlib.sha256(json.dumps([role, params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _key(normalized, namespace):
+        return hashlib.sha256(f"{namespace}\n{normalized}".encode()).hexdigest()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
@@ -0,0 +1,229 @@
+"""One gateway for every language-model call: chat, audit reports and anomaly explanations.
+
+Calls share a pooled HTTP session and a global concurrency limit, draw from
+request and token rate buckets, and carry a deadline. Identical prompts
+already in flight are coalesced into a single upstream request, and
+``complete_many`` sends prompts in batches (the completions API accepts a
+list of prompts). A call that times out or fails raises LLMUnavailable, or
+returns ``fallback`` when one is given.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import percentile
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """The model could not answer: it failed, was overloaded or ran out of time."""
+
+
+class LLMTimeout(LLMUnavailable):
+    pass
+
+
+def estimate_tokens(text):
+    # About four characters per token for English text; only used for budgeting.
+    return len(text) // 4 + 1
+
+
+class OpenAICompletions:
+    """openai.Completion over one shared HTTP session with ``pool_size`` keep-alive connections."""
+
+    def __init__(self, pool_size=8):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Otherwise openai opens a session per thread and recycles it every few minutes.
+        openai.requestssession = self.session
+
+    def complete(self, prompts, timeout, **params):
+        """Returns (texts in prompt order, prompt tokens, completion tokens)."""
+        response = openai.Completion.create(
+            prompt=prompts if len(prompts) > 1 else prompts[0], request_timeout=timeout, **params
+        )
+        n = params.get('n') or 1
+        texts = [None] * len(prompts)
+        for choice in response.choices:
+            if choice.index % n == 0:
+                texts[choice.index // n] = choice.text.strip()
+        usage = response.get('usage') or {}
+        return texts, usage.get('prompt_tokens'), usage.get('completion_tokens')
+
+    def stream(self, prompt, timeout, **params):
+        for chunk in openai.Completion.create(prompt=prompt, stream=True, request_timeout=timeout, **params):
+            yield chunk.choices[0].text
+
+
+class LLMGateway:
+    def __init__(self, backend=None, max_concurrency=8, rate=None, burst=None, tokens_per_minute=None,
+                 timeout=20.0, batch_size=20, window=1000):
+        """``rate`` is upstream requests per second and ``tokens_per_minute`` the token
+        budget (prompt plus max_tokens); None leaves either unlimited."""
+        self.backend = backend or OpenAICompletions(pool_size=max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._request_bucket = TokenBucket(rate, burst or max(1, int(rate))) if rate else None
+        self._token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._latency = deque(maxlen=window)
+        self._stats = {'calls': 0, 'coalesced': 0, 'requests': 0, 'in_flight': 0, 'timeouts': 0, 'errors': 0,
+                       'fallbacks': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+    def complete(self, prompt, fallback=None, timeout=None, **params):
+        """The model's answer to ``prompt``, sharing the request of an identical call in flight."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        key = json.dumps([prompt, params], sort_keys=True, default=str)
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self._stats['coalesced'] += 1
+        if leader:
+            try:
+                future.set_result(self._request([prompt], deadline, params)[0])
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            self._count('timeouts')
+            error = LLMTimeout('Timed out waiting for an identical request in flight')
+        except LLMUnavailable as e:
+            error = e
+        if fallback is None:
+            raise error
+        self._count('fallbacks')
+        return fallback
+
+    def complete_many(self, prompts, fallback=None, timeout=None, **params):
+        """Answers for ``prompts`` in order, sent ``batch_size`` distinct prompts per request.
+
+        With a ``fallback`` a failed batch answers its prompts with it
+        instead of failing the whole call.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        unique = list(dict.fromkeys(prompts))
+        batches = [unique[i:i + self.batch_size] for i in range(0, len(unique), self.batch_size)]
+        answers = {}
+        self._count('calls', len(prompts))
+        self._count('coalesced', len(prompts) - len(unique))
+
+        def run(batch):
+            try:
+                texts = self._request(batch, deadline, params)
+            except LLMUnavailable:
+                if fallback is None:
+                    raise
+                self._count('fallbacks', len(batch))
+                texts = [fallback] * len(batch)
+            answers.update(zip(batch, texts))
+
+        if len(batches) <= 1:
+            for batch in batches:
+                run(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(batches), self.max_concurrency)) as pool:
+                list(pool.map(run, batches))
+        return [answers[prompt] for prompt in prompts]
+
+    def stream(self, prompt, timeout=None, **params):
+        """Yield the answer's text chunks as they arrive; holds a concurrency slot until done."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count('calls')
+        self._acquire(deadline, [prompt], params)
+        try:
+            started = time.monotonic()
+            parts = []
+            try:
+                for text in self.backend.stream(prompt, deadline - started, **params):
+                    parts.append(text)
+                    yield text
+            except (openai.error.Timeout, requests.Timeout) as e:
+                raise self._failed('timeouts', LLMTimeout(f"Model stream timed out: {str(e)}")) from e
+            except (openai.error.OpenAIError, requests.RequestException) as e:
+                raise self._failed('errors', LLMUnavailable(f"Model stream failed: {str(e)}")) from e
+            self._record(time.monotonic() - started, estimate_tokens(prompt), estimate_tokens(''.join(parts)))
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            latency = list(self._latency)
+        stats['latency_p50'] = percentile(latency, 0.5)
+        stats['latency_p95'] = percentile(latency, 0.95)
+        stats['max_concurrency'] = self.max_concurrency
+        return stats
+
+    def _request(self, prompts, deadline, params):
+        """One upstream request for ``prompts``; returns their answers in order."""
+        self._acquire(deadline, prompts, params)
+        try:
+            started = time.monotonic()
+            try:
+                texts, prompt_tokens, completion_tokens = self.backend.complete(prompts, deadline - started, **params)
+            except (openai.error.Timeout, requests.Timeout) as e:
+                raise self._failed('timeouts', LLMTimeout(f"Model request timed out: {str(e)}")) from e
+            except Exception as e:
+                raise self._failed('errors', LLMUnavailable(f"Model request failed: {str(e)}")) from e
+            latency = time.monotonic() - started
+            self._record(latency, prompt_tokens or sum(map(estimate_tokens, prompts)),
+                         completion_tokens or sum(estimate_tokens(text or '') for text in texts))
+            logger.debug(f"LLM request with {len(prompts)} prompt(s) took {latency:.3f}s")
+            return texts
+        finally:
+            self._release()
+
+    def _acquire(self, deadline, prompts, params):
+        """Wait for a concurrency slot and rate budget, or raise LLMTimeout at ``deadline``."""
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise self._failed('timeouts', LLMTimeout('Timed out waiting for a free model slot'))
+        budget = (sum(map(estimate_tokens, prompts))
+                  + (params.get('max_tokens') or 16) * (params.get('n') or 1) * len(prompts))
+        if ((self._request_bucket and not self._request_bucket.acquire(1, deadline))
+                or (self._token_bucket and not self._token_bucket.acquire(budget, deadline))):
+            self._slots.release()
+            raise self._failed('timeouts', LLMTimeout('Timed out waiting for the model rate limit'))
+        self._count('in_flight')
+
+    def _release(self):
+        self._count('in_flight', -1)
+        self._slots.release()
+
+    def _record(self, latency, prompt_tokens, completion_tokens):
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['prompt_tokens'] += prompt_tokens
+            self._stats['completion_tokens'] += completion_tokens
+            self._latency.append(latency)
+
+    def _failed(self, kind, error):
+        self._count(kind)
+        logger.warning(str(error))
+        return error
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
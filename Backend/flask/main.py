@@ -1,27 +1,101 @@
-import random
+import atexit
+import os
 import re
-from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, render_template
+import time
+from datetime import date, datetime, timedelta
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_migrate import Migrate
+import click
 import jwt
+from contextlib import contextmanager
 from functools import wraps
 import openai
 import logging
 from logging.handlers import RotatingFileHandler
 import json
 from flask_cors import CORS
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from email_validator import validate_email, EmailNotValidError
 import hashlib
+import itertools
+import math
 import requests
+from config import configure_engine, database_config
+from pagination import CountCache, encode_cursor, keyset_page, keyset_query, newest_first
+from query_plans import explain, full_scans
+from streaming import csv_chunks, gzip_chunks, ndjson_chunks
+from audit import AuditRecorder, DatabaseAuditSink, LoggingAuditSink, BATCHED, SYNC
+from batch_writer import BatchWriter
+from passwords import PasswordHasher, PasswordHasherBusy
+from user_cache import PrincipalCache, UserPrincipal
+from response_cache import MemoryBackend, RedisBackend, ResponseCache
+from online_scoring import OnlineScorer
+from rules_engine import RuleSet, TransactionFacts, histories_from_rows
+from bulk_ingest import PayloadError, copy_rows, read_payload, validate_transactions
+from regulatory_sync import RegulatorySync
+from notifications import WebhookNotifier
+from llm_cache import LLMCache
+from llm_gateway import LLMGateway, LLMUnavailable
+from chat_stream import StreamMetrics, sse_event
+from jobs import FINISHED, JobQueue
+from report_store import ReportContentStore, iter_decompressed, parse_range
 
 app = Flask(__name__)
 CORS(app)
 app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///complianceai.db'
+app.config.update(database_config())
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['COUNT_CACHE_TTL'] = 30  # seconds a list total is reused across pages
+app.config['MAX_PER_PAGE'] = 100
+app.config['EXPORT_YIELD_PER'] = 1000  # rows fetched per round trip when streaming exports
+app.config['AUDIT_SINK'] = 'database'  # 'database' or 'log'
+app.config['AUDIT_DEFAULT_DURABILITY'] = BATCHED
+app.config['AUDIT_QUEUE_SIZE'] = 10000
+app.config['AUDIT_BATCH_SIZE'] = 500
+app.config['AUDIT_FLUSH_INTERVAL'] = 1.0  # seconds
+app.config['USER_CACHE_ENABLED'] = True
+app.config['USER_CACHE_TTL'] = 60  # seconds; also how long other worker processes may see a changed role
+app.config['USER_CACHE_SIZE'] = 10000
+app.config['RESPONSE_CACHE_ENABLED'] = True
+app.config['RESPONSE_CACHE_BACKEND'] = 'memory'  # 'memory' or 'redis'
+app.config['RESPONSE_CACHE_REDIS_URL'] = 'redis://localhost:6379/0'
+app.config['RESPONSE_CACHE_TTL'] = 300  # seconds
+app.config['RESPONSE_CACHE_SIZE'] = 1024
+app.config['COMPLIANCE_RULES_PATH'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compliance_rules.json')
+app.config['COMPLIANCE_BATCH_LIMIT'] = 10000  # transaction ids per batch check
+app.config['BULK_INGEST_MAX_ROWS'] = 100000
+app.config['BULK_INGEST_MAX_ERRORS'] = 1000  # row errors returned per batch
+app.config['REGULATORY_FEED_URL'] = 'https://mock-regulatory-updates-api.com/updates'
+app.config['REGULATORY_SYNC_INTERVAL'] = 0  # seconds; 0 leaves syncing to `flask sync-regulatory-updates`
+app.config['REGULATORY_WEBHOOK_URL'] = None  # Teams webhook told about new updates
+app.config['LLM_CACHE_ENABLED'] = True
+app.config['LLM_CACHE_PATH'] = 'llm_cache.sqlite3'
+app.config['LLM_CACHE_TTL'] = 86400  # seconds
+app.config['LLM_CACHE_SIZE'] = 5000
+app.config['LLM_CACHE_SEMANTIC'] = False  # also answer near-duplicate questions
+app.config['LLM_CACHE_SIMILARITY'] = 0.9  # cosine similarity needed for a semantic hit
+app.config['LLM_MAX_CONCURRENCY'] = 8  # model requests in flight across all requests
+app.config['LLM_RATE'] = 0  # model requests per second; 0 means unlimited
+app.config['LLM_TOKENS_PER_MINUTE'] = 0  # prompt plus max_tokens budget; 0 means unlimited
+app.config['LLM_TIMEOUT'] = 20  # seconds before a chat falls back
+app.config['JOB_QUEUE_PATH'] = 'jobs.sqlite3'
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # per serving process; 0 leaves jobs to `flask run-jobs`
+app.config['JOB_MAX_ATTEMPTS'] = 3
+app.config['JOB_RETRY_BACKOFF'] = 5  # seconds, doubled on every retry
+app.config['PASSWORD_HASH_SCHEME'] = 'scrypt'  # 'scrypt', 'pbkdf2', 'bcrypt' or 'argon2' (the last two need their packages)
+app.config['PASSWORD_HASH_PARAMS'] = {}  # cost settings, e.g. {'n': 2 ** 15, 'r': 8, 'p': 1}; see passwords.DEFAULT_PARAMS
+app.config['PASSWORD_HASH_WORKERS'] = 2  # hashes computed at once per process
+app.config['PASSWORD_HASH_MAX_PENDING'] = 64  # queued beyond this, logins get 503
+app.config['PASSWORD_HASH_TIMEOUT'] = 10  # seconds
+app.config['LAST_LOGIN_FLUSH_INTERVAL'] = 5.0  # seconds
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_engine(db.engine)
+# Schema changes go through Alembic: `flask db upgrade` (see migrations/).
+migrate = Migrate(app, db, render_as_batch=True)
+count_cache = CountCache(ttl=app.config['COUNT_CACHE_TTL'])
 
 # Set your OpenAI API key here
 openai.api_key = 'your_openai_api_key'
@@ -37,12 +111,17 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'customer' or 'employee'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
 class Transaction(db.Model):
+    __table_args__ = (
+        # Matches the newest-first listing and its (timestamp, id) keyset cursor.
+        db.Index('ix_transaction_user_ts_id', 'user_id', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
@@ -50,8 +129,49 @@ class Transaction(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='pending')
     description = db.Column(db.String(200))
+    anomaly_score = db.Column(db.Float)
+    country = db.Column(db.String(2))  # ISO 3166-1 alpha-2 of the other party
+    counterparty = db.Column(db.String(100))
+
+class TransactionRollup(db.Model):
+    """Per user, transaction type and day totals, maintained alongside Transaction."""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'transaction_type', 'day', name='uq_transaction_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    transaction_type = db.Column(db.String(20), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+class AnomalyState(db.Model):
+    """A user's running anomaly statistics (online_scoring), shared by every worker process."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    state = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class IngestBatch(db.Model):
+    """One bulk ingestion request, kept so a retry with the same Idempotency-Key is replayed."""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_ingest_batch_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    idempotency_key = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    accepted = db.Column(db.Integer, nullable=False)
+    rejected = db.Column(db.Integer, nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 class AuditLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_audit_log_ts_id', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)
@@ -60,14 +180,38 @@ class AuditLog(db.Model):
     user_agent = db.Column(db.String(200))
 
 class ComplianceReport(db.Model):
+    __table_args__ = (
+        db.Index('ix_compliance_report_user_ts', 'user_id', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     report_type = db.Column(db.String(50), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    # The body lives compressed in ReportBlob; see report_store.
+    content_digest = db.Column(db.String(64), db.ForeignKey('report_blob.digest'), nullable=False, index=True)
+    content_size = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='draft')
 
+class ReportBlob(db.Model):
+    """A gzip-compressed report body, stored once per distinct text (keyed by its SHA-256)."""
+    digest = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)  # uncompressed bytes
+    data = db.Column(db.LargeBinary, nullable=False)
+
+class ComplianceAudit(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    audit_type = db.Column(db.String(50), nullable=False)
+    result = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending')
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
 class RiskAssessment(db.Model):
+    __table_args__ = (
+        db.Index('ix_risk_assessment_user_ts', 'user_id', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     assessment_type = db.Column(db.String(50), nullable=False)
@@ -79,15 +223,26 @@ class RegulatoryUpdate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     area = db.Column(db.String(50), nullable=False)
     update_text = db.Column(db.Text, nullable=False)
-    effective_date = db.Column(db.Date)
+    effective_date = db.Column(db.Date, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    source_id = db.Column(db.String(100), unique=True, index=True)  # id in the upstream feed
+    content_hash = db.Column(db.String(64), index=True)
+
+class RegulatoryFeedState(db.Model):
+    """Conditional-request validators from the last successful sync of a feed."""
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), unique=True, nullable=False)
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))
+    content_hash = db.Column(db.String(64))
+    synced_at = db.Column(db.DateTime)
 
 class TrainingModule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     duration = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class UserTraining(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -96,6 +251,328 @@ class UserTraining(db.Model):
     status = db.Column(db.String(20), default='not_started')
     completion_date = db.Column(db.DateTime)
 
+# Audit trail: SYNC records are staged in the request's DB transaction,
+# BATCHED records are bulk-inserted by a background writer.
+if app.config['AUDIT_SINK'] == 'log':
+    audit_sink = LoggingAuditSink(logger)
+    stage_audit_record = lambda record: audit_sink.write([record])
+else:
+    audit_sink = DatabaseAuditSink(app, db, AuditLog, on_commit=lambda records: count_cache.invalidate(('audit_logs',)))
+    stage_audit_record = lambda record: db.session.add(AuditLog(**record))
+audit_recorder = AuditRecorder(
+    audit_sink,
+    stage_audit_record,
+    default_durability=app.config['AUDIT_DEFAULT_DURABILITY'],
+    max_queue=app.config['AUDIT_QUEUE_SIZE'],
+    batch_size=app.config['AUDIT_BATCH_SIZE'],
+    flush_interval=app.config['AUDIT_FLUSH_INTERVAL']
+)
+atexit.register(audit_recorder.close)
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_SCHEME'],
+    app.config['PASSWORD_HASH_PARAMS'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT']
+)
+
+def write_last_logins(logins):
+    """Store a batch of (user_id, time) logins, one UPDATE per user with their latest time."""
+    latest = {}
+    for user_id, logged_in_at in logins:
+        latest[user_id] = max(logged_in_at, latest.get(user_id, logged_in_at))
+    with app.app_context():
+        try:
+            db.session.execute(db.update(User), [{'id': user_id, 'last_login': at} for user_id, at in latest.items()])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+# last_login is informational, so logins queue it rather than commit it.
+last_login_writer = BatchWriter(
+    write_last_logins,
+    name='last-login-writer',
+    flush_interval=app.config['LAST_LOGIN_FLUSH_INTERVAL']
+)
+atexit.register(last_login_writer.close)
+
+def request_origin():
+    return {'ip_address': request.remote_addr, 'user_agent': request.user_agent.string}
+
+def audit(user_id, action, durability=None, origin=None):
+    """Record an audit entry for the current request.
+
+    Use SYNC for money movements so the entry commits atomically with the
+    transaction; reads and chat use the batched default and cost no commit.
+    Background jobs pass the ``origin`` captured when they were queued.
+    """
+    audit_recorder.record({
+        'user_id': user_id,
+        'action': action,
+        **(origin or request_origin()),
+        'timestamp': datetime.utcnow()
+    }, durability)
+
+class UnitOfWork:
+    """Changes and audit records staged for a single commit; see unit_of_work()."""
+
+    def __init__(self, user_id, origin=None):
+        self.user_id = user_id
+        self.origin = origin
+
+    def add(self, entity):
+        db.session.add(entity)
+        return entity
+
+    def audit(self, action):
+        audit(self.user_id, action, durability=SYNC, origin=self.origin)
+
+@contextmanager
+def unit_of_work(user_id, origin=None):
+    """Commit everything staged in the block, entity and audit record alike, exactly once.
+
+    Rolls back and re-raises on error, so a change is never persisted without
+    its audit entry (or vice versa).
+    """
+    uow = UnitOfWork(user_id, origin)
+    try:
+        yield uow
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+# Authenticated principals are cached per process so token_required does not
+# hit the user table on every request. Changes to a user are invalidated once
+# they commit, and only in this process: other workers can keep serving the
+# old role or credentials for up to USER_CACHE_TTL.
+principal_cache = PrincipalCache(
+    ttl=app.config['USER_CACHE_TTL'],
+    max_entries=app.config['USER_CACHE_SIZE'],
+    enabled=app.config['USER_CACHE_ENABLED']
+)
+
+def load_principal(user_id):
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    return UserPrincipal(id=user.id, username=user.username, email=user.email, role=user.role)
+
+@event.listens_for(db.session, 'after_flush')
+def collect_principal_invalidations(session, flush_context):
+    changed = session.info.setdefault('principal_user_ids', set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in ('username', 'email', 'role', 'password')):
+                changed.add(obj.id)
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_principals(session):
+    for user_id in session.info.pop('principal_user_ids', ()):
+        principal_cache.invalidate_user(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_principal_invalidations(session):
+    session.info.pop('principal_user_ids', None)
+
+# List totals in count_cache are dropped once rows are added to or removed
+# from the list they count. ORM changes are picked up at flush; Core inserts
+# call invalidate_count_on_commit() themselves.
+def count_cache_key(obj):
+    if isinstance(obj, Transaction):
+        return ('transactions', obj.user_id)
+    if isinstance(obj, ComplianceReport):
+        return ('compliance_reports', obj.user_id)
+    if isinstance(obj, AuditLog):
+        return ('audit_logs',)
+    return None
+
+def invalidate_count_on_commit(key, session=None):
+    (session or db.session).info.setdefault('count_cache_keys', set()).add(key)
+
+@event.listens_for(db.session, 'after_flush')
+def collect_count_invalidations(session, flush_context):
+    for obj in itertools.chain(session.new, session.deleted):
+        key = count_cache_key(obj)
+        if key:
+            invalidate_count_on_commit(key, session)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_counts(session):
+    for key in session.info.pop('count_cache_keys', ()):
+        count_cache.invalidate(key)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_count_invalidations(session):
+    session.info.pop('count_cache_keys', None)
+
+# Reference data (regulatory updates, training modules) is served from a
+# response cache that is invalidated whenever those tables are committed to.
+if app.config['RESPONSE_CACHE_BACKEND'] == 'redis':
+    response_cache_backend = RedisBackend(app.config['RESPONSE_CACHE_REDIS_URL'])
+else:
+    response_cache_backend = MemoryBackend(app.config['RESPONSE_CACHE_SIZE'])
+response_cache = ResponseCache(
+    response_cache_backend,
+    default_ttl=app.config['RESPONSE_CACHE_TTL'],
+    enabled=app.config['RESPONSE_CACHE_ENABLED']
+)
+CACHED_MODEL_NAMESPACES = {
+    RegulatoryUpdate: 'regulatory_updates',
+    TrainingModule: 'training_modules'
+}
+
+@event.listens_for(db.session, 'after_flush')
+def collect_response_cache_invalidations(session, flush_context):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        namespace = CACHED_MODEL_NAMESPACES.get(type(obj))
+        if namespace:
+            session.info.setdefault('response_cache_namespaces', set()).add(namespace)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_response_cache(session):
+    for namespace in session.info.pop('response_cache_namespaces', ()):
+        response_cache.invalidate(namespace)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_response_cache_invalidations(session):
+    session.info.pop('response_cache_namespaces', None)
+
+# Transactions are scored at insert time against per-user running
+# statistics kept in AnomalyState and updated in the same DB transaction.
+transaction_scorer = OnlineScorer()
+
+def lock_anomaly_state(user_id):
+    """Load the user's anomaly statistics, write-locking their row until the current DB transaction ends.
+
+    The row is created or touched with an upsert before it is read, so
+    concurrent requests for one user (in any process) score one after the
+    other instead of overwriting each other's updates.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(AnomalyState).values(user_id=user_id, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(index_elements=['user_id'], set_={'updated_at': stmt.excluded.updated_at})
+        db.session.execute(stmt)
+        state = db.session.execute(
+            db.select(AnomalyState.state).where(AnomalyState.user_id == user_id)
+        ).scalar_one()
+    else:
+        row = db.session.execute(
+            db.select(AnomalyState).where(AnomalyState.user_id == user_id).with_for_update()
+        ).scalar_one_or_none()
+        if row is None:
+            db.session.add(AnomalyState(user_id=user_id))
+            db.session.flush()
+        state = row.state if row is not None else None
+    return transaction_scorer.loads(state)
+
+def score_transactions(user_id, transactions):
+    """Score ``(amount, timestamp)`` pairs and record them in the user's statistics.
+
+    Must run inside the unit of work that stores the transactions, so the
+    statistics change only if they are committed.
+    """
+    scores, stats = transaction_scorer.record(lock_anomaly_state(user_id), transactions)
+    db.session.execute(
+        db.update(AnomalyState).where(AnomalyState.user_id == user_id)
+        .values(state=transaction_scorer.dumps(stats), updated_at=datetime.utcnow())
+    )
+    return scores
+
+# AML rules are compiled once at startup; edit the JSON file and restart to change them.
+compliance_rules = RuleSet.from_file(app.config['COMPLIANCE_RULES_PATH'])
+
+# New regulatory updates are announced through the same batched,
+# rate-limited, retrying notifier as regulatory_monitoring.py.
+regulatory_notifier = WebhookNotifier(app.config['REGULATORY_WEBHOOK_URL']) if app.config['REGULATORY_WEBHOOK_URL'] else None
+
+def notify_new_regulatory_updates(updates):
+    for u in updates:
+        logger.info(f"New regulatory update {u['source_id']} ({u['area']}) effective {u['effective_date']}")
+    if regulatory_notifier is not None:
+        result = regulatory_notifier.send([f"Regulatory update ({u['area']}): {u['update_text']}" for u in updates])
+        if result['failed']:
+            logger.error(f"{result['failed']} of {result['messages']} regulatory update notifications were not delivered")
+
+# The regulatory feed is pulled with conditional requests and upserted by
+# content hash, so an unchanged feed costs one 304 per interval.
+regulatory_sync = RegulatorySync(
+    app, db, RegulatoryUpdate, RegulatoryFeedState,
+    url=app.config['REGULATORY_FEED_URL'],
+    notify=notify_new_regulatory_updates
+)
+if app.config['REGULATORY_SYNC_INTERVAL']:
+    regulatory_sync.start(app.config['REGULATORY_SYNC_INTERVAL'])
+atexit.register(regulatory_sync.stop)
+
+report_store = ReportContentStore(db, ReportBlob)
+
+def set_report_content(report, text):
+    report.content_digest, report.content_size = report_store.save(text)
+    return report
+
+# Chat completions are cached on disk by normalized prompt, role and model
+# parameters, so repeated FAQ-style questions skip the model entirely.
+llm_cache = LLMCache(
+    path=app.config['LLM_CACHE_PATH'],
+    ttl=app.config['LLM_CACHE_TTL'],
+    max_entries=app.config['LLM_CACHE_SIZE'],
+    enabled=app.config['LLM_CACHE_ENABLED'],
+    semantic=app.config['LLM_CACHE_SEMANTIC'],
+    similarity_threshold=app.config['LLM_CACHE_SIMILARITY']
+)
+llm_gateway = LLMGateway(
+    max_concurrency=app.config['LLM_MAX_CONCURRENCY'],
+    rate=app.config['LLM_RATE'] or None,
+    tokens_per_minute=app.config['LLM_TOKENS_PER_MINUTE'] or None,
+    timeout=app.config['LLM_TIMEOUT']
+)
+chat_stream_metrics = StreamMetrics()
+
+# Slow work (report generation, compliance audits) runs as background jobs
+# queued in a local SQLite file; endpoints answer 202 with a job id.
+job_queue = JobQueue(
+    path=app.config['JOB_QUEUE_PATH'],
+    workers=app.config['JOB_WORKERS'],
+    max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+    backoff=app.config['JOB_RETRY_BACKOFF']
+)
+atexit.register(job_queue.stop, 5)
+
+def job_timestamp(value):
+    return datetime.utcfromtimestamp(value).isoformat() if value is not None else None
+
+def serialize_job(job):
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'state': job['state'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'result': job['result'],
+        'error': job['error'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'cancel_requested': job['cancel_requested'],
+        'created_at': job_timestamp(job['created_at']),
+        'started_at': job_timestamp(job['started_at']),
+        'finished_at': job_timestamp(job['finished_at'])
+    }
+
+def job_accepted(job_id, message):
+    response = jsonify({'message': message, 'job_id': job_id, 'status_url': f"/api/jobs/{job_id}"})
+    response.headers['Location'] = f"/api/jobs/{job_id}"
+    return response, 202
+
 # JWT token required decorator
 def token_required(f):
     @wraps(f)
@@ -105,7 +582,7 @@ def token_required(f):
             return jsonify({'message': 'Token is missing!'}), 401
         try:
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.filter_by(id=data['user_id']).first()
+            current_user = principal_cache.get_or_load(data['user_id'], data.get('iat'), load_principal)
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token has expired!'}), 401
         except jwt.InvalidTokenError:
@@ -113,9 +590,27 @@ def token_required(f):
         except Exception as e:
             logger.error(f"Error decoding token: {str(e)}")
             return jsonify({'message': 'Token is invalid!'}), 401
+        if current_user is None:
+            return jsonify({'message': 'Token is invalid!'}), 401
         return f(current_user, *args, **kwargs)
     return decorated
 
+def parse_date_arg(name):
+    """Parse an optional YYYY-MM-DD query argument; raises ValueError if malformed."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return date.fromisoformat(value)
+
+def page_args():
+    """(page, per_page) from the query string, clamped to page >= 1 and 1 <= per_page <= MAX_PER_PAGE."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), app.config['MAX_PER_PAGE'])
+    return page, per_page
+
+def wants_total():
+    return request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+
 def validate_password(password):
     if len(password) < 8:
         return False
@@ -151,7 +646,7 @@ def register():
         if User.query.filter_by(email=email).first():
             return jsonify({'message': 'Email already exists'}), 400
         
-        hashed_password = generate_password_hash(data['password'], method='sha256')
+        hashed_password = password_hasher.hash(data['password'])
         new_user = User(
             username=data['username'],
             email=email,
@@ -162,6 +657,8 @@ def register():
         db.session.commit()
         logger.info(f"New user registered: {data['username']}")
         return jsonify({'message': 'New user created!'}), 201
+    except PasswordHasherBusy:
+        return jsonify({'message': 'Too many requests, please retry shortly'}), 503, {'Retry-After': '1'}
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Database error during registration: {str(e)}")
@@ -180,16 +677,24 @@ def login():
         user = User.query.filter_by(username=auth.username).first()
         if not user:
             return jsonify({'message': 'User not found'}), 401
-        if check_password_hash(user.password, auth.password):
+        matches, new_hash = password_hasher.verify(user.password, auth.password)
+        if matches:
+            now = datetime.utcnow()
             token = jwt.encode({
                 'user_id': user.id,
-                'exp': datetime.utcnow() + timedelta(hours=24)
+                'iat': now,
+                'exp': now + timedelta(hours=24)
             }, app.config['SECRET_KEY'], algorithm="HS256")
-            user.last_login = datetime.utcnow()
-            db.session.commit()
+            if new_hash:
+                # Hashed with older settings: upgrade it now that we have the password.
+                user.password = new_hash
+                db.session.commit()
+            last_login_writer.submit((user.id, now))
             logger.info(f"User logged in: {user.username}")
             return jsonify({'token': token, 'role': user.role})
         return jsonify({'message': 'Could not verify'}), 401
+    except PasswordHasherBusy:
+        return jsonify({'message': 'Too many requests, please retry shortly'}), 503, {'Retry-After': '1'}
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Database error during login: {str(e)}")
@@ -209,14 +714,7 @@ def chat(current_user):
         response = get_openai_response(user_message, current_user.role)
         
         # Log the interaction
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Chat: {user_message}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        audit(current_user.id, f"Chat: {user_message}")
         
         return jsonify({"response": response})
     except KeyError:
@@ -232,19 +730,95 @@ def chat(current_user):
         logger.error(f"Unexpected error during chat: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+CHAT_COMPLETION_PARAMS = {
+    'engine': "text-davinci-002",
+    'max_tokens': 150,
+    'n': 1,
+    'stop': None,
+    'temperature': 0.7
+}
+
+CHAT_FALLBACK_RESPONSE = "ComplianceAI is busy right now. Please try again in a moment."
+
+def chat_prompt(user_message, user_role):
+    return f"You are ComplianceAI, an AI assistant for banking compliance and auditing. The user is a {user_role}. Respond to the following message:\n\nUser: {user_message}\n\nComplianceAI:"
+
 def get_openai_response(user_message, user_role):
-    prompt = f"You are ComplianceAI, an AI assistant for banking compliance and auditing. The user is a {user_role}. Respond to the following message:\n\nUser: {user_message}\n\nComplianceAI:"
-    
-    response = openai.Completion.create(
-        engine="text-davinci-002",
-        prompt=prompt,
-        max_tokens=150,
-        n=1,
-        stop=None,
-        temperature=0.7,
-    )
+    cached = llm_cache.get(user_message, user_role, CHAT_COMPLETION_PARAMS)
+    if cached is not None:
+        return cached
     
-    return response.choices[0].text.strip()
+    try:
+        text = llm_gateway.complete(chat_prompt(user_message, user_role), **CHAT_COMPLETION_PARAMS)
+    except LLMUnavailable as e:
+        # Fallbacks are not cached, so the question is retried next time.
+        logger.warning(f"Chat answered with fallback: {str(e)}")
+        return CHAT_FALLBACK_RESPONSE
+    llm_cache.put(user_message, user_role, CHAT_COMPLETION_PARAMS, text)
+    return text
+
+@app.route('/api/chat/stream', methods=['POST'])
+@token_required
+def chat_stream(current_user):
+    """Stream the reply as server-sent events: one 'token' event per chunk, then 'done'.
+
+    The audit entry is written when the stream ends, so the worker is not
+    holding a database transaction while the model generates.
+    """
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message')
+    if not user_message:
+        return jsonify({'message': 'Invalid request data'}), 400
+    started = time.perf_counter()
+
+    def generate():
+        outcome, ttft, tokens, parts = 'interrupted', None, 0, []
+        cached = llm_cache.get(user_message, current_user.role, CHAT_COMPLETION_PARAMS)
+        try:
+            if cached is not None:
+                chunks = [cached]
+            else:
+                chunks = llm_gateway.stream(chat_prompt(user_message, current_user.role), **CHAT_COMPLETION_PARAMS)
+            for text in chunks:
+                if not text:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    # Strip leading whitespace the model emits before the answer.
+                    text = text.lstrip()
+                tokens += 1
+                parts.append(text)
+                yield sse_event({'token': text}, 'token')
+            response = ''.join(parts).strip()
+            if cached is None:
+                llm_cache.put(user_message, current_user.role, CHAT_COMPLETION_PARAMS, response)
+            outcome = 'completed'
+            yield sse_event({'response': response, 'cached': cached is not None}, 'done')
+        except LLMUnavailable as e:
+            outcome = 'errors'
+            logger.error(f"Chat stream failed: {str(e)}")
+            if not parts:
+                yield sse_event({'token': CHAT_FALLBACK_RESPONSE}, 'token')
+                yield sse_event({'response': CHAT_FALLBACK_RESPONSE, 'cached': False, 'fallback': True}, 'done')
+                return
+            yield sse_event({'message': 'An error occurred while processing your request'}, 'error')
+        except Exception as e:
+            outcome = 'errors'
+            logger.error(f"Unexpected error during chat stream: {str(e)}")
+            yield sse_event({'message': 'An unexpected error occurred'}, 'error')
+        finally:
+            duration = time.perf_counter() - started
+            chat_stream_metrics.record(outcome, ttft, duration, tokens, cached is not None)
+            suffix = '' if outcome == 'completed' else f" ({outcome})"
+            audit(current_user.id, f"Chat: {user_message}{suffix}")
+            logger.info(f"Chat stream for {current_user.username} {outcome}: "
+                        f"ttft={ttft if ttft is None else round(ttft, 3)}s, total={duration:.3f}s, {tokens} chunks")
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/transaction', methods=['POST'])
 @token_required
@@ -254,25 +828,28 @@ def make_transaction(current_user):
         if not all(k in data for k in ("amount", "type", "description")):
             return jsonify({'message': 'Missing required fields'}), 400
         
-        new_transaction = Transaction(
-            user_id=current_user.id,
-            amount=data['amount'],
-            transaction_type=data['type'],
-            description=data['description']
-        )
-        db.session.add(new_transaction)
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Transaction: {data['type']} {data['amount']}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        now = datetime.utcnow()
+        with unit_of_work(current_user.id) as uow:
+            score, = score_transactions(current_user.id, [(data['amount'], now)])
+            new_transaction = uow.add(Transaction(
+                user_id=current_user.id,
+                amount=data['amount'],
+                transaction_type=data['type'],
+                description=data['description'],
+                timestamp=now,
+                anomaly_score=score.score,
+                country=data.get('country'),
+                counterparty=data.get('counterparty')
+            ))
+            bump_transaction_rollup(current_user.id, data['type'], now.date(), 1, data['amount'])
+            uow.audit(f"Transaction: {data['type']} {data['amount']}")
         
         logger.info(f"New transaction recorded for user {current_user.username}")
-        return jsonify({'message': 'Transaction recorded successfully', 'transaction_id': new_transaction.id})
+        return jsonify({
+            'message': 'Transaction recorded successfully',
+            'transaction_id': new_transaction.id,
+            'anomaly_score': score.score
+        })
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Database error during transaction: {str(e)}")
@@ -281,27 +858,229 @@ def make_transaction(current_user):
         logger.error(f"Unexpected error during transaction: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def ingest_batch_query(user_id, idempotency_key):
+    return IngestBatch.query.filter_by(user_id=user_id, idempotency_key=idempotency_key)
+
+@app.route('/api/transactions/bulk', methods=['POST'])
+@token_required
+def ingest_transactions(current_user):
+    """Record many transactions at once from a JSON array or an NDJSON stream.
+
+    Valid rows are inserted in one statement (COPY on PostgreSQL) and the
+    rest are reported per row. The Idempotency-Key header is required; a
+    retry with the same key and payload returns the original result.
+    """
+    try:
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if not idempotency_key or len(idempotency_key) > 100:
+            return jsonify({'message': 'An Idempotency-Key header of at most 100 characters is required'}), 400
+        try:
+            records, parse_errors, request_hash = read_payload(
+                request.stream, request.mimetype, app.config['BULK_INGEST_MAX_ROWS']
+            )
+        except PayloadError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        existing = ingest_batch_query(current_user.id, idempotency_key).first()
+        if existing:
+            return replay_ingest_batch(existing, request_hash)
+        
+        now = datetime.utcnow()
+        rows, errors = validate_transactions(records, now, parse_errors)
+        mappings = [{
+            'user_id': current_user.id,
+            'amount': r.amount,
+            'transaction_type': r.transaction_type,
+            'description': r.description,
+            'timestamp': r.timestamp.to_pydatetime() if hasattr(r.timestamp, 'to_pydatetime') else r.timestamp,
+            'status': 'pending',
+            'country': r.country,
+            'counterparty': r.counterparty
+        } for r in rows.itertuples(index=False)]
+        
+        max_errors = app.config['BULK_INGEST_MAX_ERRORS']
+        result = {
+            'message': 'Transactions processed',
+            'accepted': len(mappings),
+            'rejected': len(errors),
+            'errors': errors[:max_errors],
+            'errors_truncated': len(errors) > max_errors
+        }
+        try:
+            with unit_of_work(current_user.id) as uow:
+                batch = uow.add(IngestBatch(
+                    user_id=current_user.id,
+                    idempotency_key=idempotency_key,
+                    request_hash=request_hash,
+                    accepted=len(mappings),
+                    rejected=len(errors),
+                    response=json.dumps(result)
+                ))
+                if mappings:
+                    scores = score_transactions(current_user.id, [(m['amount'], m['timestamp']) for m in mappings])
+                    for m, score in zip(mappings, scores):
+                        m['anomaly_score'] = score.score
+                    insert_transactions(mappings)
+                    days = rows['timestamp'].map(lambda ts: ts.date())
+                    totals = rows.groupby([rows['transaction_type'], days])['amount'].agg(['count', 'sum'])
+                    for (transaction_type, day), total in totals.iterrows():
+                        bump_transaction_rollup(current_user.id, transaction_type, day, int(total['count']), float(total['sum']))
+                uow.audit(f"Bulk transactions: {len(mappings)} accepted, {len(errors)} rejected")
+        except IntegrityError:
+            # A concurrent request with the same key won the race.
+            existing = ingest_batch_query(current_user.id, idempotency_key).first()
+            if not existing:
+                raise
+            return replay_ingest_batch(existing, request_hash)
+        
+        logger.info(f"Bulk ingestion for user {current_user.username}: {len(mappings)} accepted, {len(errors)} rejected")
+        return jsonify({'batch_id': batch.id, **result})
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error during bulk ingestion: {str(e)}")
+        return jsonify({'message': 'An error occurred while recording the transactions'}), 500
+    except Exception as e:
+        logger.error(f"Unexpected error during bulk ingestion: {str(e)}")
+        return jsonify({'message': 'An unexpected error occurred'}), 500
+
+def replay_ingest_batch(batch, request_hash):
+    if batch.request_hash != request_hash:
+        return jsonify({'message': 'Idempotency-Key was already used with a different payload'}), 422
+    response = jsonify({'batch_id': batch.id, **json.loads(batch.response)})
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def insert_transactions(mappings):
+    """Insert Transaction rows as part of the current DB transaction, without ORM objects."""
+    for user_id in {m['user_id'] for m in mappings}:
+        invalidate_count_on_commit(('transactions', user_id))
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        columns = list(mappings[0])
+        copy_rows(connection.connection.dbapi_connection, Transaction.__tablename__, columns,
+                  ([m[c] for c in columns] for m in mappings))
+    else:
+        db.session.execute(db.insert(Transaction), mappings)
+
+def bump_transaction_rollup(user_id, transaction_type, day, count, amount):
+    """Add count/amount to a rollup bucket as part of the current DB transaction."""
+    values = {
+        'user_id': user_id,
+        'transaction_type': transaction_type,
+        'day': day,
+        'count': count,
+        'total_amount': amount
+    }
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(TransactionRollup).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'transaction_type', 'day'],
+            set_={
+                'count': TransactionRollup.count + stmt.excluded.count,
+                'total_amount': TransactionRollup.total_amount + stmt.excluded.total_amount
+            }
+        )
+        db.session.execute(stmt)
+        return
+
+    updated = TransactionRollup.query.filter_by(
+        user_id=user_id, transaction_type=transaction_type, day=day
+    ).update({
+        'count': TransactionRollup.count + count,
+        'total_amount': TransactionRollup.total_amount + amount
+    }, synchronize_session=False)
+    if not updated:
+        db.session.add(TransactionRollup(**values))
+
+def rebuild_transaction_rollup():
+    """Regenerate the whole rollup table from Transaction with one INSERT ... SELECT."""
+    day = db.func.date(Transaction.timestamp)
+    aggregates = db.select(
+        Transaction.user_id,
+        Transaction.transaction_type,
+        day,
+        db.func.count(),
+        db.func.sum(Transaction.amount)
+    ).group_by(Transaction.user_id, Transaction.transaction_type, day)
+    db.session.execute(db.delete(TransactionRollup))
+    db.session.execute(
+        db.insert(TransactionRollup).from_select(
+            ['user_id', 'transaction_type', 'day', 'count', 'total_amount'],
+            aggregates
+        )
+    )
+    db.session.commit()
+    return db.session.query(db.func.count(TransactionRollup.id)).scalar()
+
+@app.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """Rebuild the transaction rollup table from the transaction table."""
+    buckets = rebuild_transaction_rollup()
+    logger.info(f"Transaction rollup rebuilt: {buckets} buckets")
+    print(f"Rebuilt transaction rollup: {buckets} buckets")
+
+@app.cli.command('rebuild-anomaly-state')
+def rebuild_anomaly_state_command():
+    """Recompute every user's anomaly statistics by replaying their transactions."""
+    rows = db.session.execute(
+        db.select(Transaction.user_id, Transaction.amount, Transaction.timestamp)
+        .order_by(Transaction.user_id, Transaction.timestamp, Transaction.id)
+        .execution_options(yield_per=app.config['EXPORT_YIELD_PER'])
+    )
+    db.session.execute(db.delete(AnomalyState))
+    users = 0
+    for user_id, group in itertools.groupby(rows, key=lambda row: row.user_id):
+        _, stats = transaction_scorer.record(None, [(amount, timestamp) for _, amount, timestamp in group])
+        db.session.add(AnomalyState(user_id=user_id, state=transaction_scorer.dumps(stats)))
+        users += 1
+    db.session.commit()
+    print(f"Rebuilt anomaly statistics for {users} users")
+
+def transactions_listing(user_id):
+    return Transaction.query.filter_by(user_id=user_id)
+
 @app.route('/api/transactions', methods=['GET'])
 @token_required
 def get_transactions(current_user):
+    """List transactions newest first.
+
+    Pass ``cursor`` (empty for the first page) to use keyset pagination and
+    follow ``next_cursor``; ``include_total=true`` adds a cached total. Without
+    ``cursor`` the legacy page/per_page response is returned.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        transactions = Transaction.query.filter_by(user_id=current_user.id).order_by(Transaction.timestamp.desc()).paginate(page=page, per_page=per_page)
+        page, per_page = page_args()
+        query = transactions_listing(current_user.id)
+        count_key = ('transactions', current_user.id)
+
+        if 'cursor' in request.args:
+            transactions, next_cursor = keyset_page(
+                query, Transaction.timestamp, Transaction.id, request.args['cursor'], per_page
+            )
+            result = {
+                'transactions': [serialize_transaction(t) for t in transactions],
+                'next_cursor': next_cursor
+            }
+            if wants_total():
+                result['total'] = count_cache.get(count_key, query.count)
+            return jsonify(result)
+
+        transactions = newest_first(query, Transaction.timestamp, Transaction.id).paginate(page=page, per_page=per_page, count=False)
+        total = count_cache.get(count_key, query.count)
         
         return jsonify({
-            'transactions': [{
-                'id': t.id,
-                'amount': t.amount,
-                'type': t.transaction_type,
-                'status': t.status,
-                'description': t.description,
-                'timestamp': t.timestamp.isoformat()
-            } for t in transactions.items],
-            'total': transactions.total,
-            'pages': transactions.pages,
+            'transactions': [serialize_transaction(t) for t in transactions.items],
+            'total': total,
+            'pages': math.ceil(total / per_page),
             'current_page': page
         })
+    except ValueError:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except SQLAlchemyError as e:
         logger.error(f"Database error while fetching transactions: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching transactions'}), 500
@@ -309,6 +1088,48 @@ def get_transactions(current_user):
         logger.error(f"Unexpected error while fetching transactions: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def serialize_transaction(t):
+    return {
+        'id': t.id,
+        'amount': t.amount,
+        'type': t.transaction_type,
+        'status': t.status,
+        'description': t.description,
+        'anomaly_score': t.anomaly_score,
+        'timestamp': t.timestamp.isoformat()
+    }
+
+def transaction_facts(t):
+    return TransactionFacts(t.id, t.user_id, t.amount, t.transaction_type, t.timestamp, t.country, t.counterparty)
+
+def compliance_history_query(user_ids, after, until):
+    """The users' transactions in (after, until], as the AML rules' history."""
+    return db.select(Transaction.user_id, Transaction.timestamp, Transaction.amount).where(
+        Transaction.user_id.in_(user_ids), Transaction.timestamp > after, Transaction.timestamp <= until
+    )
+
+def check_compliance(facts):
+    """Evaluate the AML rules for TransactionFacts, fetching history in one query."""
+    histories = {}
+    if facts and compliance_rules.needs_history:
+        timestamps = [f.timestamp for f in facts]
+        rows = db.session.execute(compliance_history_query(
+            {f.user_id for f in facts},
+            min(timestamps) - timedelta(seconds=compliance_rules.history_seconds),
+            max(timestamps)
+        ))
+        histories = histories_from_rows(rows)
+    results = []
+    for f in facts:
+        hits = compliance_rules.evaluate(f, histories.get(f.user_id))
+        results.append({
+            'transaction_id': f.id,
+            'is_compliant': not hits,
+            'reason': '; '.join(hit.description for hit in hits) or "Transaction follows AML guidelines",
+            'rules': [hit._asdict() for hit in hits]
+        })
+    return results
+
 @app.route('/api/compliance_check', methods=['POST'])
 @token_required
 def compliance_check(current_user):
@@ -321,29 +1142,16 @@ def compliance_check(current_user):
         if not transaction_id:
             return jsonify({'message': 'Missing transaction ID'}), 400
         
-        transaction = Transaction.query.get(transaction_id)
+        transaction = db.session.get(Transaction, transaction_id)
         if not transaction:
             return jsonify({'message': 'Transaction not found'}), 404
         
-        # Perform mock compliance check
-        is_compliant = random.choice([True, False])
-        reason = "Transaction follows AML guidelines" if is_compliant else "Suspicious activity detected"
+        result, = check_compliance([transaction_facts(transaction)])
         
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Compliance check: Transaction {transaction_id}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        audit(current_user.id, f"Compliance check: Transaction {transaction_id}")
         
         logger.info(f"Compliance check performed on transaction {transaction_id} by {current_user.username}")
-        return jsonify({
-            'transaction_id': transaction_id,
-            'is_compliant': is_compliant,
-            'reason': reason
-        })
+        return jsonify(result)
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Database error during compliance check: {str(e)}")
@@ -352,19 +1160,91 @@ def compliance_check(current_user):
         logger.error(f"Unexpected error during compliance check: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+@app.route('/api/compliance_check/batch', methods=['POST'])
+@token_required
+def compliance_check_batch(current_user):
+    if current_user.role != 'employee':
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    try:
+        data = request.get_json()
+        transaction_ids = data.get('transaction_ids')
+        if not isinstance(transaction_ids, list) or not transaction_ids:
+            return jsonify({'message': 'Missing transaction IDs'}), 400
+        if len(transaction_ids) > app.config['COMPLIANCE_BATCH_LIMIT']:
+            return jsonify({'message': f"At most {app.config['COMPLIANCE_BATCH_LIMIT']} transaction IDs per batch"}), 400
+        for index, transaction_id in enumerate(transaction_ids):
+            # bool is an int subclass, but true/false are not ids.
+            if not isinstance(transaction_id, int) or isinstance(transaction_id, bool):
+                return jsonify({'message': f"transaction_ids[{index}] must be an integer", 'index': index}), 400
+
+        # One bulk fetch of the columns the rules need, instead of loading
+        # full ORM objects one id at a time.
+        rows = db.session.execute(
+            db.select(
+                Transaction.id, Transaction.user_id, Transaction.amount, Transaction.transaction_type,
+                Transaction.timestamp, Transaction.country, Transaction.counterparty
+            ).where(Transaction.id.in_(set(transaction_ids)))
+        )
+        facts = [TransactionFacts(*row) for row in rows]
+        found = {f.id for f in facts}
+        results = check_compliance(facts)
+        
+        audit(current_user.id, f"Compliance check: {len(facts)} transactions")
+        
+        logger.info(f"Batch compliance check of {len(facts)} transactions by {current_user.username}")
+        return jsonify({
+            'results': results,
+            'flagged': sum(1 for r in results if not r['is_compliant']),
+            'not_found': [i for i in transaction_ids if i not in found]
+        })
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Database error during batch compliance check: {str(e)}")
+        return jsonify({'message': 'An error occurred while performing the compliance check'}), 500
+    except Exception as e:
+        logger.error(f"Unexpected error during batch compliance check: {str(e)}")
+        return jsonify({'message': 'An unexpected error occurred'}), 500
+
+def compliance_reports_listing(user_id):
+    return ComplianceReport.query.filter_by(user_id=user_id)
+
 @app.route('/api/compliance_reports', methods=['GET'])
 @token_required
 def get_compliance_reports(current_user):
+    """List the user's reports newest first, metadata only.
+
+    Bodies are fetched one at a time from ``content_url``. Paginates like
+    /api/transactions: ``cursor`` for keyset pages, else page/per_page.
+    """
     try:
-        reports = ComplianceReport.query.filter_by(user_id=current_user.id).order_by(ComplianceReport.timestamp.desc()).all()
+        page, per_page = page_args()
+        query = compliance_reports_listing(current_user.id)
+        count_key = ('compliance_reports', current_user.id)
+
+        if 'cursor' in request.args:
+            reports, next_cursor = keyset_page(
+                query, ComplianceReport.timestamp, ComplianceReport.id, request.args['cursor'], per_page
+            )
+            result = {
+                'reports': [serialize_compliance_report(r) for r in reports],
+                'next_cursor': next_cursor
+            }
+            if wants_total():
+                result['total'] = count_cache.get(count_key, query.count)
+            return jsonify(result)
+
+        reports = newest_first(query, ComplianceReport.timestamp, ComplianceReport.id).paginate(page=page, per_page=per_page, count=False)
+        total = count_cache.get(count_key, query.count)
         
-        return jsonify([{
-            'id': r.id,
-            'report_type': r.report_type,
-            'content': r.content,
-            'timestamp': r.timestamp.isoformat(),
-            'status': r.status
-        } for r in reports])
+        return jsonify({
+            'reports': [serialize_compliance_report(r) for r in reports.items],
+            'total': total,
+            'pages': math.ceil(total / per_page),
+            'current_page': page
+        })
+    except ValueError:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except SQLAlchemyError as e:
         logger.error(f"Database error while fetching compliance reports: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching compliance reports'}), 500
@@ -380,23 +1260,13 @@ def create_compliance_report(current_user):
         if not all(k in data for k in ("report_type", "content")):
             return jsonify({'message': 'Missing required fields'}), 400
         
-        new_report = ComplianceReport(
-            user_id=current_user.id,
-            report_type=data['report_type'],
-            content=data['content'],
-            status='draft'
-        )
-        db.session.add(new_report)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Created compliance report: {data['report_type']}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        with unit_of_work(current_user.id) as uow:
+            new_report = uow.add(set_report_content(ComplianceReport(
+                user_id=current_user.id,
+                report_type=data['report_type'],
+                status='draft'
+            ), data['content']))
+            uow.audit(f"Created compliance report: {data['report_type']}")
         
         logger.info(f"New compliance report created by user {current_user.username}")
         return jsonify({'message': 'Compliance report created successfully', 'report_id': new_report.id}), 201
@@ -417,18 +1287,11 @@ def update_compliance_report(current_user, report_id):
         if not report or report.user_id != current_user.id:
             return jsonify({'message': 'Report not found'}), 404
         
-        report.content = data.get('content', report.content)
-        report.status = data.get('status', report.status)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Updated compliance report: {report_id}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        with unit_of_work(current_user.id) as uow:
+            if 'content' in data:
+                set_report_content(report, data['content'])
+            report.status = data.get('status', report.status)
+            uow.audit(f"Updated compliance report: {report_id}")
         
         logger.info(f"Compliance report {report_id} updated by user {current_user.username}")
         return jsonify({'message': 'Compliance report updated successfully'})
@@ -440,11 +1303,74 @@ def update_compliance_report(current_user, report_id):
         logger.error(f"Unexpected error while updating compliance report: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def serialize_compliance_report(r):
+    return {
+        'id': r.id,
+        'report_type': r.report_type,
+        'content_size': r.content_size,
+        'content_url': f"/api/compliance_reports/{r.id}/content",
+        'timestamp': r.timestamp.isoformat(),
+        'status': r.status
+    }
+
+@app.route('/api/compliance_reports/<int:report_id>/content', methods=['GET'])
+@token_required
+def get_compliance_report_content(current_user, report_id):
+    """Stream one report body as text/plain, honouring a single-range ``Range`` header.
+
+    Clients that accept gzip and ask for the whole body get the stored
+    compressed bytes as they are. The ETag is the content digest.
+    """
+    try:
+        report = db.session.get(ComplianceReport, report_id)
+        if not report or report.user_id != current_user.id:
+            return jsonify({'message': 'Report not found'}), 404
+        etag = f'"{report.content_digest}"'
+        gzip_etag = f'"{report.content_digest}-gzip"'  # a different representation, so a different tag
+        # Weak comparison (RFC 9110): lists of tags, W/ prefixes and "*" all match.
+        for tag in (etag, gzip_etag):
+            if request.if_none_match.contains_weak(tag.strip('"')):
+                return Response(status=304, headers={'ETag': tag})
+        try:
+            byte_range = parse_range(request.headers.get('Range'), report.content_size)
+        except ValueError:
+            return Response(status=416, headers={'Content-Range': f"bytes */{report.content_size}"})
+
+        data = report_store.get(report.content_digest).data
+        headers = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Vary': 'Accept-Encoding'}
+        if byte_range is None and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            headers.update({'ETag': gzip_etag, 'Content-Encoding': 'gzip', 'Content-Length': str(len(data))})
+            return Response(data, mimetype='text/plain', headers=headers)
+        start, end = byte_range or (0, report.content_size - 1)
+        headers['Content-Length'] = str(end - start + 1)
+        status = 200
+        if byte_range is not None:
+            headers['Content-Range'] = f"bytes {start}-{end}/{report.content_size}"
+            status = 206
+        return Response(iter_decompressed(data, start, end), status=status,
+                        content_type='text/plain; charset=utf-8', headers=headers)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while fetching compliance report content: {str(e)}")
+        return jsonify({'message': 'An error occurred while fetching the compliance report'}), 500
+    except Exception as e:
+        logger.error(f"Unexpected error while fetching compliance report content: {str(e)}")
+        return jsonify({'message': 'An unexpected error occurred'}), 500
+
+@app.cli.command('prune-report-blobs')
+def prune_report_blobs_command():
+    """Delete stored report bodies no report refers to any more."""
+    deleted = report_store.prune(db.select(ComplianceReport.content_digest))
+    db.session.commit()
+    print(f"Deleted {deleted} unreferenced report bodies")
+
+def risk_assessments_listing(user_id):
+    return RiskAssessment.query.filter_by(user_id=user_id).order_by(RiskAssessment.timestamp.desc())
+
 @app.route('/api/risk_assessments', methods=['GET'])
 @token_required
 def get_risk_assessments(current_user):
     try:
-        assessments = RiskAssessment.query.filter_by(user_id=current_user.id).order_by(RiskAssessment.timestamp.desc()).all()
+        assessments = risk_assessments_listing(current_user.id).all()
         
         return jsonify([{
             'id': r.id,
@@ -468,23 +1394,14 @@ def create_risk_assessment(current_user):
         if not all(k in data for k in ("assessment_type", "risk_level")):
             return jsonify({'message': 'Missing required fields'}), 400
         
-        new_assessment = RiskAssessment(
-            user_id=current_user.id,
-            assessment_type=data['assessment_type'],
-            risk_level=data['risk_level'],
-            details=data.get('details', '')
-        )
-        db.session.add(new_assessment)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Created risk assessment: {data['assessment_type']}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        with unit_of_work(current_user.id) as uow:
+            new_assessment = uow.add(RiskAssessment(
+                user_id=current_user.id,
+                assessment_type=data['assessment_type'],
+                risk_level=data['risk_level'],
+                details=data.get('details', '')
+            ))
+            uow.audit(f"Created risk assessment: {data['assessment_type']}")
         
         logger.info(f"New risk assessment created by user {current_user.username}")
         return jsonify({'message': 'Risk assessment created successfully', 'assessment_id': new_assessment.id}), 201
@@ -505,18 +1422,10 @@ def update_risk_assessment(current_user, assessment_id):
         if not assessment or assessment.user_id != current_user.id:
             return jsonify({'message': 'Assessment not found'}), 404
         
-        assessment.risk_level = data.get('risk_level', assessment.risk_level)
-        assessment.details = data.get('details', assessment.details)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Updated risk assessment: {assessment_id}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        with unit_of_work(current_user.id) as uow:
+            assessment.risk_level = data.get('risk_level', assessment.risk_level)
+            assessment.details = data.get('details', assessment.details)
+            uow.audit(f"Updated risk assessment: {assessment_id}")
         
         logger.info(f"Risk assessment {assessment_id} updated by user {current_user.username}")
         return jsonify({'message': 'Risk assessment updated successfully'})
@@ -528,17 +1437,21 @@ def update_risk_assessment(current_user, assessment_id):
         logger.error(f"Unexpected error while updating risk assessment: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def regulatory_updates_listing():
+    return RegulatoryUpdate.query.order_by(RegulatoryUpdate.effective_date.desc())
+
 @app.route('/api/regulatory_updates', methods=['GET'])
 @token_required
+@response_cache.cached('regulatory_updates')
 def get_regulatory_updates(current_user):
     try:
-        updates = RegulatoryUpdate.query.order_by(RegulatoryUpdate.effective_date.desc()).all()
+        updates = regulatory_updates_listing().all()
         
         return jsonify([{
             'id': u.id,
             'area': u.area,
             'update_text': u.update_text,
-            'effective_date': u.effective_date.isoformat(),
+            'effective_date': u.effective_date.isoformat() if u.effective_date else None,
             'created_at': u.created_at.isoformat()
         } for u in updates])
     except SQLAlchemyError as e:
@@ -548,11 +1461,22 @@ def get_regulatory_updates(current_user):
         logger.error(f"Unexpected error while fetching regulatory updates: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+@app.cli.command('sync-regulatory-updates')
+def sync_regulatory_updates_command():
+    """Pull the regulatory feed once and upsert new or changed updates."""
+    result = regulatory_sync.sync()
+    print(f"HTTP {result.status}: {result.fetched} items, {result.inserted} new, "
+          f"{result.updated} changed, {result.unchanged} unchanged")
+
+def training_modules_listing():
+    return TrainingModule.query.order_by(TrainingModule.created_at.desc())
+
 @app.route('/api/training_modules', methods=['GET'])
 @token_required
+@response_cache.cached('training_modules')
 def get_training_modules(current_user):
     try:
-        modules = TrainingModule.query.order_by(TrainingModule.created_at.desc()).all()
+        modules = training_modules_listing().all()
         
         return jsonify([{
             'id': m.id,
@@ -584,21 +1508,12 @@ def assign_training_module(current_user):
         if not user or not module:
             return jsonify({'message': 'User or module not found'}), 404
         
-        user_training = UserTraining(
-            user_id=user.id,
-            module_id=module.id
-        )
-        db.session.add(user_training)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Assigned training module {module.id} to user {user.id}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        with unit_of_work(current_user.id) as uow:
+            uow.add(UserTraining(
+                user_id=user.id,
+                module_id=module.id
+            ))
+            uow.audit(f"Assigned training module {module.id} to user {user.id}")
         
         logger.info(f"Training module {module.id} assigned to user {user.id} by {current_user.username}")
         return jsonify({'message': 'Training module assigned successfully'}), 201
@@ -626,14 +1541,7 @@ def update_user_training_status(current_user, user_training_id):
         user_training.completion_date = datetime.utcnow() if user_training.status == 'completed' else None
         db.session.commit()
         
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Updated user training status: {user_training_id}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        audit(current_user.id, f"Updated user training status: {user_training_id}")
         
         logger.info(f"User training {user_training_id} status updated by user {current_user.username}")
         return jsonify({'message': 'User training status updated successfully'})
@@ -653,60 +1561,70 @@ def generate_report(current_user):
         if not all(k in data for k in ("report_type", "parameters")):
             return jsonify({'message': 'Missing required fields'}), 400
         
-        # Generate report based on type and parameters (mock implementation)
-        report_content = generate_mock_report(data['report_type'], data['parameters'])
+        job_id = job_queue.enqueue('report', {
+            'user_id': current_user.id,
+            'report_type': data['report_type'],
+            'parameters': data['parameters'],
+            'origin': request_origin()
+        }, owner_id=current_user.id)
+        audit(current_user.id, f"Queued report: {data['report_type']}")
         
-        new_report = ComplianceReport(
-            user_id=current_user.id,
-            report_type=data['report_type'],
-            content=report_content,
-            status='completed'
-        )
-        db.session.add(new_report)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Generated report: {data['report_type']}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
-        
-        logger.info(f"Report {data['report_type']} generated by user {current_user.username}")
-        return jsonify({'message': 'Report generated successfully', 'report_id': new_report.id}), 201
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        logger.error(f"Database error while generating report: {str(e)}")
-        return jsonify({'message': 'An error occurred while generating the report'}), 500
+        logger.info(f"Report {data['report_type']} queued as job {job_id} by user {current_user.username}")
+        return job_accepted(job_id, 'Report generation queued')
     except Exception as e:
-        logger.error(f"Unexpected error while generating report: {str(e)}")
+        logger.error(f"Unexpected error while queueing report: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
 def generate_mock_report(report_type, parameters):
     # Mock implementation of report generation
     return f"Mock report of type {report_type} with parameters {parameters}"
 
+@job_queue.handler('report')
+def run_report_job(job):
+    payload = job.payload
+    with app.app_context():
+        job.progress(0.1, 'Generating report')
+        # Generate report based on type and parameters (mock implementation)
+        report_content = generate_mock_report(payload['report_type'], payload['parameters'])
+        job.progress(0.9, 'Saving report')
+        with unit_of_work(payload['user_id'], payload['origin']) as uow:
+            new_report = uow.add(set_report_content(ComplianceReport(
+                user_id=payload['user_id'],
+                report_type=payload['report_type'],
+                status='completed'
+            ), report_content))
+            uow.audit(f"Generated report: {payload['report_type']}")
+        logger.info(f"Report {payload['report_type']} generated for user {payload['user_id']} by job {job.id}")
+        return {'report_id': new_report.id}
+
 @app.route('/api/transactions_summary', methods=['GET'])
 @token_required
 def get_transactions_summary(current_user):
     try:
-        transactions = Transaction.query.filter_by(user_id=current_user.id).all()
+        start_date = parse_date_arg('start_date')
+        end_date = parse_date_arg('end_date')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+
+    try:
+        rows = summarize_transactions(
+            current_user.id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_types=request.args.getlist('type')
+        )
         summary = {
-            'total_transactions': len(transactions),
-            'total_amount': sum(t.amount for t in transactions),
+            'total_transactions': 0,
+            'total_amount': 0,
             'transactions_by_type': {}
         }
-        
-        for transaction in transactions:
-            if transaction.transaction_type not in summary['transactions_by_type']:
-                summary['transactions_by_type'][transaction.transaction_type] = {
-                    'count': 0,
-                    'total_amount': 0
-                }
-            summary['transactions_by_type'][transaction.transaction_type]['count'] += 1
-            summary['transactions_by_type'][transaction.transaction_type]['total_amount'] += transaction.amount
+        for transaction_type, count, total_amount in rows:
+            summary['total_transactions'] += count
+            summary['total_amount'] += total_amount
+            summary['transactions_by_type'][transaction_type] = {
+                'count': count,
+                'total_amount': total_amount
+            }
         
         return jsonify(summary)
     except SQLAlchemyError as e:
@@ -716,6 +1634,32 @@ def get_transactions_summary(current_user):
         logger.error(f"Unexpected error while fetching transactions summary: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def summarize_transactions(user_id, start_date=None, end_date=None, transaction_types=None):
+    """Return (transaction_type, count, total_amount) rows for a user.
+
+    Reads the daily rollup, so the cost is proportional to the number of
+    (type, day) buckets rather than the number of transactions. Dates are
+    inclusive calendar days.
+    """
+    return transactions_summary_query(user_id, start_date, end_date, transaction_types).all()
+
+def transactions_summary_query(user_id, start_date=None, end_date=None, transaction_types=None):
+    query = db.session.query(
+        TransactionRollup.transaction_type,
+        db.func.sum(TransactionRollup.count),
+        db.func.coalesce(db.func.sum(TransactionRollup.total_amount), 0.0)
+    ).filter(TransactionRollup.user_id == user_id)
+    if transaction_types:
+        query = query.filter(TransactionRollup.transaction_type.in_(transaction_types))
+    if start_date:
+        query = query.filter(TransactionRollup.day >= start_date)
+    if end_date:
+        query = query.filter(TransactionRollup.day <= end_date)
+    return query.group_by(TransactionRollup.transaction_type)
+
+def audit_logs_listing():
+    return AuditLog.query
+
 @app.route('/api/audit_logs', methods=['GET'])
 @token_required
 def get_audit_logs(current_user):
@@ -723,23 +1667,32 @@ def get_audit_logs(current_user):
         return jsonify({'message': 'Unauthorized'}), 403
     
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).paginate(page=page, per_page=per_page)
+        page, per_page = page_args()
+        count_key = ('audit_logs',)
+
+        if 'cursor' in request.args:
+            logs, next_cursor = keyset_page(
+                audit_logs_listing(), AuditLog.timestamp, AuditLog.id, request.args['cursor'], per_page
+            )
+            result = {
+                'logs': [serialize_audit_log(log) for log in logs],
+                'next_cursor': next_cursor
+            }
+            if wants_total():
+                result['total'] = count_cache.get(count_key, audit_logs_listing().count)
+            return jsonify(result)
+
+        logs = newest_first(audit_logs_listing(), AuditLog.timestamp, AuditLog.id).paginate(page=page, per_page=per_page, count=False)
+        total = count_cache.get(count_key, audit_logs_listing().count)
         
         return jsonify({
-            'logs': [{
-                'id': log.id,
-                'user_id': log.user_id,
-                'action': log.action,
-                'ip_address': log.ip_address,
-                'user_agent': log.user_agent,
-                'timestamp': log.timestamp.isoformat()
-            } for log in logs.items],
-            'total': logs.total,
-            'pages': logs.pages,
+            'logs': [serialize_audit_log(log) for log in logs.items],
+            'total': total,
+            'pages': math.ceil(total / per_page),
             'current_page': page
         })
+    except ValueError:
+        return jsonify({'message': 'Invalid cursor'}), 400
     except SQLAlchemyError as e:
         logger.error(f"Database error while fetching audit logs: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching audit logs'}), 500
@@ -747,6 +1700,99 @@ def get_audit_logs(current_user):
         logger.error(f"Unexpected error while fetching audit logs: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
+def serialize_audit_log(log):
+    return {
+        'id': log.id,
+        'user_id': log.user_id,
+        'action': log.action,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'timestamp': log.timestamp.isoformat()
+    }
+
+AUDIT_LOG_EXPORT_FIELDS = ['id', 'user_id', 'action', 'ip_address', 'user_agent', 'timestamp']
+
+def audit_logs_export_query(start_date=None, end_date=None):
+    """Audit log rows on the inclusive calendar days [start_date, end_date], oldest first."""
+    stmt = db.select(*[getattr(AuditLog, field) for field in AUDIT_LOG_EXPORT_FIELDS])
+    if start_date:
+        stmt = stmt.where(AuditLog.timestamp >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        stmt = stmt.where(AuditLog.timestamp < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    return stmt.order_by(AuditLog.timestamp, AuditLog.id)
+
+@app.route('/api/audit_logs/export', methods=['GET'])
+@token_required
+def export_audit_logs(current_user):
+    """Stream the audit trail oldest first as NDJSON (default) or CSV.
+
+    Optional ``start_date``/``end_date`` (inclusive, YYYY-MM-DD) and
+    ``gzip=true``. Rows are fetched in server-side batches and written as they
+    arrive, so memory use does not depend on the size of the table.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized'}), 403
+
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'Unsupported format, expected ndjson or csv'}), 400
+    try:
+        start_date = parse_date_arg('start_date')
+        end_date = parse_date_arg('end_date')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+
+    stmt = audit_logs_export_query(start_date, end_date).execution_options(yield_per=app.config['EXPORT_YIELD_PER'])
+
+    def rows():
+        try:
+            for row in db.session.execute(stmt):
+                record = row._asdict()
+                record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+                yield record
+        except SQLAlchemyError as e:
+            # Headers are already sent; log and cut the stream short.
+            logger.error(f"Database error while exporting audit logs: {str(e)}")
+            raise
+
+    if export_format == 'csv':
+        chunks = csv_chunks(rows(), AUDIT_LOG_EXPORT_FIELDS)
+        mimetype, filename = 'text/csv', 'audit_logs.csv'
+    else:
+        chunks = ndjson_chunks(rows())
+        mimetype, filename = 'application/x-ndjson', 'audit_logs.ndjson'
+    if compress:
+        chunks = gzip_chunks(chunks)
+        mimetype, filename = 'application/gzip', filename + '.gz'
+
+    logger.info(f"Audit log export ({export_format}) started by user {current_user.username}")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/metrics', methods=['GET'])
+@token_required
+def get_metrics(current_user):
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized'}), 403
+    return jsonify({
+        'audit': audit_recorder.stats(),
+        'passwords': password_hasher.stats(),
+        'last_login': last_login_writer.stats(),
+        'user_cache': principal_cache.stats(),
+        'response_cache': response_cache.stats(),
+        'anomaly_scoring': transaction_scorer.stats(),
+        'regulatory_sync': regulatory_sync.stats(),
+        'regulatory_notifications': regulatory_notifier.stats() if regulatory_notifier else None,
+        'llm_cache': llm_cache.stats(),
+        'llm_gateway': llm_gateway.stats(),
+        'jobs': job_queue.stats(),
+        'chat_stream': chat_stream_metrics.stats()
+    })
+
 @app.route('/api/compliance_audit', methods=['POST'])
 @token_required
 def compliance_audit(current_user):
@@ -759,41 +1805,164 @@ def compliance_audit(current_user):
             return jsonify({'message': 'Missing audit type'}), 400
         
         audit_type = data['audit_type']
-        # Perform a mock compliance audit
-        audit_result = perform_mock_audit(audit_type)
-        
-        new_audit = ComplianceAudit(
-            user_id=current_user.id,
-            audit_type=audit_type,
-            result=audit_result,
-            status='completed'
-        )
-        db.session.add(new_audit)
-        db.session.commit()
-        
-        log = AuditLog(
-            user_id=current_user.id,
-            action=f"Performed compliance audit: {audit_type}",
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
-        db.session.add(log)
-        db.session.commit()
+        job_id = job_queue.enqueue('compliance_audit', {
+            'user_id': current_user.id,
+            'audit_type': audit_type,
+            'origin': request_origin()
+        }, owner_id=current_user.id)
+        audit(current_user.id, f"Queued compliance audit: {audit_type}")
         
-        logger.info(f"Compliance audit {audit_type} performed by user {current_user.username}")
-        return jsonify({'message': 'Compliance audit completed successfully', 'audit_id': new_audit.id}), 201
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        logger.error(f"Database error while performing compliance audit: {str(e)}")
-        return jsonify({'message': 'An error occurred while performing the compliance audit'}), 500
+        logger.info(f"Compliance audit {audit_type} queued as job {job_id} by user {current_user.username}")
+        return job_accepted(job_id, 'Compliance audit queued')
     except Exception as e:
-        logger.error(f"Unexpected error while performing compliance audit: {str(e)}")
+        logger.error(f"Unexpected error while queueing compliance audit: {str(e)}")
         return jsonify({'message': 'An unexpected error occurred'}), 500
 
 def perform_mock_audit(audit_type):
     # Mock implementation of compliance audit
     return f"Mock audit result for {audit_type}"
 
+@job_queue.handler('compliance_audit')
+def run_compliance_audit_job(job):
+    payload = job.payload
+    with app.app_context():
+        job.progress(0.1, 'Running audit')
+        # Perform a mock compliance audit
+        audit_result = perform_mock_audit(payload['audit_type'])
+        job.progress(0.9, 'Saving audit result')
+        with unit_of_work(payload['user_id'], payload['origin']) as uow:
+            new_audit = uow.add(ComplianceAudit(
+                user_id=payload['user_id'],
+                audit_type=payload['audit_type'],
+                result=audit_result,
+                status='completed'
+            ))
+            uow.audit(f"Performed compliance audit: {payload['audit_type']}")
+        logger.info(f"Compliance audit {payload['audit_type']} performed for user {payload['user_id']} by job {job.id}")
+        return {'audit_id': new_audit.id}
+
+@app.before_request
+def start_job_workers():
+    # Started by the first request a process serves (after a pre-forking
+    # server has forked), so CLI commands and scripts importing the app
+    # never run jobs.
+    if app.config['JOB_WORKERS']:
+        job_queue.start()
+
+def visible_job(job_id, current_user):
+    """The job if it exists and belongs to the user (admins see all jobs), else None."""
+    job = job_queue.get(job_id)
+    if job is None or (job['owner_id'] != current_user.id and current_user.role != 'admin'):
+        return None
+    return job
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job(current_user, job_id):
+    try:
+        job = visible_job(job_id, current_user)
+        if job is None:
+            return jsonify({'message': 'Job not found'}), 404
+        return jsonify(serialize_job(job))
+    except Exception as e:
+        logger.error(f"Unexpected error while fetching job {job_id}: {str(e)}")
+        return jsonify({'message': 'An unexpected error occurred'}), 500
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@token_required
+def cancel_job(current_user, job_id):
+    try:
+        job = visible_job(job_id, current_user)
+        if job is None:
+            return jsonify({'message': 'Job not found'}), 404
+        if job['state'] in FINISHED:
+            return jsonify({'message': f"Job already {job['state']}", 'job': serialize_job(job)}), 409
+        job = job_queue.cancel(job_id)
+        audit(current_user.id, f"Cancelled job {job_id} ({job['kind']})")
+        logger.info(f"Job {job_id} cancellation requested by user {current_user.username}")
+        return jsonify({'message': 'Cancellation requested', 'job': serialize_job(job)})
+    except Exception as e:
+        logger.error(f"Unexpected error while cancelling job {job_id}: {str(e)}")
+        return jsonify({'message': 'An unexpected error occurred'}), 500
+
+@app.cli.command('run-jobs')
+@click.option('--workers', default=2, show_default=True, help='Worker threads.')
+def run_jobs_command(workers):
+    """Run job workers in the foreground (for deployments with JOB_WORKERS = 0 in the web processes)."""
+    if job_queue.running:
+        raise click.ClickException('Job workers are already running in this process')
+    job_queue.start(workers)
+    print(f"Running {workers} job workers on {job_queue.path}; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        job_queue.stop()
+
+def endpoint_queries(user_id=1):
+    """Each endpoint's hot query as it runs it, built with the endpoint's own query helper.
+
+    Used by check-query-plans and tests/test_query_plans.py.
+    """
+    now = datetime.utcnow()
+    cursor = encode_cursor(now, 100)
+
+    def page(query, timestamp_column, id_column):
+        # What .paginate(page=2, per_page=10, count=False) runs.
+        return newest_first(query, timestamp_column, id_column).limit(10).offset(10).statement
+
+    def count(query):
+        # What Query.count() runs.
+        return db.select(db.func.count()).select_from(query.subquery())
+
+    transactions = transactions_listing(user_id)
+    reports = compliance_reports_listing(user_id)
+    return {
+        'transactions (page)': page(transactions, Transaction.timestamp, Transaction.id),
+        'transactions (cursor)': keyset_query(transactions, Transaction.timestamp, Transaction.id, cursor, 10).statement,
+        'transactions count': count(transactions),
+        'transactions_summary': transactions_summary_query(user_id, start_date=date.today()).statement,
+        'transactions bulk (idempotency)': ingest_batch_query(user_id, 'key').statement,
+        # Single rows are loaded with db.session.get().
+        'compliance_check': db.select(Transaction).where(Transaction.id == 1),
+        'compliance_check (history)': compliance_history_query({user_id}, now - timedelta(days=1), now),
+        'audit_logs (page)': page(audit_logs_listing(), AuditLog.timestamp, AuditLog.id),
+        'audit_logs (cursor)': keyset_query(audit_logs_listing(), AuditLog.timestamp, AuditLog.id, cursor, 10).statement,
+        'audit_logs count': count(audit_logs_listing()),
+        'audit_logs export': audit_logs_export_query(date.today(), date.today()),
+        'compliance_reports': page(reports, ComplianceReport.timestamp, ComplianceReport.id),
+        'compliance_reports (cursor)': keyset_query(
+            reports, ComplianceReport.timestamp, ComplianceReport.id, cursor, 10
+        ).statement,
+        'compliance_report content': db.select(ReportBlob).where(ReportBlob.digest == 'digest'),
+        'risk_assessments': risk_assessments_listing(user_id).statement,
+        'regulatory_updates': regulatory_updates_listing().statement,
+        'training_modules': training_modules_listing().statement,
+    }
+
+# Endpoint queries that read a whole table or index on purpose: the
+# reference lists are returned in full, the audit log total counts every
+# row, and its legacy OFFSET page walks the index from the newest entry.
+FULL_SCAN_QUERIES = {'audit_logs (page)', 'audit_logs count', 'regulatory_updates', 'training_modules'}
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """EXPLAIN every endpoint query and fail if any outside FULL_SCAN_QUERIES scans a whole table."""
+    failures = 0
+    with db.engine.connect() as connection:
+        for name, statement in endpoint_queries().items():
+            with connection.begin():
+                plan = explain(connection, statement)
+            scans = full_scans(connection.dialect.name, plan)
+            if scans and name in FULL_SCAN_QUERIES:
+                status = 'scan ok'
+            else:
+                status = 'FULL SCAN' if scans else 'ok'
+                failures += bool(scans)
+            print(f"{status:<9} {name}: {' | '.join(plan)}")
+    if failures:
+        raise SystemExit(f"{failures} endpoint queries perform full table scans")
+
 if __name__ == '__main__':
     app.run(debug=True)
 
@@ -0,0 +1,9 @@
+"""Small helpers for the latency figures services report in their stats()."""
+
+
+def percentile(values, q, digits=4):
+    """The ``q`` quantile (0..1) of ``values`` by nearest rank, or None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], digits)
@@ -0,0 +1,75 @@
+"""report content blobs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:35:16.382229
+
+"""
+import gzip
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_blob',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('compliance_report', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_digest', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('content_size', sa.Integer(), nullable=True))
+
+    # Move existing bodies into compressed blobs, one per distinct text.
+    connection = op.get_bind()
+    report = sa.table('compliance_report', sa.column('id', sa.Integer), sa.column('content', sa.Text),
+                      sa.column('content_digest', sa.String), sa.column('content_size', sa.Integer))
+    blob = sa.table('report_blob', sa.column('digest', sa.String), sa.column('size', sa.Integer),
+                    sa.column('data', sa.LargeBinary))
+    stored = set()
+    for report_id, content in connection.execute(sa.select(report.c.id, report.c.content)).fetchall():
+        raw = content.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in stored:
+            connection.execute(blob.insert().values(digest=digest, size=len(raw), data=gzip.compress(raw, mtime=0)))
+            stored.add(digest)
+        connection.execute(report.update().where(report.c.id == report_id)
+                           .values(content_digest=digest, content_size=len(raw)))
+
+    with op.batch_alter_table('compliance_report', schema=None) as batch_op:
+        batch_op.alter_column('content_digest', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('content_size', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_compliance_report_content_digest'), ['content_digest'], unique=False)
+        batch_op.create_foreign_key('fk_compliance_report_content_digest', 'report_blob', ['content_digest'], ['digest'])
+        batch_op.drop_column('content')
+
+
+def downgrade():
+    with op.batch_alter_table('compliance_report', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content', sa.TEXT(), nullable=True))
+
+    connection = op.get_bind()
+    report = sa.table('compliance_report', sa.column('content', sa.Text), sa.column('content_digest', sa.String))
+    blob = sa.table('report_blob', sa.column('digest', sa.String), sa.column('data', sa.LargeBinary))
+    for digest, data in connection.execute(sa.select(blob.c.digest, blob.c.data)).fetchall():
+        connection.execute(report.update().where(report.c.content_digest == digest)
+                           .values(content=gzip.decompress(data).decode('utf-8')))
+
+    with op.batch_alter_table('compliance_report', schema=None) as batch_op:
+        batch_op.alter_column('content', existing_type=sa.TEXT(), nullable=False)
+        batch_op.drop_constraint('fk_compliance_report_content_digest', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_compliance_report_content_digest'))
+        batch_op.drop_column('content_size')
+        batch_op.drop_column('content_digest')
+
+    op.drop_table('report_blob')
@@ -0,0 +1,129 @@
+"""Batched, rate-limited webhook notifications with retry.
+
+Lines of text are packed into as few messages as the webhook's limits
+allow, sent several at a time over one pooled session, and paced by a
+token bucket shared by every send. Timeouts, connection errors, 429 and
+5xx are retried with exponential backoff (honouring Retry-After).
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def batch_messages(lines, batch_size=10, max_chars=20000):
+    """Group lines into message texts of at most batch_size lines and max_chars characters."""
+    messages = []
+    batch = []
+    length = 0
+    for line in lines:
+        line = line[:max_chars]
+        if batch and (len(batch) >= batch_size or length + len(line) + 2 > max_chars):
+            messages.append('\n\n'.join(batch))
+            batch, length = [], 0
+        batch.append(line)
+        length += len(line) + 2
+    if batch:
+        messages.append('\n\n'.join(batch))
+    return messages
+
+
+def post_with_retry(session, url, payload, limiter=None, max_retries=5, backoff=0.5, timeout=(3.05, 10)):
+    """POST ``payload``, retrying timeouts, connection errors, 429 and 5xx with exponential backoff.
+
+    Every attempt first takes a token from ``limiter``. A Retry-After header
+    on a 429/503 is honoured when it asks for a longer wait than the backoff.
+    """
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        retry_after = None
+        try:
+            response = session.post(url, json=payload, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+            retry_after = response.headers.get('Retry-After')
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = str(e)
+        if attempt == max_retries:
+            raise RuntimeError(f"Giving up on webhook after {attempt + 1} attempts: {error}")
+        delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        logger.warning(f"Webhook attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+
+class WebhookNotifier:
+    """Sends lines of text to a chat webhook (Microsoft Teams style ``{"text": ...}`` payloads)."""
+
+    def __init__(self, url, batch_size=10, max_chars=20000, max_concurrency=4, rate=4.0, burst=4,
+                 max_retries=5, backoff=0.5, timeout=(3.05, 10), session=None):
+        """``rate`` is messages per second allowed by the webhook quota; None leaves it unlimited."""
+        self.url = url
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or make_session(max_concurrency)
+        self.limiter = TokenBucket(rate, burst) if rate else None
+        self._lock = threading.Lock()
+        self._stats = {'messages': 0, 'sent': 0, 'failed': 0}
+
+    def send(self, lines):
+        """Send ``lines`` as batched messages, several at a time.
+
+        Returns {"messages": n, "sent": n, "failed": n}; a message that still
+        fails after all retries is logged and counted, not raised, so one bad
+        batch does not stop the rest.
+        """
+        messages = batch_messages(lines, self.batch_size, self.max_chars)
+        if not messages:
+            return {'messages': 0, 'sent': 0, 'failed': 0}
+
+        def deliver(text):
+            try:
+                post_with_retry(self.session, self.url, {'text': text}, self.limiter,
+                                self.max_retries, self.backoff, self.timeout)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send notification: {str(e)}")
+                return False
+
+        if len(messages) == 1:
+            results = [deliver(messages[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(messages), self.max_concurrency)) as pool:
+                results = list(pool.map(deliver, messages))
+        sent = sum(results)
+        result = {'messages': len(messages), 'sent': sent, 'failed': len(messages) - sent}
+        with self._lock:
+            for name, value in result.items():
+                self._stats[name] += value
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
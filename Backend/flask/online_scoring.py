@@ -0,0 +1,209 @@
+"""Online per-user anomaly scoring with O(1) work per transaction.
+
+Each user keeps a fixed-size state: Welford mean/variance and an EWMA of
+log1p(amount), plus a ring of time buckets holding transaction counts and
+amounts for the sliding velocity window. Scoring never looks at history,
+so its cost does not grow with the number of past transactions.
+
+The scorer itself keeps no state. Callers load a user's UserStats (see
+``dumps``/``loads``), score and fold transactions into it and store it back,
+which lets every worker process share one copy, e.g. a database row
+updated in the same transaction as the rows being scored.
+
+Transactions may arrive out of time order. Only in-order ones move the
+EWMA and the window forward; a late one still counts in the velocity
+window if it falls inside it, and one older than the window only
+contributes to the mean/variance.
+"""
+import json
+import math
+import threading
+from array import array
+from collections import namedtuple
+
+STATE_VERSION = 1
+
+TransactionScore = namedtuple('TransactionScore', ['score', 'zscore', 'ewma_zscore', 'window_count', 'window_amount'])
+
+
+def _seconds(timestamp):
+    return timestamp.timestamp() if hasattr(timestamp, 'timestamp') else float(timestamp)
+
+
+class UserStats:
+    __slots__ = ('n', 'mean', 'm2', 'ewma', 'ewm_var', 'head', 'counts', 'amounts', 'window_count', 'window_amount')
+
+    def __init__(self, buckets):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+        self.head = None  # absolute index of the newest bucket
+        self.counts = array('I', [0]) * buckets
+        self.amounts = array('d', [0.0]) * buckets
+        self.window_count = 0
+        self.window_amount = 0.0
+
+    def advance(self, bucket):
+        """Move the ring forward to ``bucket``, expiring buckets that left the window."""
+        size = len(self.counts)
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        for expired in range(self.head + 1, min(bucket, self.head + size) + 1):
+            slot = expired % size
+            self.window_count -= self.counts[slot]
+            self.window_amount -= self.amounts[slot]
+            self.counts[slot] = 0
+            self.amounts[slot] = 0.0
+        self.head = bucket
+
+    def to_list(self):
+        return [self.n, self.mean, self.m2, self.ewma, self.ewm_var, self.head,
+                list(self.counts), list(self.amounts)]
+
+    @classmethod
+    def from_list(cls, values):
+        n, mean, m2, ewma, ewm_var, head, counts, amounts = values
+        stats = cls(len(counts))
+        stats.n, stats.mean, stats.m2, stats.ewma, stats.ewm_var, stats.head = n, mean, m2, ewma, ewm_var, head
+        stats.counts = array('I', counts)
+        stats.amounts = array('d', amounts)
+        stats.window_count = sum(counts)
+        stats.window_amount = sum(amounts)
+        return stats
+
+
+class OnlineScorer:
+    def __init__(self, window_seconds=86400, buckets=24, alpha=0.1, min_history=5, z_threshold=3.0,
+                 velocity_count=10, velocity_amount=50000.0):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_seconds = window_seconds / buckets
+        self.alpha = alpha
+        self.min_history = min_history
+        self.z_threshold = z_threshold
+        self.velocity_count = velocity_count
+        self.velocity_amount = velocity_amount
+        self._lock = threading.Lock()
+        self._stats = {'scored': 0, 'reset_states': 0}
+
+    def score(self, stats, amount, timestamp):
+        """Score a transaction against ``stats`` (None for a user with no history) without recording it."""
+        return self._score(stats, float(amount), self._bucket(timestamp))
+
+    def record(self, stats, transactions):
+        """Score ``(amount, timestamp)`` pairs and fold them into ``stats``.
+
+        Transactions are taken in time order and each is scored with the
+        ones before it already folded in, so a burst inside one batch shows
+        up in the velocity window. Returns (scores in input order, the
+        updated stats, which is a new object if ``stats`` was None).
+        """
+        order = sorted(range(len(transactions)), key=lambda i: _seconds(transactions[i][1]))
+        scores = [None] * len(transactions)
+        for i in order:
+            amount, bucket = float(transactions[i][0]), self._bucket(transactions[i][1])
+            scores[i] = self._score(stats, amount, bucket)
+            if stats is None:
+                stats = self._new_stats(amount)
+            self._fold(stats, amount, bucket)
+        with self._lock:
+            self._stats['scored'] += len(transactions)
+        return scores, stats
+
+    def dumps(self, stats):
+        return json.dumps({
+            'version': STATE_VERSION,
+            'window_seconds': self.window_seconds,
+            'buckets': self.buckets,
+            'stats': stats.to_list()
+        }, separators=(',', ':'))
+
+    def loads(self, text):
+        """UserStats from ``dumps`` output; None (start afresh) if missing or made with other settings."""
+        if not text:
+            return None
+        state = json.loads(text)
+        if (state.get('version') != STATE_VERSION or state.get('buckets') != self.buckets
+                or state.get('window_seconds') != self.window_seconds):
+            with self._lock:
+                self._stats['reset_states'] += 1
+            return None
+        return UserStats.from_list(state['stats'])
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, window_seconds=self.window_seconds, buckets=self.buckets)
+
+    def _score(self, stats, amount, bucket):
+        x = math.log1p(abs(amount))
+        if stats is None:
+            return TransactionScore(0.0, 0.0, 0.0, 1, amount)
+        window_count, window_amount = self._window_totals(stats, bucket)
+        zscore = ewma_zscore = 0.0
+        if stats.n >= self.min_history:
+            std = math.sqrt(stats.m2 / (stats.n - 1)) if stats.n > 1 else 0.0
+            if std > 1e-9:
+                zscore = (x - stats.mean) / std
+            ewm_std = math.sqrt(stats.ewm_var)
+            if ewm_std > 1e-9:
+                ewma_zscore = (x - stats.ewma) / ewm_std
+        window_count += 1
+        window_amount += amount
+        score = max(
+            abs(zscore) / self.z_threshold,
+            abs(ewma_zscore) / self.z_threshold,
+            window_count / self.velocity_count,
+            window_amount / self.velocity_amount
+        )
+        return TransactionScore(round(score, 4), zscore, ewma_zscore, window_count, window_amount)
+
+    def _new_stats(self, amount):
+        stats = UserStats(self.buckets)
+        stats.ewma = math.log1p(abs(amount))
+        return stats
+
+    def _fold(self, stats, amount, bucket):
+        x = math.log1p(abs(amount))
+        # Welford's online mean/variance; order does not matter.
+        stats.n += 1
+        delta = x - stats.mean
+        stats.mean += delta / stats.n
+        stats.m2 += delta * (x - stats.mean)
+        if stats.head is not None and stats.head - bucket >= self.buckets:
+            return  # older than the window: too stale for the EWMA or velocity
+        if stats.head is None or bucket >= stats.head:
+            # Exponentially weighted mean/variance, only moved forward in time.
+            diff = x - stats.ewma
+            increment = self.alpha * diff
+            stats.ewma += increment
+            stats.ewm_var = (1 - self.alpha) * (stats.ewm_var + diff * increment)
+            stats.advance(bucket)
+        slot = bucket % self.buckets
+        stats.counts[slot] += 1
+        stats.amounts[slot] += amount
+        stats.window_count += 1
+        stats.window_amount += amount
+
+    def _bucket(self, timestamp):
+        return int(_seconds(timestamp) // self.bucket_seconds)
+
+    def _window_totals(self, stats, bucket):
+        """Window count/amount as of ``bucket`` without mutating the ring."""
+        if stats.head is not None and stats.head - bucket >= self.buckets:
+            return 0, 0.0  # older than the window: nothing to compare with
+        if stats.head is None or bucket <= stats.head:
+            return stats.window_count, stats.window_amount
+        gap = bucket - stats.head
+        if gap >= self.buckets:
+            return 0, 0.0
+        count, amount = stats.window_count, stats.window_amount
+        for expired in range(stats.head + 1, bucket + 1):
+            slot = expired % self.buckets
+            count -= stats.counts[slot]
+            amount -= stats.amounts[slot]
+        return count, amount
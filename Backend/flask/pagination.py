@@ -0,0 +1,92 @@
+"""Keyset (cursor) pagination helpers and a TTL cache for list totals."""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) position as an opaque URL-safe token."""
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor; raises ValueError if it is malformed."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def after_cursor(timestamp_column, id_column, timestamp, row_id):
+    """Predicate for rows that sort after (timestamp, row_id) in newest-first order."""
+    # The leading "<=" gives the planner an index range to seek into; a
+    # bare OR of the two cases makes SQLite scan the index instead.
+    return and_(
+        timestamp_column <= timestamp,
+        or_(timestamp_column < timestamp, id_column < row_id)
+    )
+
+
+def newest_first(query, timestamp_column, id_column):
+    """``query`` in the (timestamp, id) descending order both kinds of page use."""
+    return query.order_by(timestamp_column.desc(), id_column.desc())
+
+
+def keyset_query(query, timestamp_column, id_column, cursor, limit):
+    """The query keyset_page() runs: the ``limit + 1`` rows following cursor."""
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(after_cursor(timestamp_column, id_column, timestamp, row_id))
+    return newest_first(query, timestamp_column, id_column).limit(limit + 1)
+
+
+def keyset_page(query, timestamp_column, id_column, cursor, limit):
+    """Return (items, next_cursor) for the newest-first page following cursor.
+
+    Seeks on (timestamp, id) instead of using OFFSET, so every page costs the
+    same as the first one given an index on those columns.
+    """
+    items = keyset_query(query, timestamp_column, id_column, cursor, limit).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    return items, next_cursor
+
+
+class CountCache:
+    """Thread-safe TTL cache for COUNT(*) results keyed by list identity."""
+
+    def __init__(self, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
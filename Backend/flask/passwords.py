@@ -0,0 +1,214 @@
+"""Password hashing and verification on a small dedicated thread pool.
+
+Hashing is deliberately slow, so it runs on ``workers`` threads of its own
+rather than on whichever request thread happens to need it: at most that
+many hashes compete for the CPU at once, and once ``max_pending`` are
+waiting further callers get PasswordHasherBusy straight away instead of
+piling up. hashlib's scrypt and PBKDF2 release the GIL while they work.
+
+Stored hashes identify their own scheme and cost, so hashes made with older
+settings still verify; ``verify`` hands back a fresh hash for them so the
+caller can store it (rehash on login).
+"""
+import hmac
+import importlib
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ('scrypt', 'pbkdf2', 'bcrypt', 'argon2')
+
+DEFAULT_PARAMS = {
+    'scrypt': {'n': 2 ** 15, 'r': 8, 'p': 1},
+    'pbkdf2': {'hash_name': 'sha256', 'iterations': 600000},
+    'bcrypt': {'rounds': 12},
+    'argon2': {'time_cost': 3, 'memory_cost': 65536, 'parallelism': 4},
+}
+
+
+_missing_libraries = set()
+
+
+def _library(name, package):
+    """Import ``name`` for verifying a stored hash, or None (logged once) if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        if name not in _missing_libraries:
+            _missing_libraries.add(name)
+            logger.error(f"Cannot verify {name} password hashes: the {package} package is not installed")
+        return None
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already waiting for the pool; try again shortly."""
+
+
+class _WerkzeugScheme:
+    """scrypt and PBKDF2 as werkzeug formats them: ``method$salt$hash``."""
+
+    def __init__(self, method):
+        self.method = method
+
+    def hash(self, password):
+        return generate_password_hash(password, method=self.method)
+
+    def needs_rehash(self, stored):
+        return stored.split('$', 1)[0] != self.method
+
+
+class _BcryptScheme:
+    def __init__(self, rounds):
+        try:
+            import bcrypt
+        except ImportError as e:
+            raise RuntimeError('The bcrypt package is required for bcrypt password hashing') from e
+        self.bcrypt = bcrypt
+        self.rounds = rounds
+
+    def hash(self, password):
+        return self.bcrypt.hashpw(password.encode('utf-8'), self.bcrypt.gensalt(self.rounds)).decode('ascii')
+
+    def needs_rehash(self, stored):
+        return not stored.startswith(f"$2b${self.rounds:02d}$")
+
+
+class _Argon2Scheme:
+    def __init__(self, **params):
+        try:
+            import argon2
+        except ImportError as e:
+            raise RuntimeError('The argon2-cffi package is required for argon2 password hashing') from e
+        self.hasher = argon2.PasswordHasher(**params)
+
+    def hash(self, password):
+        return self.hasher.hash(password)
+
+    def needs_rehash(self, stored):
+        return not stored.startswith('$argon2') or self.hasher.check_needs_rehash(stored)
+
+
+def _make_scheme(scheme, params):
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown password hash scheme '{scheme}'")
+    params = {**DEFAULT_PARAMS[scheme], **(params or {})}
+    if scheme == 'scrypt':
+        return _WerkzeugScheme(f"scrypt:{params['n']}:{params['r']}:{params['p']}")
+    if scheme == 'pbkdf2':
+        return _WerkzeugScheme(f"pbkdf2:{params['hash_name']}:{params['iterations']}")
+    if scheme == 'bcrypt':
+        return _BcryptScheme(params['rounds'])
+    return _Argon2Scheme(**params)
+
+
+def check_hash(stored, password):
+    """Whether ``password`` matches ``stored``, whatever scheme made it.
+
+    A bcrypt or argon2 hash cannot match while its library is missing.
+    """
+    if stored.startswith('$2'):
+        bcrypt = _library('bcrypt', 'bcrypt')
+        if bcrypt is None:
+            return False
+        return bcrypt.checkpw(password.encode('utf-8'), stored.encode('ascii'))
+    if stored.startswith('$argon2'):
+        argon2 = _library('argon2', 'argon2-cffi')
+        if argon2 is None:
+            return False
+        try:
+            return argon2.PasswordHasher().verify(stored, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            return False
+    method, _, rest = stored.partition('$')
+    if method in ('sha256', 'sha1', 'md5') and '$' in rest:
+        # Salted HMAC, as werkzeug < 2.3 stored for method='sha256'; werkzeug no longer checks these.
+        salt, _, expected = rest.partition('$')
+        actual = hmac.new(salt.encode('utf-8'), password.encode('utf-8'), method).hexdigest()
+        return hmac.compare_digest(actual, expected)
+    return check_password_hash(stored, password)
+
+
+class PasswordHasher:
+    def __init__(self, scheme='scrypt', params=None, workers=2, max_pending=64, timeout=10.0, window=1000):
+        """``params`` overrides the scheme's cost settings in DEFAULT_PARAMS."""
+        self.scheme = scheme
+        self._scheme = _make_scheme(scheme, params)
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=window)
+        self._stats = {'hashed': 0, 'verified': 0, 'rejected': 0, 'rehashed': 0, 'busy': 0}
+
+    def hash(self, password):
+        return self._submit(self._hash, password)
+
+    def verify(self, stored, password):
+        """(matches, new hash or None); a new hash is returned when ``stored`` used other settings."""
+        return self._submit(self._verify, stored, password)
+
+    def needs_rehash(self, stored):
+        return self._scheme.needs_rehash(stored)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            durations = [duration * 1000 for duration in self._durations]
+        stats['scheme'] = self.scheme
+        stats['workers'] = self.workers
+        stats['hash_ms_p50'] = percentile(durations, 0.5, digits=3)
+        return stats
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def _submit(self, func, *args):
+        if not self._pending.acquire(blocking=False):
+            self._count('busy')
+            raise PasswordHasherBusy('Too many password checks in progress')
+        try:
+            future = self._pool.submit(func, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count('busy')
+            raise PasswordHasherBusy('Timed out waiting for a password check') from None
+
+    def _hash(self, password):
+        started = time.perf_counter()
+        hashed = self._scheme.hash(password)
+        self._timed(started)
+        self._count('hashed')
+        return hashed
+
+    def _verify(self, stored, password):
+        started = time.perf_counter()
+        matches = check_hash(stored, password)
+        self._timed(started)
+        self._count('verified' if matches else 'rejected')
+        if not matches or not self._scheme.needs_rehash(stored):
+            return matches, None
+        self._count('rehashed')
+        return True, self._hash(password)
+
+    def _timed(self, started):
+        with self._lock:
+            self._durations.append(time.perf_counter() - started)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
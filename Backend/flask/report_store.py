@@ -0,0 +1,105 @@
+"""Compressed, content-addressed storage for compliance report bodies.
+
+Bodies live gzip-compressed in their own table, keyed by the SHA-256 of the
+text, so report rows stay small and identical bodies are stored once. A
+body is streamed back by decompressing incrementally, and byte ranges of
+the uncompressed text can be served without inflating all of it into one
+buffer.
+"""
+import gzip
+import hashlib
+import re
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single-range ``Range`` header, or None to send the whole body.
+
+    Raises ValueError if the range cannot be satisfied. Multiple ranges
+    are not supported and, as HTTP allows, answered with the whole body.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def iter_decompressed(data, start=0, end=None, chunk_size=CHUNK_SIZE):
+    """Yield bytes ``start``..``end`` (inclusive) of the gzip ``data`` decompressed, chunk by chunk."""
+    decompressor = zlib.decompressobj(31)
+    stop = None if end is None else end + 1
+    position = 0  # offset of the next decompressed byte
+    pending = data
+    while True:
+        out = decompressor.decompress(pending, chunk_size)
+        pending = decompressor.unconsumed_tail
+        if not out:
+            if decompressor.eof or not pending:
+                return
+            continue
+        chunk_start, position = position, position + len(out)
+        if position <= start:
+            continue
+        lo = max(0, start - chunk_start)
+        hi = len(out) if stop is None else min(len(out), stop - chunk_start)
+        if lo < hi:
+            yield out[lo:hi]
+        if stop is not None and position >= stop:
+            return
+
+
+class ReportContentStore:
+    def __init__(self, db, blob_model, level=6):
+        self.db = db
+        self.model = blob_model
+        self.level = level
+
+    def save(self, text):
+        """Store ``text`` (once per distinct body) in the current session; returns (digest, size)."""
+        raw = text.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        values = {'digest': digest, 'size': len(raw), 'data': gzip.compress(raw, self.level, mtime=0)}
+        session = self.db.session
+        dialect = session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            session.execute(insert(self.model).values(**values).on_conflict_do_nothing(index_elements=['digest']))
+        elif session.get(self.model, digest) is None:
+            session.add(self.model(**values))
+        return digest, len(raw)
+
+    def get(self, digest):
+        return self.db.session.get(self.model, digest)
+
+    def load(self, digest):
+        blob = self.get(digest)
+        return gzip.decompress(blob.data).decode('utf-8') if blob is not None else None
+
+    def prune(self, referenced):
+        """Delete blobs whose digest is not in the ``referenced`` subquery; returns how many."""
+        result = self.db.session.execute(
+            self.db.delete(self.model).where(self.model.digest.not_in(referenced))
+        )
+        return result.rowcount
@@ -0,0 +1,153 @@
+"""Response cache for read-mostly GET endpoints, with ETag revalidation.
+
+Entries are keyed by namespace, namespace generation, path and query string.
+Invalidating a namespace bumps its generation, so stale entries are simply
+never read again and age out of the backend on their own.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Redis (or any protocol-compatible store), shared by all workers."""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='response-cache:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('The redis package is required for the redis response cache backend') from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def generation(self, namespace):
+        value = self.client.get(f"{self.prefix}gen:{namespace}")
+        return int(value) if value else 0
+
+    def bump_generation(self, namespace):
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+
+
+def _pack(etag, mimetype, body):
+    return f"{etag}\n{mimetype}\n".encode() + body
+
+
+def _unpack(value):
+    etag, mimetype, body = value.split(b'\n', 2)
+    return etag.decode(), mimetype.decode(), body
+
+
+class ResponseCache:
+    def __init__(self, backend, default_ttl=300, enabled=True):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    def cached(self, namespace, ttl=None):
+        """Cache successful responses of a GET view under ``namespace``.
+
+        The view must not depend on the requesting user beyond having passed
+        authentication. Clients sending a matching If-None-Match get a 304.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                key = self._key(namespace)
+                value = self.backend.get(key)
+                if value is not None:
+                    self._count('hits')
+                    etag, mimetype, body = _unpack(value)
+                    return self._respond(etag, mimetype, body)
+
+                self._count('misses')
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                self.backend.set(key, _pack(etag, response.mimetype, body), ttl or self.default_ttl)
+                return self._respond(etag, response.mimetype, body)
+            return decorated
+        return decorator
+
+    def invalidate(self, namespace):
+        self.backend.bump_generation(namespace)
+        self._count('invalidations')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+    def _key(self, namespace):
+        args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        return f"{namespace}:{self.backend.generation(namespace)}:{request.path}?{args}"
+
+    def _respond(self, etag, mimetype, body):
+        if etag in request.if_none_match:
+            self._count('not_modified')
+            response = make_response('', 304)
+        else:
+            response = make_response(body)
+            response.mimetype = mimetype
+        response.set_etag(etag)
+        # Let clients keep a copy but always revalidate it with If-None-Match.
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
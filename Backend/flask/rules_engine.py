@@ -0,0 +1,172 @@
+"""Deterministic AML rules engine.
+
+Rules are declared in a JSON file and compiled into lookup structures so a
+transaction is checked against hundreds of rules without looping over them:
+
+threshold    {"min_amount": 10000, "transaction_types": ["deposit"]}  (types optional)
+country      {"countries": ["KP", "IR"]}
+counterparty {"counterparties": ["Acme Shell Corp"]}
+velocity     {"window_seconds": 86400, "max_count": 10, "max_amount": 50000}
+structuring  {"threshold": 10000, "band": 0.1, "window_seconds": 604800, "min_count": 3}
+
+Every rule also has an "id" and optional "severity" and "description".
+"""
+import json
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import timedelta
+from itertools import accumulate
+
+RULE_TYPES = ('threshold', 'country', 'counterparty', 'velocity', 'structuring')
+
+Rule = namedtuple('Rule', ['id', 'type', 'severity', 'description', 'params'])
+RuleHit = namedtuple('RuleHit', ['rule_id', 'severity', 'description'])
+TransactionFacts = namedtuple('TransactionFacts', [
+    'id', 'user_id', 'amount', 'transaction_type', 'timestamp', 'country', 'counterparty'
+])
+
+
+def normalize_name(name):
+    return ' '.join(name.casefold().split()) if name else ''
+
+
+class UserHistory:
+    """A user's transactions (timestamp, amount) sorted by time, with prefix sums."""
+
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.times = [timestamp for timestamp, _ in rows]
+        self.amounts = [amount for _, amount in rows]
+        self.cumulative = [0.0, *accumulate(self.amounts)]
+        self._near_threshold = {}
+
+    def window(self, end, seconds):
+        """Index range [lo, hi) of transactions in (end - seconds, end]."""
+        return bisect_right(self.times, end - timedelta(seconds=seconds)), bisect_right(self.times, end)
+
+    def amount_between(self, lo, hi):
+        return self.cumulative[hi] - self.cumulative[lo]
+
+    def near_threshold_between(self, rule, lo, hi):
+        prefix = self._near_threshold.get(rule.id)
+        if prefix is None:
+            low, high = _structuring_band(rule)
+            prefix = self._near_threshold[rule.id] = [0, *accumulate(low <= a < high for a in self.amounts)]
+        return prefix[hi] - prefix[lo]
+
+
+def _structuring_band(rule):
+    threshold = rule.params['threshold']
+    return threshold * (1 - rule.params.get('band', 0.1)), threshold
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = rules
+        # transaction type (or None for "any type") -> (sorted min_amounts, rules in the same order)
+        self._thresholds = {}
+        self._countries = {}
+        self._counterparties = {}
+        self._velocity = []
+        self._structuring = []
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, config):
+        rules = []
+        seen = set()
+        for spec in config.get('rules', []):
+            spec = dict(spec)
+            rule_id = spec.pop('id')
+            rule_type = spec.pop('type')
+            if rule_type not in RULE_TYPES:
+                raise ValueError(f"Rule {rule_id}: unknown type {rule_type!r}")
+            if rule_id in seen:
+                raise ValueError(f"Duplicate rule id {rule_id!r}")
+            seen.add(rule_id)
+            rules.append(Rule(
+                id=rule_id,
+                type=rule_type,
+                severity=spec.pop('severity', 'medium'),
+                description=spec.pop('description', rule_id),
+                params=spec
+            ))
+        return cls(rules)
+
+    @property
+    def history_seconds(self):
+        """How far back evaluate() needs a user's history."""
+        windows = [rule.params['window_seconds'] for rule in self._velocity + self._structuring]
+        return max(windows, default=0)
+
+    @property
+    def needs_history(self):
+        return bool(self._velocity or self._structuring)
+
+    def evaluate(self, txn, history=None):
+        """Return the RuleHits for one TransactionFacts.
+
+        ``history`` is the user's UserHistory, including ``txn`` itself, and
+        is only consulted by velocity and structuring rules.
+        """
+        hits = []
+        amount = txn.amount
+        for key in (None, txn.transaction_type):
+            compiled = self._thresholds.get(key)
+            if compiled:
+                amounts, rules = compiled
+                hits.extend(self._hit(rule) for rule in rules[:bisect_right(amounts, amount)])
+        if txn.country:
+            hits.extend(self._hit(rule) for rule in self._countries.get(txn.country.upper(), ()))
+        if txn.counterparty:
+            hits.extend(self._hit(rule) for rule in self._counterparties.get(normalize_name(txn.counterparty), ()))
+        if history is not None:
+            for rule in self._velocity:
+                lo, hi = history.window(txn.timestamp, rule.params['window_seconds'])
+                if hi - lo > rule.params.get('max_count', float('inf')) or \
+                        history.amount_between(lo, hi) > rule.params.get('max_amount', float('inf')):
+                    hits.append(self._hit(rule))
+            for rule in self._structuring:
+                low, high = _structuring_band(rule)
+                if low <= amount < high:
+                    lo, hi = history.window(txn.timestamp, rule.params['window_seconds'])
+                    if history.near_threshold_between(rule, lo, hi) >= rule.params.get('min_count', 3):
+                        hits.append(self._hit(rule))
+        return hits
+
+    def _compile(self):
+        thresholds = {}
+        for rule in self.rules:
+            if rule.type == 'threshold':
+                for transaction_type in rule.params.get('transaction_types') or [None]:
+                    thresholds.setdefault(transaction_type, []).append(rule)
+            elif rule.type == 'country':
+                for country in rule.params['countries']:
+                    self._countries.setdefault(country.upper(), []).append(rule)
+            elif rule.type == 'counterparty':
+                for name in rule.params['counterparties']:
+                    self._counterparties.setdefault(normalize_name(name), []).append(rule)
+            elif rule.type == 'velocity':
+                self._velocity.append(rule)
+            elif rule.type == 'structuring':
+                self._structuring.append(rule)
+        for transaction_type, rules in thresholds.items():
+            rules.sort(key=lambda rule: rule.params['min_amount'])
+            self._thresholds[transaction_type] = ([rule.params['min_amount'] for rule in rules], rules)
+
+    @staticmethod
+    def _hit(rule):
+        return RuleHit(rule.id, rule.severity, rule.description)
+
+
+def histories_from_rows(rows):
+    """Group (user_id, timestamp, amount) rows into a UserHistory per user."""
+    grouped = {}
+    for user_id, timestamp, amount in rows:
+        grouped.setdefault(user_id, []).append((timestamp, amount))
+    return {user_id: UserHistory(items) for user_id, items in grouped.items()}
@@ -0,0 +1,49 @@
+"""Generators for streaming large result sets as NDJSON or CSV, optionally gzipped."""
+import csv
+import io
+import json
+import zlib
+
+# Rows are buffered into chunks of roughly this many bytes before being
+# handed to the WSGI server, so a response is not thousands of tiny writes.
+CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Yield newline-delimited JSON for an iterable of dicts."""
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, separators=(',', ':'), default=str) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def csv_chunks(rows, fieldnames, chunk_size=CHUNK_SIZE):
+    """Yield CSV (with a header line) for an iterable of dicts."""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if out.tell() >= chunk_size:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks incrementally into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,83 @@
+"""Per-process TTL/LRU cache of authenticated user principals.
+
+Invalidation only reaches the process it runs in: other workers keep
+serving their cached principal until its TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# The subset of User that request handlers read. It is immutable and not
+# bound to a session, so it is safe to share between requests and threads.
+UserPrincipal = namedtuple('UserPrincipal', ['id', 'username', 'email', 'role'])
+
+
+class PrincipalCache:
+    """Cache principals keyed by (user_id, token issued-at)."""
+
+    def __init__(self, ttl=60, max_entries=10000, enabled=True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get_or_load(self, user_id, issued_at, load):
+        """Return the cached principal or call ``load(user_id)`` and cache a non-None result."""
+        if not self.enabled:
+            return load(user_id)
+        key = (user_id, issued_at)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+            generation = self._generations.get(user_id, 0)
+        principal = load(user_id)
+        if principal is not None:
+            with self._lock:
+                if self._generations.get(user_id, 0) != generation:
+                    # Invalidated while loading; what was read may predate the change.
+                    return principal
+                self._entries[key] = (principal, now + self.ttl)
+                self._entries.move_to_end(key)
+                self._keys_by_user.setdefault(user_id, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._forget(evicted)
+                    self._stats['evictions'] += 1
+        return principal
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+    def _forget(self, key):
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
@@ -1,30 +1,224 @@
+import os
+import sys
+
+import numpy as np
+import openai
 import pandas as pd
-from openai import GPT
+
+from storage import STAGING_ROOT, LocalFileSystemStore, TransactionStore
 
 # Mock placeholders
 AZURE_OPENAI_API_KEY = "mock_openai_api_key"
 AZURE_OPENAI_ENDPOINT = "https://api.openai.com/v1/engines/davinci-codex/completions"
 
-def load_data_from_storage():
-    # Mock implementation for loading data from Azure Blob Storage
-    df = pd.DataFrame({
-        "transaction_id": [1, 2, 3],
-        "amount": [100.0, 200.0, 300.0]
+EXPLANATION_PARAMS = {"engine": "text-davinci-002", "max_tokens": 100, "temperature": 0.2}
+EXPLANATION_FALLBACK = "(model explanation unavailable)"
+
+# Cash transaction reporting threshold that structuring tries to stay under.
+REPORTING_THRESHOLD = 10000.0
+
+# Bit flags set in the "flags" column of detect_anomalies() output.
+FLAG_ZSCORE = 1
+FLAG_MAD = 2
+FLAG_IQR = 4
+FLAG_VELOCITY_COUNT = 8
+FLAG_VELOCITY_AMOUNT = 16
+FLAG_STRUCTURING = 32
+
+FLAG_REASONS = {
+    FLAG_ZSCORE: "amount far from the user's recent transactions",
+    FLAG_MAD: "amount far from the user's typical amount",
+    FLAG_IQR: "amount outside the user's interquartile fences",
+    FLAG_VELOCITY_COUNT: "unusually many transactions in the velocity window",
+    FLAG_VELOCITY_AMOUNT: "unusually large total amount in the velocity window",
+    FLAG_STRUCTURING: "repeated amounts just below the reporting threshold",
+}
+
+
+# The only columns detect_anomalies() reads.
+DETECTION_COLUMNS = ["transaction_id", "user_id", "amount", "timestamp"]
+
+
+def load_data_from_storage(start_date=None, end_date=None, store=None):
+    """Read the detector's columns for the given days from the staging store."""
+    store = store or TransactionStore(LocalFileSystemStore(STAGING_ROOT))
+    return store.read(columns=DETECTION_COLUMNS, start_date=start_date, end_date=end_date)
+
+
+def _windowed_sum(cumulative, left, right):
+    """Sum of the values in [left, right) for each row, given a 0-prefixed cumsum."""
+    return cumulative[right] - cumulative[left]
+
+
+def detect_anomalies(df, window=20, min_history=5, z_threshold=3.0, mad_threshold=3.5, iqr_k=3.0,
+                     velocity_window="24h", velocity_count=10, velocity_amount=50000.0,
+                     reporting_threshold=REPORTING_THRESHOLD, structuring_band=0.1,
+                     structuring_window="7D", structuring_count=3):
+    """Score every transaction in one vectorized pass.
+
+    Expects ``amount`` and optionally ``user_id`` and ``timestamp`` columns
+    (missing ones mean a single user and row order). Returns a frame aligned
+    with ``df`` holding the per-detector statistics, a ``flags`` bitmask (see
+    FLAG_*) and ``anomaly_score``: the largest detector value relative to its
+    threshold, so rows scoring >= 1 tripped at least one detector.
+
+    Rolling statistics use log1p(amount), which is closer to normal for
+    money amounts and keeps cumulative sums numerically stable. Everything
+    is computed with one sort, cumulative sums and searchsorted, so the cost
+    is O(n log n) regardless of how rows are spread across users.
+    """
+    n = len(df)
+    amount = df["amount"].to_numpy(dtype=np.float64)
+    users = df["user_id"].to_numpy() if "user_id" in df else np.zeros(n, dtype=np.int64)
+    codes, _ = pd.factorize(users)
+    if "timestamp" in df:
+        timestamps = pd.to_datetime(df["timestamp"])
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert(None)
+        seconds = timestamps.to_numpy().astype("datetime64[s]").astype(np.int64)
+    else:
+        seconds = np.arange(n, dtype=np.int64)
+
+    # One int64 key per row orders by (user, time) and keeps each user's
+    # timeline in its own disjoint range, so a single searchsorted later
+    # finds every row's trailing time window.
+    origin = seconds.min() if n else 0
+    span = int(seconds.max() - origin) if n else 0
+    velocity_seconds = int(pd.Timedelta(velocity_window).total_seconds())
+    structuring_seconds = int(pd.Timedelta(structuring_window).total_seconds())
+    stride = span + max(velocity_seconds, structuring_seconds) + 1
+    key = codes.astype(np.int64) * stride + (seconds - origin)
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    codes_s = codes[order]
+    amount_s = amount[order]
+    log_s = np.log1p(np.abs(amount_s))
+    idx = np.arange(n)
+
+    group_start = np.zeros(n, dtype=np.int64)
+    if n:
+        is_start = np.r_[True, codes_s[1:] != codes_s[:-1]]
+        group_start = np.maximum.accumulate(np.where(is_start, idx, 0))
+
+    # Rolling z-score against the previous `window` transactions of the same user.
+    cs = np.r_[0.0, np.cumsum(log_s)]
+    cs2 = np.r_[0.0, np.cumsum(log_s * log_s)]
+    left = np.maximum(idx - window, group_start)
+    history = idx - left
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _windowed_sum(cs, left, idx) / history
+        var = _windowed_sum(cs2, left, idx) / history - mean * mean
+        std = np.sqrt(np.maximum(var, 0.0))
+        zscore = np.where((history >= min_history) & (std > 1e-9), (log_s - mean) / std, 0.0)
+
+    # Robust z-score (median/MAD) and IQR fences over the user's full history.
+    grouped = pd.Series(log_s).groupby(codes_s)
+    median = grouped.transform("median").to_numpy()
+    mad = pd.Series(np.abs(log_s - median)).groupby(codes_s).transform("median").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        robust_z = np.where(mad > 1e-9, 0.6745 * (log_s - median) / mad, 0.0)
+    amounts = pd.Series(amount_s).groupby(codes_s)
+    q1 = amounts.quantile(0.25).to_numpy()[codes_s]
+    q3 = amounts.quantile(0.75).to_numpy()[codes_s]
+    fence = iqr_k * (q3 - q1)
+    iqr_outlier = (fence > 0) & ((amount_s > q3 + fence) | (amount_s < q1 - fence))
+
+    # Velocity: count and amount per user within a trailing time window.
+    ca = np.r_[0.0, np.cumsum(amount_s)]
+    velocity_left = np.searchsorted(key, key - velocity_seconds, side="left")
+    window_count = idx + 1 - velocity_left
+    window_amount = _windowed_sum(ca, velocity_left, idx + 1)
+
+    # Structuring: several amounts just under the reporting threshold.
+    near_threshold = (amount_s >= reporting_threshold * (1 - structuring_band)) & (amount_s < reporting_threshold)
+    cn = np.r_[0, np.cumsum(near_threshold)]
+    structuring_left = np.searchsorted(key, key - structuring_seconds, side="left")
+    near_count = _windowed_sum(cn, structuring_left, idx + 1)
+    structuring = near_threshold & (near_count >= structuring_count)
+
+    ratios = np.column_stack([
+        np.abs(zscore) / z_threshold,
+        np.abs(robust_z) / mad_threshold,
+        iqr_outlier.astype(np.float64),
+        window_count / velocity_count,
+        window_amount / velocity_amount,
+        np.where(near_threshold, near_count / structuring_count, 0.0),
+    ])
+    flags = (
+        (ratios[:, 0] >= 1) * FLAG_ZSCORE
+        | (ratios[:, 1] >= 1) * FLAG_MAD
+        | iqr_outlier * FLAG_IQR
+        | (ratios[:, 3] > 1) * FLAG_VELOCITY_COUNT
+        | (ratios[:, 4] > 1) * FLAG_VELOCITY_AMOUNT
+        | structuring * FLAG_STRUCTURING
+    ).astype(np.int64)
+
+    result = pd.DataFrame({
+        "zscore": zscore,
+        "robust_z": robust_z,
+        "iqr_outlier": iqr_outlier,
+        "velocity_count": window_count,
+        "velocity_amount": window_amount,
+        "structuring_count": np.where(near_threshold, near_count, 0),
+        "flags": flags,
+        "anomaly_score": ratios.max(axis=1) if n else np.zeros(0),
     })
-    return df
+    # Undo the sort so the output lines up with the input rows.
+    inverse = np.empty(n, dtype=np.int64)
+    inverse[order] = idx
+    result = result.iloc[inverse]
+    result.index = df.index
+    return result
+
 
-def detect_anomalies_with_openai(df):
-    gpt = GPT(api_key=AZURE_OPENAI_API_KEY, endpoint=AZURE_OPENAI_ENDPOINT)
-    # Mock anomaly detection using GPT-3.5 (assumed for illustration)
+def describe_flags(flags):
+    return [reason for flag, reason in FLAG_REASONS.items() if flags & flag]
+
+
+def top_anomalies(df, scores, k=10):
+    """The k highest-scoring flagged rows of ``df`` joined with their scores."""
+    flagged = scores[scores["flags"] > 0]
+    top = flagged.nlargest(k, "anomaly_score")
+    return df.loc[top.index].join(top)
+
+
+def detect_anomalies_with_openai(df, top_k=10, gateway=None):
+    """Detect anomalies locally and describe the top ``top_k`` of them.
+
+    Only the flagged top-K rows, never the full frame, are sent to the
+    language model, in one batched gateway call, and only when a
+    ``gateway`` (the Flask backend's llm_gateway.LLMGateway) is given;
+    otherwise the descriptions are built from the detector flags.
+    """
     print("Detecting anomalies...")
-    anomalies = ["Anomaly detected in transaction 2"]
+    top = top_anomalies(df, detect_anomalies(df), k=top_k)
+    anomalies = []
+    prompts = []
+    for row_id, row in top.iterrows():
+        transaction = row["transaction_id"] if "transaction_id" in row else row_id
+        reasons = "; ".join(describe_flags(int(row["flags"])))
+        anomalies.append(f"Anomaly detected in transaction {transaction} (score {row['anomaly_score']:.2f}): {reasons}")
+        prompts.append(
+            "You are a banking compliance analyst. Explain briefly why this transaction "
+            f"needs review.\n\nTransaction: {row.to_dict()}\nDetector findings: {reasons}\n\nExplanation:"
+        )
+    if gateway is not None and prompts:
+        explanations = gateway.complete_many(prompts, fallback=EXPLANATION_FALLBACK, **EXPLANATION_PARAMS)
+        anomalies = [f"{summary}\n{explanation}" for summary, explanation in zip(anomalies, explanations)]
     return anomalies
 
+
 if __name__ == "__main__":
-    # Load data from Azure Blob Storage
-    df_transactions = load_data_from_storage()
+    # Run from a checkout: the LLM gateway is the one the Flask backend uses.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Backend", "flask"))
+    from llm_gateway import LLMGateway
+
+    # Load the last 30 days of staged transactions
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    df_transactions = load_data_from_storage(start_date=today - pd.Timedelta(days=30), end_date=today)
 
     # Detect anomalies
-    detected_anomalies = detect_anomalies_with_openai(df_transactions)
+    openai.api_key = AZURE_OPENAI_API_KEY
+    detected_anomalies = detect_anomalies_with_openai(df_transactions, gateway=LLMGateway(max_concurrency=4))
     for anomaly in detected_anomalies:
         print(anomaly)
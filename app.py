@@ -1,3 +1,4 @@
+import os
 import random
 import re
 from datetime import datetime, timedelta
@@ -10,7 +11,7 @@ import openai
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///complianceai.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///complianceai.db')
 db = SQLAlchemy(app)
 
 # Set your OpenAI API key here
@@ -61,7 +62,7 @@ def token_required(f):
 @app.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
-    hashed_password = generate_password_hash(data['password'], method='sha256')
+    hashed_password = generate_password_hash(data['password'])
     new_user = User(username=data['username'], password=hashed_password, role=data['role'])
     db.session.add(new_user)
     db.session.commit()
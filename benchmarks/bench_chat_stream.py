@@ -0,0 +1,60 @@
+"""Time to first token for blocking vs streamed completions against the local fake model server.
+
+A blocking call shows nothing until the whole reply is generated; a streamed
+call hands over the first token as soon as the model emits it, which is what
+/api/chat/stream forwards to the browser.
+
+    python benchmarks/bench_chat_stream.py --tokens 150 --first-token-delay 0.4 --token-delay 0.03
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import openai
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mock_services import MockCompletionServer  # noqa: E402
+
+PARAMS = {'engine': 'text-davinci-002', 'max_tokens': 150, 'n': 1, 'stop': None, 'temperature': 0.7}
+
+
+def blocking(prompt):
+    started = time.perf_counter()
+    openai.Completion.create(prompt=prompt, **PARAMS)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+
+def streamed(prompt):
+    started = time.perf_counter()
+    first = None
+    for chunk in openai.Completion.create(prompt=prompt, stream=True, **PARAMS):
+        if first is None and chunk.choices[0].text:
+            first = time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=10)
+    parser.add_argument('--tokens', type=int, default=150)
+    parser.add_argument('--first-token-delay', type=float, default=0.4)
+    parser.add_argument('--token-delay', type=float, default=0.03)
+    args = parser.parse_args()
+
+    with MockCompletionServer(tokens=args.tokens, first_token_delay=args.first_token_delay,
+                              token_delay=args.token_delay) as model:
+        openai.api_base = model.api_base
+        openai.api_key = 'bench'
+        for label, call in (('blocking', blocking), ('streamed', streamed)):
+            results = [call(f"Question {i}") for i in range(args.requests)]
+            ttft = statistics.median(r[0] for r in results)
+            total = statistics.median(r[1] for r in results)
+            print(f"{label}: median time to first token {ttft * 1000:.0f} ms, to full reply {total * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,113 @@
+"""Mixed read/write throughput under concurrency for different engine settings.
+
+N threads each run a mix of summary reads and transaction inserts. Without
+--database-url the script compares SQLite in rollback-journal mode against
+WAL with synchronous=NORMAL; pass a URL (and DB_* variables) to measure
+another configuration, e.g. PostgreSQL:
+
+    python benchmarks/bench_db_concurrency.py --threads 16 --ops 300 --write-ratio 0.2
+    DB_POOL_SIZE=20 python benchmarks/bench_db_concurrency.py --database-url postgresql://localhost/bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from flask import Flask  # noqa: E402
+
+from config import configure_engine, database_config  # noqa: E402
+from main import Transaction, User, db  # noqa: E402
+
+
+def build_app(name, environ):
+    bench_app = Flask(name)
+    bench_app.config.update(database_config(environ))
+    db.init_app(bench_app)
+    with bench_app.app_context():
+        configure_engine(db.engine, environ)
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x', role='admin'))
+        db.session.commit()
+    return bench_app
+
+
+def run_config(label, environ, threads, ops, write_ratio):
+    bench_app = build_app(f"bench_{label}", environ)
+    latencies = {'read': [], 'write': []}
+    errors = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {'read': [], 'write': []}
+        with bench_app.app_context():
+            for _ in range(ops):
+                kind = 'write' if rng.random() < write_ratio else 'read'
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        db.session.add(Transaction(user_id=1, amount=rng.uniform(1, 1000),
+                                                   transaction_type='deposit', timestamp=datetime.utcnow()))
+                        db.session.commit()
+                    else:
+                        db.session.query(db.func.count(), db.func.sum(Transaction.amount)).filter(
+                            Transaction.user_id == 1).one()
+                        db.session.rollback()
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(e)
+                    continue
+                local[kind].append(time.perf_counter() - started)
+        with lock:
+            for kind in local:
+                latencies[kind].extend(local[kind])
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    def p95(values):
+        return sorted(values)[int(len(values) * 0.95)] * 1000 if values else 0.0
+
+    done = len(latencies['read']) + len(latencies['write'])
+    print(f"{label:<18} {done / elapsed:9.1f} ops/s  read p95 {p95(latencies['read']):7.2f} ms  "
+          f"write p95 {p95(latencies['write']):7.2f} ms  errors {len(errors)}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-url')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=300, help='operations per thread')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.database_url:
+        environ = dict(os.environ, DATABASE_URL=args.database_url)
+        run_config('configured', environ, args.threads, args.ops, args.write_ratio)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench_concurrency_')
+    for label, journal_mode, synchronous in [('sqlite delete/full', 'DELETE', 'FULL'),
+                                             ('sqlite wal/normal', 'WAL', 'NORMAL')]:
+        environ = dict(os.environ,
+                       DATABASE_URL=f"sqlite:///{os.path.join(workdir, journal_mode.lower() + '.db')}",
+                       SQLITE_JOURNAL_MODE=journal_mode,
+                       SQLITE_SYNCHRONOUS=synchronous)
+        run_config(label, environ, args.threads, args.ops, args.write_ratio)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,69 @@
+"""Ad hoc model calls vs the shared LLM gateway against the local fake model server.
+
+Simulates a burst of concurrent chat questions, many of them repeats (as
+when a team asks about the same circular), plus an anomaly run that needs
+explanations for a batch of transactions. Reports upstream requests, peak
+concurrency seen by the model server and wall time.
+
+    python benchmarks/bench_llm_gateway.py --users 64 --questions 16 --explanations 50
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from llm_gateway import LLMGateway  # noqa: E402
+from mock_services import MockCompletionServer  # noqa: E402
+
+PARAMS = {'engine': 'text-davinci-002', 'max_tokens': 150, 'temperature': 0.7}
+
+
+def ad_hoc(prompt):
+    return openai.Completion.create(prompt=prompt, **PARAMS).choices[0].text.strip()
+
+
+def run_case(label, model, users, chat_prompts, explanation_prompts, gateway=None):
+    model.requests = model.max_in_flight = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        if gateway is None:
+            chats = list(pool.map(ad_hoc, chat_prompts))
+            explanations = [ad_hoc(prompt) for prompt in explanation_prompts]
+        else:
+            chats = list(pool.map(lambda prompt: gateway.complete(prompt, **PARAMS), chat_prompts))
+            explanations = gateway.complete_many(explanation_prompts, **PARAMS)
+    elapsed = time.perf_counter() - started
+    correct = all(answer == model.reply(prompt) for answer, prompt in
+                  zip(chats + explanations, chat_prompts + explanation_prompts))
+    print(f"{label}: {model.requests} upstream requests, peak {model.max_in_flight} concurrent, "
+          f"{elapsed:.2f}s, answers {'ok' if correct else 'WRONG'}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=64, help='concurrent chat requests')
+    parser.add_argument('--questions', type=int, default=16, help='distinct questions among them')
+    parser.add_argument('--explanations', type=int, default=50, help='anomalies to explain')
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds the model takes per request')
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    args = parser.parse_args()
+    chat_prompts = [f"What does circular {i % args.questions} change?" for i in range(args.users)]
+    explanation_prompts = [f"Explain why transaction {i} needs review." for i in range(args.explanations)]
+
+    with MockCompletionServer(tokens=30, first_token_delay=args.latency, token_delay=0) as model:
+        openai.api_base = model.api_base
+        openai.api_key = 'bench'
+        run_case('ad hoc ', model, args.users, chat_prompts, explanation_prompts)
+        gateway = LLMGateway(max_concurrency=args.max_concurrency)
+        run_case('gateway', model, args.users, chat_prompts, explanation_prompts, gateway)
+        print(gateway.stats())
+
+
+if __name__ == '__main__':
+    run()
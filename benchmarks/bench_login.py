@@ -0,0 +1,131 @@
+"""Login throughput under concurrent load, and what a login storm does to other requests.
+
+``--threads`` clients log in over and over while one more client keeps
+reading /api/training_modules. The old login path (verify the hash on the
+request thread, commit last_login on every login) is compared with the
+/login endpoint, which verifies on the password hasher's bounded pool and
+queues last_login for batched writes. Reports logins/s, login p95 and the
+p95 of the concurrent reads.
+
+    python benchmarks/bench_login.py --threads 16 --seconds 10 --workers 2
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+workdir = tempfile.mkdtemp(prefix='bench_login_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ['JOB_WORKERS'] = '0'
+os.chdir(workdir)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Backend', 'flask'))
+
+import jwt  # noqa: E402
+from flask import jsonify, request  # noqa: E402
+from werkzeug.security import check_password_hash  # noqa: E402
+
+import main  # noqa: E402
+from main import User, app, db  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+
+PASSWORD = 'Bench1234'
+
+
+@app.route('/bench/legacy_login', methods=['POST'])
+def legacy_login():
+    # /login as it was: hash checked on the request thread, one commit per login.
+    auth = request.authorization
+    user = User.query.filter_by(username=auth.username).first()
+    if not user or not check_password_hash(user.password, auth.password):
+        return jsonify({'message': 'Could not verify'}), 401
+    now = datetime.utcnow()
+    token = jwt.encode({'user_id': user.id, 'iat': now, 'exp': now + timedelta(hours=24)},
+                       app.config['SECRET_KEY'], algorithm='HS256')
+    user.last_login = now
+    db.session.commit()
+    return jsonify({'token': token, 'role': user.role})
+
+
+def setup(users):
+    password = main.password_hasher.hash(PASSWORD)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([User(username=f"user{i}", email=f"user{i}@example.com", password=password,
+                                 role='employee') for i in range(users)])
+        db.session.commit()
+        reader = db.session.get(User, 1)
+        return jwt.encode({'user_id': reader.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                          app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def p95(values):
+    return sorted(values)[int(len(values) * 0.95)] * 1000 if values else 0.0
+
+
+def run_case(label, path, threads, seconds, users, token):
+    stop = threading.Event()
+    logins, reads, failures = [], [], []
+    lock = threading.Lock()
+
+    def login_client(n):
+        client = app.test_client()
+        credentials = base64.b64encode(f"user{n % users}:{PASSWORD}".encode()).decode()
+        local = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.post(path, headers={'Authorization': f"Basic {credentials}"})
+            if response.status_code == 200:
+                local.append(time.perf_counter() - started)
+            else:
+                with lock:
+                    failures.append(response.status_code)
+        with lock:
+            logins.extend(local)
+
+    def read_client():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/training_modules', headers={'Authorization': token})
+            reads.append(time.perf_counter() - started)
+
+    clients = [threading.Thread(target=login_client, args=(i,)) for i in range(threads)]
+    clients.append(threading.Thread(target=read_client))
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    time.sleep(seconds)
+    stop.set()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {len(logins) / elapsed:7.1f} logins/s  login p95 {p95(logins):8.1f} ms  "
+          f"read p95 {p95(reads):7.1f} ms ({len(reads)} reads)  rejected {len(failures)}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16, help='concurrent login clients')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=2, help='password hasher threads')
+    parser.add_argument('--scheme', default='scrypt')
+    args = parser.parse_args()
+
+    main.password_hasher = PasswordHasher(args.scheme, workers=args.workers, max_pending=args.threads * 2)
+    token = setup(args.users)
+    print(f"{args.threads} login clients for {args.seconds:.0f}s, {args.scheme}, "
+          f"{args.workers} hasher threads, {os.cpu_count()} CPUs")
+    run_case('inline', '/bench/legacy_login', args.threads, args.seconds, args.users, token)
+    run_case('pool', '/login', args.threads, args.seconds, args.users, token)
+    main.last_login_writer.close()
+    print(f"last_login writer: {main.last_login_writer.stats()}")
+
+
+if __name__ == '__main__':
+    run()
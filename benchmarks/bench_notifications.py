@@ -0,0 +1,59 @@
+"""Regulatory notification fan-out against the local stub webhook.
+
+Compares the old one-blocking-POST-per-update loop with the batched,
+concurrent, rate-limited notifier, and checks every update was delivered
+exactly once despite injected 503s.
+
+    python benchmarks/bench_notifications.py --updates 500 --latency 0.1
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from mock_services import MockWebhookServer  # noqa: E402
+from notifications import WebhookNotifier  # noqa: E402
+from regulatory_monitoring import analyze_and_notify, format_update  # noqa: E402
+
+
+def synthetic_updates(count):
+    return [{'title': f"Circular {i}", 'details': f"Amendment {i} to the KYC master direction."} for i in range(count)]
+
+
+def delivered(webhook):
+    return sum(message['text'].count('Regulatory update:') for message in webhook.messages)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds the webhook takes per request')
+    parser.add_argument('--rate', type=float, default=10.0, help='messages per second the webhook accepts')
+    parser.add_argument('--fail-every', type=int, default=7, help='every n-th attempt gets a 503')
+    args = parser.parse_args()
+    updates = synthetic_updates(args.updates)
+
+    with MockWebhookServer(latency=args.latency, fail_every=args.fail_every) as webhook:
+        started = time.perf_counter()
+        for update in updates:
+            requests.post(webhook.url, json={'text': format_update(update)})
+        elapsed = time.perf_counter() - started
+        print(f"sequential: {webhook.attempts} requests in {elapsed:.2f}s, "
+              f"{delivered(webhook)}/{len(updates)} updates delivered")
+
+    with MockWebhookServer(latency=args.latency, rate_limit=args.rate, fail_every=args.fail_every) as webhook:
+        started = time.perf_counter()
+        result = analyze_and_notify(updates, WebhookNotifier(webhook.url, rate=args.rate))
+        elapsed = time.perf_counter() - started
+        print(f"notifier:   {result['messages']} messages, {webhook.attempts} requests "
+              f"({webhook.throttled} throttled) in {elapsed:.2f}s, "
+              f"{delivered(webhook)}/{len(updates)} updates delivered, {result['failed']} failed")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,77 @@
+"""Time a deep audit-log page with OFFSET pagination versus keyset cursors.
+
+    python benchmarks/bench_pagination.py --rows 500000 --page 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from flask import Flask  # noqa: E402
+
+from main import db, AuditLog, User  # noqa: E402
+from pagination import encode_cursor, keyset_page  # noqa: E402
+
+
+def seed(rows, batch_size=50000):
+    db.session.add(User(id=1, username='bench', email='bench@example.com', password='x', role='admin'))
+    db.session.commit()
+    start = datetime.utcnow() - timedelta(days=365)
+    for offset in range(0, rows, batch_size):
+        db.session.execute(AuditLog.__table__.insert(), [{
+            'user_id': 1,
+            'action': f"Bench action {i}",
+            'timestamp': start + timedelta(seconds=i * 7),
+            'ip_address': '127.0.0.1',
+            'user_agent': 'bench'
+        } for i in range(offset, min(offset + batch_size, rows))])
+        db.session.commit()
+
+
+def timed(label, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<16} best of {repeat}: {best * 1000:10.2f} ms")
+    return best
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--page', type=int, default=10000)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_pagination_')
+    bench_app = Flask('bench_pagination')
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db.init_app(bench_app)
+
+    with bench_app.app_context():
+        db.create_all()
+        print(f"Seeding {args.rows} audit logs into {workdir} ...")
+        seed(args.rows)
+
+        ordered = AuditLog.query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+        # The cursor a client would hold after walking to the previous page.
+        boundary = ordered.offset((args.page - 1) * args.per_page - 1).first()
+        cursor = encode_cursor(boundary.timestamp, boundary.id)
+
+        offset = timed('offset + count', lambda: ordered.paginate(page=args.page, per_page=args.per_page), args.repeat)
+        keyset = timed('keyset', lambda: keyset_page(
+            AuditLog.query, AuditLog.timestamp, AuditLog.id, cursor, args.per_page
+        ), args.repeat)
+        print(f"page {args.page}: keyset is {offset / keyset:.1f}x faster")
+
+
+if __name__ == '__main__':
+    run()
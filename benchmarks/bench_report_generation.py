@@ -0,0 +1,86 @@
+"""Map-reduce audit report statistics vs loading the whole period into one DataFrame.
+
+Stages synthetic transactions in a temporary TransactionStore, then times
+each strategy in a fresh subprocess and reports its peak resident memory.
+The in-memory baseline grows with the data; the map-reduce pipeline keeps
+memory per worker bounded by --batch-rows and scales with --workers.
+
+    python benchmarks/bench_report_generation.py --rows 5000000 --workers 1,2,4
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_storage import synthetic_transactions  # noqa: E402
+from report_generation import REPORT_COLUMNS, compute_report_stats  # noqa: E402
+from storage import LocalFileSystemStore, TransactionStore  # noqa: E402
+
+
+def peak_rss_mb():
+    """Peak RSS of this process and its finished children, in MB."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    try:
+        # ru_maxrss survives exec, so it would report the parent's peak; VmHWM does not.
+        with open('/proc/self/status') as f:
+            own = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+    except OSError:
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return max(own, children)
+
+
+def measure(root, mode, workers, batch_rows):
+    """Run one strategy in this process and print 'seconds peak_mb rows'."""
+    store = TransactionStore(LocalFileSystemStore(root))
+    started = time.perf_counter()
+    if mode == 'in-memory':
+        df = store.read(columns=REPORT_COLUMNS)
+        df.groupby('transaction_type')['amount'].agg(['count', 'sum', 'mean', 'std', 'min', 'max'])
+        df.groupby(pd.to_datetime(df['timestamp']).dt.floor('D'))['amount'].agg(['count', 'sum'])
+        df['amount'].quantile([0.5, 0.95, 0.99])
+        df.nlargest(10, 'amount')
+        rows = len(df)
+    else:
+        rows = compute_report_stats(store=store, workers=workers, batch_rows=batch_rows).rows
+    elapsed = time.perf_counter() - started
+    print(f"{elapsed} {peak_rss_mb()} {rows}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts to try')
+    parser.add_argument('--batch-rows', type=int, default=256 * 1024)
+    parser.add_argument('--measure', nargs=4, metavar=('ROOT', 'MODE', 'WORKERS', 'BATCH_ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        root, mode, workers, batch_rows = args.measure
+        return measure(root, mode, int(workers), int(batch_rows))
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = os.path.join(directory, 'staging')
+        store = TransactionStore(LocalFileSystemStore(root))
+        for start in range(0, args.rows, 1_000_000):
+            store.write(synthetic_transactions(min(1_000_000, args.rows - start), seed=start))
+        print(f"{args.rows:,} rows staged in {sum(len(keys) for keys in store.partitions().values())} part files "
+              f"({os.cpu_count()} CPUs)")
+        cases = [('in-memory', 1)] + [('map-reduce', int(workers)) for workers in args.workers.split(',')]
+        for mode, workers in cases:
+            output = subprocess.run(
+                [sys.executable, __file__, '--measure', root, mode, str(workers), str(args.batch_rows)],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            elapsed, peak, rows = float(output[0]), float(output[1]), int(output[2])
+            label = mode if mode == 'in-memory' else f"{mode} x{workers}"
+            print(f"{label:<16} {elapsed:7.2f}s  peak RSS {peak:7.0f} MB  {rows:,} rows")
+
+
+if __name__ == '__main__':
+    run()
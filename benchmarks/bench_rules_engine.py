@@ -0,0 +1,98 @@
+"""Rules per second of the compiled AML rules engine.
+
+Builds a synthetic rule set (thresholds per transaction type, large country
+and counterparty lists, velocity and structuring rules) and evaluates a
+stream of transactions against it, with the users' history pre-grouped the
+way the batch compliance check does it.
+
+    python benchmarks/bench_rules_engine.py --rules 500 --transactions 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from rules_engine import RuleSet, TransactionFacts, histories_from_rows  # noqa: E402
+
+TRANSACTION_TYPES = ['deposit', 'withdrawal', 'transfer', 'payment']
+
+
+def synthetic_rules(count, rng):
+    rules = [
+        {'id': 'VELOCITY_24H', 'type': 'velocity', 'window_seconds': 86400, 'max_count': 10, 'max_amount': 50000},
+        {'id': 'STRUCTURING_7D', 'type': 'structuring', 'threshold': 10000, 'window_seconds': 7 * 86400},
+    ]
+    for i in range(count - len(rules)):
+        kind = i % 3
+        if kind == 0:
+            rules.append({
+                'id': f"THRESHOLD_{i}",
+                'type': 'threshold',
+                'transaction_types': rng.sample(TRANSACTION_TYPES, rng.randint(1, 2)),
+                'min_amount': rng.randint(5000, 500000)
+            })
+        elif kind == 1:
+            rules.append({
+                'id': f"COUNTRY_{i}",
+                'type': 'country',
+                'countries': [f"{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}" for _ in range(2)]
+            })
+        else:
+            rules.append({
+                'id': f"COUNTERPARTY_{i}",
+                'type': 'counterparty',
+                'counterparties': [f"Entity {rng.randrange(1000000)}" for _ in range(200)]
+            })
+    return RuleSet.from_dict({'rules': rules})
+
+
+def synthetic_transactions(count, users, rng):
+    start = datetime(2024, 1, 1)
+    facts = []
+    for i in range(count):
+        facts.append(TransactionFacts(
+            id=i,
+            user_id=rng.randrange(users),
+            amount=round(rng.lognormvariate(6, 1.5), 2),
+            transaction_type=rng.choice(TRANSACTION_TYPES),
+            timestamp=start + timedelta(seconds=rng.randrange(90 * 86400)),
+            country=f"{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}",
+            counterparty=f"Entity {rng.randrange(1000000)}"
+        ))
+    return facts
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, default=500)
+    parser.add_argument('--transactions', type=int, default=200_000)
+    parser.add_argument('--users', type=int, default=2_000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    started = time.perf_counter()
+    rule_set = synthetic_rules(args.rules, rng)
+    print(f"compiled {len(rule_set.rules)} rules in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    facts = synthetic_transactions(args.transactions, args.users, rng)
+    started = time.perf_counter()
+    histories = histories_from_rows((f.user_id, f.timestamp, f.amount) for f in facts)
+    print(f"grouped history for {len(histories):,} users in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    flagged = 0
+    for f in facts:
+        if rule_set.evaluate(f, histories.get(f.user_id)):
+            flagged += 1
+    elapsed = time.perf_counter() - started
+    print(f"evaluated {len(facts):,} transactions in {elapsed:.2f}s "
+          f"({len(facts) / elapsed:,.0f} transactions/s, {elapsed / len(facts) * 1e6:.1f}us each, "
+          f"{len(facts) * len(rule_set.rules) / elapsed:,.0f} rules/s), {flagged:,} flagged")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,94 @@
+"""Date-partitioned Parquet staging vs CSV and JSON round trips.
+
+For each format: write the frame, read it all back, and run the typical
+analytics read (two columns for one month). CSV and JSON must parse every
+row to answer the selective read; the Parquet store opens only the month's
+partitions and decodes only the requested columns.
+
+    python benchmarks/bench_storage.py --rows 10000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from storage import LocalFileSystemStore, TransactionStore  # noqa: E402
+
+TRANSACTION_TYPES = np.array(['deposit', 'withdrawal', 'transfer', 'payment'])
+MONTH = ('2024-03-01', '2024-03-31')
+COLUMNS = ['user_id', 'amount']
+
+
+def synthetic_transactions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'transaction_id': np.arange(rows, dtype=np.int64),
+        'user_id': rng.integers(1, 100_000, rows),
+        'amount': rng.lognormal(5, 1.5, rows).round(2),
+        'transaction_type': TRANSACTION_TYPES[rng.integers(0, len(TRANSACTION_TYPES), rows)],
+        'description': 'ERP transaction',
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit='s'),
+    })
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def in_month(df):
+    timestamps = pd.to_datetime(df['timestamp'])
+    return df.loc[(timestamps >= MONTH[0]) & (timestamps < pd.Timestamp(MONTH[1]) + pd.Timedelta(days=1)), COLUMNS]
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"  {label:<16} {time.perf_counter() - started:8.2f}s")
+    return result
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--formats', default='parquet,csv,json')
+    args = parser.parse_args()
+    formats = args.formats.split(',')
+
+    df = synthetic_transactions(args.rows)
+    print(f"{len(df):,} rows, {df.memory_usage(deep=True).sum() / 1e6:,.0f} MB in memory")
+
+    with tempfile.TemporaryDirectory() as directory:
+        if 'parquet' in formats:
+            print('parquet (date-partitioned store)')
+            store = TransactionStore(LocalFileSystemStore(os.path.join(directory, 'staging')))
+            timed('write', lambda: store.write(df))
+            timed('read all', lambda: store.read())
+            selected = timed('read month/2 col', lambda: store.read(columns=COLUMNS, start_date=MONTH[0],
+                                                                    end_date=MONTH[1]))
+            print(f"  {len(selected):,} rows selected, {directory_size(store.store.root) / 1e6:,.0f} MB on disk")
+        if 'csv' in formats:
+            print('csv')
+            path = os.path.join(directory, 'transactions.csv')
+            timed('write', lambda: df.to_csv(path, index=False))
+            timed('read all', lambda: pd.read_csv(path, parse_dates=['timestamp']))
+            selected = timed('read month/2 col', lambda: in_month(pd.read_csv(path, usecols=COLUMNS + ['timestamp'])))
+            print(f"  {len(selected):,} rows selected, {directory_size(path) / 1e6:,.0f} MB on disk")
+        if 'json' in formats:
+            print('json (lines)')
+            path = os.path.join(directory, 'transactions.jsonl')
+            timed('write', lambda: df.to_json(path, orient='records', lines=True, date_format='iso'))
+            timed('read all', lambda: pd.read_json(path, lines=True))
+            selected = timed('read month/2 col', lambda: in_month(pd.read_json(path, lines=True)))
+            print(f"  {len(selected):,} rows selected, {directory_size(path) / 1e6:,.0f} MB on disk")
+
+
+if __name__ == '__main__':
+    run()
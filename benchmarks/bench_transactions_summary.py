@@ -0,0 +1,103 @@
+"""Compare the ORM/Python-loop transactions summary with the SQL paths.
+
+Seeds a throwaway SQLite database with transactions for a single user and
+times the legacy loop, a GROUP BY over the transaction table and the read
+from the daily rollup table:
+
+    python benchmarks/bench_transactions_summary.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from flask import Flask  # noqa: E402
+
+from main import (  # noqa: E402
+    db, Transaction, User, rebuild_transaction_rollup, summarize_transactions
+)
+
+TRANSACTION_TYPES = ['deposit', 'withdrawal', 'transfer', 'payment', 'fee']
+
+
+def seed(rows, user_id, batch_size=50000):
+    db.session.add(User(id=user_id, username='bench', email='bench@example.com',
+                        password='x', role='customer'))
+    db.session.commit()
+    start = datetime.utcnow() - timedelta(days=365)
+    table = Transaction.__table__
+    for offset in range(0, rows, batch_size):
+        batch = [{
+            'user_id': user_id,
+            'amount': round(random.uniform(1, 10000), 2),
+            'transaction_type': random.choice(TRANSACTION_TYPES),
+            'timestamp': start + timedelta(seconds=random.randint(0, 365 * 86400)),
+            'status': 'completed',
+            'description': 'bench',
+        } for _ in range(min(batch_size, rows - offset))]
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+
+def legacy_summary(user_id):
+    transactions = Transaction.query.filter_by(user_id=user_id).all()
+    summary = {'total_transactions': len(transactions),
+               'total_amount': sum(t.amount for t in transactions),
+               'transactions_by_type': {}}
+    for t in transactions:
+        bucket = summary['transactions_by_type'].setdefault(t.transaction_type, {'count': 0, 'total_amount': 0})
+        bucket['count'] += 1
+        bucket['total_amount'] += t.amount
+    return summary
+
+
+def aggregate_summary(user_id):
+    return db.session.query(
+        Transaction.transaction_type,
+        db.func.count(),
+        db.func.sum(Transaction.amount)
+    ).filter(Transaction.user_id == user_id).group_by(Transaction.transaction_type).all()
+
+
+def timed(label, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<12} best of {repeat}: {best * 1000:10.2f} ms")
+    return best
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_summary_')
+    bench_app = Flask('bench_summary')
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db.init_app(bench_app)
+
+    with bench_app.app_context():
+        db.create_all()
+        print(f"Seeding {args.rows} transactions into {workdir} ...")
+        seed(args.rows, user_id=1)
+        started = time.perf_counter()
+        buckets = rebuild_transaction_rollup()
+        print(f"rollup rebuild: {buckets} buckets in {(time.perf_counter() - started) * 1000:.0f} ms")
+        legacy = timed('legacy', lambda: legacy_summary(1), args.repeat)
+        aggregate = timed('aggregate', lambda: aggregate_summary(1), args.repeat)
+        rollup = timed('rollup', lambda: summarize_transactions(1), args.repeat)
+        print(f"speedup vs legacy: aggregate {legacy / aggregate:.1f}x, rollup {legacy / rollup:.1f}x")
+
+
+if __name__ == '__main__':
+    run()
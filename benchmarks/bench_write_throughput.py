@@ -0,0 +1,91 @@
+"""Write throughput of two-commit versus single-commit (unit of work) endpoints.
+
+Each worker thread repeatedly creates a RiskAssessment plus its AuditLog
+entry, either committing twice as the handlers used to or once as
+unit_of_work() does now. Point --database-url at PostgreSQL to compare
+(requires a driver such as psycopg2):
+
+    python benchmarks/bench_write_throughput.py --threads 8 --ops 500
+    python benchmarks/bench_write_throughput.py --database-url postgresql://localhost/bench
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Backend', 'flask'))
+
+from flask import Flask  # noqa: E402
+
+from main import db, AuditLog, RiskAssessment, User  # noqa: E402
+
+
+def two_commits(user_id, i):
+    db.session.add(RiskAssessment(user_id=user_id, assessment_type='bench', risk_level='low', details=str(i)))
+    db.session.commit()
+    db.session.add(AuditLog(user_id=user_id, action='Created risk assessment: bench'))
+    db.session.commit()
+
+
+def one_commit(user_id, i):
+    db.session.add(RiskAssessment(user_id=user_id, assessment_type='bench', risk_level='low', details=str(i)))
+    db.session.add(AuditLog(user_id=user_id, action='Created risk assessment: bench'))
+    db.session.commit()
+
+
+def run_mode(bench_app, label, op, threads, ops):
+    errors = []
+
+    def worker():
+        with bench_app.app_context():
+            for i in range(ops):
+                try:
+                    op(1, i)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    done = threads * ops - len(errors)
+    print(f"{label:<12} {done:7d} writes in {elapsed:7.2f}s = {done / elapsed:9.1f} writes/s ({len(errors)} errors)")
+    return done / elapsed
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-url')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=500, help='writes per thread')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_writes_'), 'bench.db')}"
+    bench_app = Flask('bench_writes')
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    if database_url.startswith('sqlite'):
+        bench_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(bench_app)
+
+    with bench_app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x', role='admin'))
+        db.session.commit()
+
+    print(f"{database_url}: {args.threads} threads x {args.ops} ops")
+    before = run_mode(bench_app, 'two commits', two_commits, args.threads, args.ops)
+    after = run_mode(bench_app, 'one commit', one_commit, args.threads, args.ops)
+    print(f"unit of work throughput: {after / before:.2f}x")
+
+
+if __name__ == '__main__':
+    run()
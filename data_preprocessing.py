@@ -1,34 +1,235 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from storage import STAGING_ROOT, LocalFileSystemStore, TransactionStore
 
 # Mock placeholders
 ERP_API_URL = "https://mock-erp-api.com/transactions"
 ERP_API_KEY = "mock_api_key"
 AZURE_STORAGE_CONNECTION_STRING = "DefaultEndpointsProtocol=https;AccountName=mockaccount;AccountKey=mockkey;EndpointSuffix=core.windows.net"
 
-def fetch_data_from_erp():
-    headers = {
-        "Authorization": f"Bearer {ERP_API_KEY}"
-    }
-    response = requests.get(ERP_API_URL, headers=headers)
-    data = response.json()
-    return data
+ERP_PAGE_SIZE = 1000
+ERP_MAX_CONCURRENCY = 8  # pages in flight at once
+ERP_TIMEOUT = (3.05, 30)  # connect, read seconds
+ERP_RETRIES = 3
+WATERMARK_PATH = "erp_watermark.json"
+CHUNK_ROWS = 100000  # rows per DataFrame chunk / Parquet row group
+
+# Columns with a fixed dtype so every chunk (and row group) has the same schema.
+COLUMN_DTYPES = {
+    "transaction_id": "int64",
+    "user_id": "int64",
+    "amount": "float64",
+    "transaction_type": "string",
+    "description": "string",
+}
+
+
+def make_session(api_key=ERP_API_KEY, pool_size=ERP_MAX_CONCURRENCY, retries=ERP_RETRIES):
+    """A requests.Session with one keep-alive connection per worker and retries on transient errors."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET",), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Authorization"] = f"Bearer {api_key}"
+    return session
+
+
+def fetch_page(session, page, since=None, page_size=ERP_PAGE_SIZE, url=ERP_API_URL):
+    """Fetch one page as {"data": [...], "total_pages": n}; a bare list is a single page."""
+    params = {"page": page, "page_size": page_size}
+    if since:
+        params["since"] = since
+    response = session.get(url, params=params, timeout=ERP_TIMEOUT)
+    response.raise_for_status()
+    payload = response.json()
+    if isinstance(payload, list):
+        return {"data": payload, "total_pages": 1}
+    return payload
+
+
+def iter_pages(session, since=None, page_size=ERP_PAGE_SIZE, max_concurrency=ERP_MAX_CONCURRENCY, url=ERP_API_URL):
+    """Yield each page's records in page order, fetching up to max_concurrency pages at once.
+
+    The first page tells how many pages there are; the rest are fetched by a
+    thread pool with a bounded window of outstanding requests, so memory
+    stays flat however many pages the ERP returns.
+    """
+    first = fetch_page(session, 1, since, page_size, url)
+    yield first["data"]
+    pages = iter(range(2, first.get("total_pages", 1) + 1))
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        pending = deque(pool.submit(fetch_page, session, page, since, page_size, url)
+                        for page in islice(pages, max_concurrency))
+        try:
+            while pending:
+                records = pending.popleft().result()["data"]
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(pool.submit(fetch_page, session, page, since, page_size, url))
+                yield records
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def fetch_data_from_erp(since=None, session=None, url=ERP_API_URL):
+    """All records newer than ``since`` as one list; prefer iter_frames() for large pulls."""
+    session = session or make_session()
+    return [record for page in iter_pages(session, since, url=url) for record in page]
+
 
 def convert_to_dataframe(data):
     df = pd.DataFrame(data)
+    if df.empty:
+        return df
+    df = df.astype({column: dtype for column, dtype in COLUMN_DTYPES.items() if column in df})
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
     return df
 
-def upload_to_azure_blob_storage(df):
-    # Mock implementation for uploading to Azure Blob Storage
-    print(f"Uploading data to Azure Blob Storage...")
-    # Replace with actual Azure SDK code for uploading data
 
-if __name__ == "__main__":
-    # Fetch data from ERP
-    transaction_data = fetch_data_from_erp()
+def iter_frames(pages, chunk_rows=CHUNK_ROWS, watermark=None):
+    """Group pages into DataFrames of about ``chunk_rows`` rows.
+
+    Rows at or before ``watermark`` (already ingested by an earlier run,
+    since the ERP's ``since`` filter is inclusive) are dropped.
+    """
+    buffer = []
+    for records in pages:
+        buffer.extend(records)
+        if len(buffer) >= chunk_rows:
+            df = _after_watermark(convert_to_dataframe(buffer), watermark)
+            buffer = []
+            if len(df):
+                yield df
+    if buffer:
+        df = _after_watermark(convert_to_dataframe(buffer), watermark)
+        if len(df):
+            yield df
+
+
+def _after_watermark(df, watermark):
+    if not watermark or df.empty:
+        return df
+    timestamp = pd.Timestamp(watermark["timestamp"])
+    newer = (df["timestamp"] > timestamp) | ((df["timestamp"] == timestamp) & (df["transaction_id"] > watermark["transaction_id"]))
+    return df[newer]
 
-    # Convert to DataFrame
-    df_transactions = convert_to_dataframe(transaction_data)
 
-    # Upload to Azure Blob Storage
-    upload_to_azure_blob_storage(df_transactions)
+def frame_watermark(df, current=None):
+    """The (timestamp, transaction_id) of the newest row in ``df``, or ``current`` if that is newer."""
+    last = df.sort_values(["timestamp", "transaction_id"]).iloc[-1]
+    candidate = {"timestamp": last["timestamp"].isoformat().replace("+00:00", "Z"), "transaction_id": int(last["transaction_id"])}
+    if current and (pd.Timestamp(current["timestamp"]), current["transaction_id"]) >= \
+            (last["timestamp"], candidate["transaction_id"]):
+        return current
+    return candidate
+
+
+def load_watermark(path=WATERMARK_PATH):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(watermark, path=WATERMARK_PATH):
+    """Write the watermark atomically so a crash never leaves a half-written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".erp-watermark-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(watermark, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def run_id(watermark):
+    """A stable name for the ingestion window that starts after ``watermark``."""
+    return hashlib.sha1(json.dumps(watermark, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def write_parquet(frames, path):
+    """Write each DataFrame as one row group of a single Parquet file; returns (rows, row_groups).
+
+    The file is written under a temporary name and renamed into place once
+    complete, so ``path`` never holds a partial file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = row_groups = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+    os.close(fd)
+    try:
+        for df in frames:
+            if writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+            else:
+                table = pa.Table.from_pandas(df.reindex(columns=writer.schema.names), schema=writer.schema,
+                                             preserve_index=False)
+            writer.write_table(table)
+            rows += len(df)
+            row_groups += 1
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return rows, row_groups
+
+
+def run_ingestion(output, watermark_path=WATERMARK_PATH, url=ERP_API_URL, session=None,
+                  page_size=ERP_PAGE_SIZE, max_concurrency=ERP_MAX_CONCURRENCY, chunk_rows=CHUNK_ROWS):
+    """Pull transactions newer than the saved watermark into ``output``.
+
+    ``output`` is a Parquet file path or a storage.TransactionStore. The
+    watermark only advances after every chunk is written, so a failed run
+    is simply repeated from the same point. Parts are named after the
+    starting watermark (run_id) and replace those of an earlier attempt at
+    the same window, so the repeat does not stage the rows twice.
+    """
+    session = session or make_session(pool_size=max_concurrency)
+    watermark = load_watermark(watermark_path)
+    since = watermark["timestamp"] if watermark else None
+    state = {"watermark": watermark}
+
+    def tracked(frames):
+        for df in frames:
+            state["watermark"] = frame_watermark(df, state["watermark"])
+            yield df
+
+    frames = tracked(iter_frames(iter_pages(session, since, page_size, max_concurrency, url), chunk_rows, watermark))
+    if isinstance(output, TransactionStore):
+        rows, chunks = output.write_frames(frames, run_id=run_id(watermark))
+    else:
+        rows, chunks = write_parquet(frames, output)
+    if rows and watermark_path:
+        save_watermark(state["watermark"], watermark_path)
+    return {"rows": rows, "chunks": chunks, "watermark": state["watermark"]}
+
+if __name__ == "__main__":
+    # Stage new transactions from the ERP as date-partitioned Parquet
+    result = run_ingestion(TransactionStore(LocalFileSystemStore(STAGING_ROOT)))
+    print(f"Staged {result['rows']} transactions in {STAGING_ROOT}")
@@ -0,0 +1,319 @@
+"""Local stand-ins for the external services the scripts talk to.
+
+Used by the benchmarks and for trying the pipelines without the real
+endpoints, e.g.
+
+    with MockERPServer(transactions=50000, latency=0.02) as erp:
+        run_ingestion("out.parquet", url=erp.url)
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TRANSACTION_TYPES = ["deposit", "withdrawal", "transfer", "payment"]
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 resets bursts of concurrent clients
+
+
+class _MockServer:
+    """ThreadingHTTPServer on an ephemeral localhost port, run in a daemon thread."""
+
+    def __init__(self, handler):
+        self._server = _HTTPServer(("127.0.0.1", 0), handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ERPHandler(_JSONHandler):
+    def do_GET(self):
+        erp = self.server.mock
+        if self.headers.get("Authorization") != f"Bearer {erp.api_key}":
+            return self.send_json({"error": "unauthorized"}, 401)
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        page_size = min(int(query.get("page_size", ["100"])[0]), erp.max_page_size)
+        since = query.get("since", [None])[0]
+        if erp.latency:
+            time.sleep(erp.latency)
+        with erp.lock:
+            erp.requests += 1
+            rows = erp.rows
+            if since:
+                rows = [row for row in rows if row["timestamp"] >= since]
+            total_pages = max(1, -(-len(rows) // page_size))
+            data = rows[(page - 1) * page_size:page * page_size]
+        self.send_json({"data": data, "page": page, "page_size": page_size, "total_pages": total_pages})
+
+
+class MockERPServer(_MockServer):
+    """Paginated transactions API: GET /transactions?since=&page=&page_size=.
+
+    Rows are ordered by (timestamp, transaction_id); ``since`` is inclusive.
+    ``add()`` appends newer transactions to simulate a live ERP.
+    """
+
+    def __init__(self, transactions=1000, users=100, latency=0.0, max_page_size=5000, api_key="mock_api_key",
+                 start=datetime(2024, 1, 1, tzinfo=timezone.utc)):
+        super().__init__(_ERPHandler)
+        self.users = users
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.api_key = api_key
+        self.start_time = start
+        self.lock = threading.Lock()
+        self.rows = []
+        self.requests = 0
+        self.add(transactions)
+
+    @property
+    def url(self):
+        return f"{self.base_url}/transactions"
+
+    def add(self, count):
+        with self.lock:
+            first = len(self.rows) + 1
+            for transaction_id in range(first, first + count):
+                timestamp = self.start_time + timedelta(seconds=37 * transaction_id)
+                self.rows.append({
+                    "transaction_id": transaction_id,
+                    "user_id": transaction_id * 7919 % self.users + 1,
+                    "amount": round((transaction_id * 104729 % 1000000) / 100, 2),
+                    "transaction_type": TRANSACTION_TYPES[transaction_id % len(TRANSACTION_TYPES)],
+                    "description": f"ERP transaction {transaction_id}",
+                    "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+                })
+
+
+class _WebhookHandler(_JSONHandler):
+    def do_POST(self):
+        webhook = self.server.mock
+        payload = self.read_json()
+        if webhook.latency:
+            time.sleep(webhook.latency)
+        with webhook.lock:
+            webhook.attempts += 1
+            now = time.monotonic()
+            webhook.recent = [t for t in webhook.recent if now - t < 1.0]
+            if webhook.rate_limit and len(webhook.recent) >= webhook.rate_limit:
+                webhook.throttled += 1
+                status = 429
+            elif webhook.fail_every and webhook.attempts % webhook.fail_every == 0:
+                status = 503
+            else:
+                webhook.recent.append(now)
+                webhook.messages.append(payload)
+                status = 200
+        if status == 429:
+            return self.send_json({"error": "too many requests"}, 429, {"Retry-After": "1"})
+        if status == 503:
+            return self.send_json({"error": "unavailable"}, 503)
+        self.send_json({"ok": True})
+
+
+class MockWebhookServer(_MockServer):
+    """Chat webhook stub (POST any path) that records messages.
+
+    ``rate_limit`` accepted messages per second are allowed before it
+    answers 429 with Retry-After, and every ``fail_every``-th attempt gets
+    a 503, so clients' throttling and retries can be exercised.
+    """
+
+    def __init__(self, latency=0.0, rate_limit=None, fail_every=None):
+        super().__init__(_WebhookHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.messages = []
+        self.recent = []
+        self.attempts = 0
+        self.throttled = 0
+
+    @property
+    def url(self):
+        return f"{self.base_url}/webhook"
+
+
+class _FeedHandler(_JSONHandler):
+    def do_GET(self):
+        feed = self.server.mock
+        with feed.lock:
+            feed.requests += 1
+            etag, last_modified, items = feed.etag, feed.last_modified, list(feed.items)
+        if (self.headers.get("If-None-Match") == etag
+                or (feed.use_last_modified and self.headers.get("If-Modified-Since") == last_modified)):
+            with feed.lock:
+                feed.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = {"ETag": etag}
+        if feed.use_last_modified:
+            headers["Last-Modified"] = last_modified
+        self.send_json(items, headers=headers)
+
+
+class MockRegulatoryFeedServer(_MockServer):
+    """Regulatory updates feed (GET any path) that answers conditional requests with 304."""
+
+    def __init__(self, items=(), use_last_modified=True):
+        super().__init__(_FeedHandler)
+        self.use_last_modified = use_last_modified
+        self.lock = threading.Lock()
+        self.items = []
+        self.requests = 0
+        self.not_modified = 0
+        self.set_items(items)
+
+    @property
+    def url(self):
+        return f"{self.base_url}/updates"
+
+    def set_items(self, items):
+        """Replace the feed contents, bumping its validators."""
+        with self.lock:
+            self.items = list(items)
+            version = getattr(self, "_version", 0) + 1
+            self._version = version
+            self.etag = f'"v{version}"'
+            self.last_modified = (datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=version)) \
+                .strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+
+class _CompletionHandler(_JSONHandler):
+    def do_POST(self):
+        server = self.server.mock
+        request = self.read_json() or {}
+        prompts = request.get("prompt", "")
+        prompts = prompts if isinstance(prompts, list) else [prompts]
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.prompts.extend(prompts)
+        try:
+            self._complete(server, request, prompts)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and hung up
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _complete(self, server, request, prompts):
+        if server.status != 200:
+            return self.send_json({"error": {"message": "mock failure", "type": "server_error"}}, server.status)
+        replies = [server.reply_tokens(prompt) for prompt in prompts]
+        time.sleep(server.first_token_delay)
+        if not request.get("stream"):
+            time.sleep(server.token_delay * (server.tokens - 1))
+            prompt_tokens = sum(len(prompt.split()) for prompt in prompts)
+            completion_tokens = sum(len(tokens) for tokens in replies)
+            return self.send_json({
+                "id": "cmpl-mock", "object": "text_completion", "model": request.get("model", "mock"),
+                "choices": [{"text": "".join(tokens), "index": i, "finish_reason": "stop"}
+                            for i, tokens in enumerate(replies)],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+        tokens = replies[0]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(server.token_delay)
+            chunk = {"id": "cmpl-mock", "object": "text_completion",
+                     "choices": [{"text": token, "index": 0, "finish_reason": None}]}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockCompletionServer(_MockServer):
+    """OpenAI-style completions endpoint (POST .../completions), streaming or not.
+
+    Point the client's api_base at ``api_base``. The reply to a prompt is
+    ``reply(prompt)``, ``tokens`` words long; the first arrives after
+    ``first_token_delay`` and each further one after ``token_delay`` seconds.
+    A list of prompts gets one choice per prompt. Set ``status`` to make it
+    fail; ``max_in_flight`` records the most concurrent requests seen.
+    """
+
+    def __init__(self, tokens=40, first_token_delay=0.3, token_delay=0.02, status=200):
+        super().__init__(_CompletionHandler)
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.status = status
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+
+    @property
+    def api_base(self):
+        return f"{self.base_url}/v1"
+
+    def reply_tokens(self, prompt):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return [f" answer-{digest}"] + [f" token{i}" for i in range(1, self.tokens)]
+
+    def reply(self, prompt):
+        return "".join(self.reply_tokens(prompt)).strip()
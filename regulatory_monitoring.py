@@ -1,23 +1,38 @@
+import os
+import sys
+
 import requests
 
 # Mock placeholders
 REGULATORY_UPDATES_URL = "https://mock-regulatory-updates-api.com/updates"
 TEAMS_WEBHOOK_URL = "https://mock-teams-webhook.com/webhook"
 
+
 def fetch_regulatory_updates():
     response = requests.get(REGULATORY_UPDATES_URL)
     updates = response.json()
     return updates
 
-def analyze_and_notify(updates):
-    # Mock analysis and notification to Microsoft Teams
-    for update in updates:
-        message = f"Regulatory update: {update['title']}. Details: {update['details']}"
-        requests.post(TEAMS_WEBHOOK_URL, json={"text": message})
+
+def format_update(update):
+    return f"Regulatory update: {update['title']}. Details: {update['details']}"
+
+
+def analyze_and_notify(updates, notifier):
+    """Send the updates to Microsoft Teams through ``notifier``, the backend's
+    notifications.WebhookNotifier (batched, rate-limited, retried).
+
+    Returns {"messages": n, "sent": n, "failed": n}.
+    """
+    return notifier.send([format_update(update) for update in updates])
 
 if __name__ == "__main__":
+    # Run from a checkout: the notifier is the one the Flask backend uses.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Backend", "flask"))
+    from notifications import WebhookNotifier
+
     # Fetch regulatory updates
     regulatory_updates = fetch_regulatory_updates()
 
     # Analyze updates and notify
-    analyze_and_notify(regulatory_updates)
+    analyze_and_notify(regulatory_updates, WebhookNotifier(TEAMS_WEBHOOK_URL))
@@ -1,16 +1,215 @@
-from openai import GPT
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import openai
+import pandas as pd
+
+from anomaly_detection import REPORTING_THRESHOLD
+from storage import STAGING_ROOT, LocalFileSystemStore, TransactionStore
 
 # Mock placeholders
 AZURE_OPENAI_API_KEY = "mock_openai_api_key"
 SHAREPOINT_SITE_URL = "https://mock-sharepoint-site.sharepoint.com/sites/AuditReports"
 SHAREPOINT_ACCESS_TOKEN = "mock_access_token"
 
-def generate_audit_report():
-    gpt = GPT(api_key=AZURE_OPENAI_API_KEY)
-    # Mock report generation using GPT-3.5 (assumed for illustration)
-    prompt = "Generate audit report based on transaction data."
-    response = gpt.complete(prompt)
-    audit_report = response.choices[0].text.strip()
+# Columns the audit report summarizes; nothing else is read from storage.
+REPORT_COLUMNS = ["transaction_id", "user_id", "amount", "transaction_type", "timestamp"]
+REPORT_BATCH_ROWS = 256 * 1024  # rows decoded at a time per worker
+REPORT_TOP_K = 10  # largest transactions listed in the report
+NEAR_THRESHOLD = 0.9  # "just below the reporting threshold" starts at this fraction of it
+
+# Log-spaced amount bin edges (1 cent to 1 billion, ~5% wide) for mergeable quantile estimates.
+AMOUNT_EDGES = np.logspace(-2, 9, 521)
+
+REPORT_COMPLETION_PARAMS = {"engine": "text-davinci-002", "max_tokens": 500, "temperature": 0.2}
+REPORT_TIMEOUT = 60  # seconds
+
+def _merge_rows(left, right, combine):
+    """Merge two {key: np.array} dicts, combining the arrays of keys present in both."""
+    merged = dict(left)
+    for key, values in right.items():
+        merged[key] = combine(merged[key], values) if key in merged else values
+    return merged
+
+def _merge_type_stats(left, right):
+    # [count, total, total_sq, min, max]
+    return np.concatenate([left[:3] + right[:3], [min(left[3], right[3]), max(left[4], right[4])]])
+
+class ReportStats:
+    """Mergeable summary of a set of transactions.
+
+    Holds per-type count, sum, sum of squares, min and max, daily totals, an
+    amount histogram for quantile estimates, reporting-threshold counts and
+    the largest transactions. Its size does not grow with the number of
+    rows, and merge() of two summaries equals the summary of both inputs.
+    """
+
+    def __init__(self, top_k=REPORT_TOP_K):
+        self.top_k = top_k
+        self.rows = 0
+        self.by_type = {}
+        self.daily = {}
+        self.histogram = np.zeros(len(AMOUNT_EDGES) + 1, dtype=np.int64)
+        self.over_threshold = 0
+        self.near_threshold = 0
+        self.largest = None
+
+    @classmethod
+    def from_frame(cls, df, top_k=REPORT_TOP_K):
+        stats = cls(top_k)
+        if df.empty:
+            return stats
+        amount = df["amount"].to_numpy(dtype="float64")
+        stats.rows = len(amount)
+
+        codes, types = pd.factorize(df["transaction_type"])
+        valid = codes >= 0
+        codes, values = codes[valid], amount[valid]
+        k = len(types)
+        mins = np.full(k, np.inf)
+        maxs = np.full(k, -np.inf)
+        np.minimum.at(mins, codes, values)
+        np.maximum.at(maxs, codes, values)
+        type_stats = np.column_stack([
+            np.bincount(codes, minlength=k), np.bincount(codes, values, k), np.bincount(codes, values * values, k),
+            mins, maxs,
+        ]).astype("float64")
+        stats.by_type = dict(zip(types, type_stats))
+
+        timestamps = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(None)
+        days, day_codes = np.unique(timestamps.to_numpy().astype("datetime64[D]"), return_inverse=True)
+        stats.daily = dict(zip(days, np.column_stack([
+            np.bincount(day_codes, minlength=len(days)), np.bincount(day_codes, amount, len(days)),
+        ]).astype("float64")))
+
+        stats.histogram = np.bincount(np.searchsorted(AMOUNT_EDGES, amount, side="right"),
+                                      minlength=len(AMOUNT_EDGES) + 1)
+        stats.over_threshold = int((amount >= REPORTING_THRESHOLD).sum())
+        stats.near_threshold = int(((amount >= NEAR_THRESHOLD * REPORTING_THRESHOLD)
+                                    & (amount < REPORTING_THRESHOLD)).sum())
+        top = np.argpartition(-amount, top_k - 1)[:top_k] if len(amount) > top_k else np.arange(len(amount))
+        stats.largest = df.iloc[top].assign(amount=amount[top])
+        return stats
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.by_type = _merge_rows(self.by_type, other.by_type, _merge_type_stats)
+        self.daily = _merge_rows(self.daily, other.daily, np.add)
+        self.histogram = self.histogram + other.histogram
+        self.over_threshold += other.over_threshold
+        self.near_threshold += other.near_threshold
+        if self.largest is None or other.largest is None:
+            self.largest = self.largest if other.largest is None else other.largest
+        else:
+            self.largest = pd.concat([self.largest, other.largest], ignore_index=True).nlargest(self.top_k, "amount")
+        return self
+
+    def quantile(self, q):
+        """Amount below which about ``q`` of transactions fall (upper edge of the histogram bin)."""
+        if not self.rows:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.histogram), q * self.rows))
+        return float(AMOUNT_EDGES[min(index, len(AMOUNT_EDGES) - 1)])
+
+    def type_table(self):
+        table = pd.DataFrame.from_dict(self.by_type, orient="index",
+                                       columns=["count", "total", "total_sq", "min", "max"])
+        table.index.name = "transaction_type"
+        table["count"] = table["count"].astype("int64")
+        table["mean"] = table["total"] / table["count"]
+        table["std"] = np.sqrt(np.maximum(table["total_sq"] / table["count"] - table["mean"] ** 2, 0))
+        return table[["count", "total", "mean", "std", "min", "max"]].sort_values("total", ascending=False)
+
+    def daily_table(self):
+        table = pd.DataFrame.from_dict(self.daily, orient="index", columns=["count", "total"]).sort_index()
+        table.index = pd.DatetimeIndex(table.index).date
+        table["count"] = table["count"].astype("int64")
+        return table
+
+    def to_text(self):
+        """A compact plain-text summary, small enough for a prompt whatever the data size."""
+        if not self.rows:
+            return "No transactions in the reporting period."
+        daily = self.daily_table()
+        busiest = daily.nlargest(3, "total")
+        largest = self.largest.sort_values("amount", ascending=False)
+        lines = [
+            f"Transactions: {self.rows:,} from {daily.index[0]} to {daily.index[-1]} "
+            f"({len(daily)} days, {daily['count'].mean():,.0f} per day on average)",
+            "",
+            "By transaction type:",
+            self.type_table().to_string(float_format=lambda x: f"{x:,.2f}"),
+            "",
+            f"Amount quantiles (approx.): median {self.quantile(0.5):,.2f}, p95 {self.quantile(0.95):,.2f}, "
+            f"p99 {self.quantile(0.99):,.2f}",
+            f"At or above the reporting threshold ({REPORTING_THRESHOLD:,.2f}): {self.over_threshold:,}; "
+            f"just below it: {self.near_threshold:,}",
+            "Busiest days by amount: " + "; ".join(
+                f"{day} ({row['count']:,.0f} transactions, {row['total']:,.2f})" for day, row in busiest.iterrows()
+            ),
+            "",
+            "Largest transactions:",
+            largest.to_string(index=False, float_format=lambda x: f"{x:,.2f}"),
+        ]
+        return "\n".join(lines)
+
+def summarize_partitions(store, keys, columns=REPORT_COLUMNS, batch_rows=REPORT_BATCH_ROWS, top_k=REPORT_TOP_K):
+    """Map step: ReportStats of some part files, computed ``batch_rows`` rows at a time.
+
+    Small files are buffered together so per-batch overhead is paid per
+    ``batch_rows`` rows, not per file.
+    """
+    stats = ReportStats(top_k)
+    buffer, buffered = [], 0
+    for key in keys:
+        for df in store.iter_batches(key, columns=columns, batch_size=batch_rows):
+            buffer.append(df)
+            buffered += len(df)
+            if buffered >= batch_rows:
+                stats.merge(ReportStats.from_frame(pd.concat(buffer, ignore_index=True), top_k))
+                buffer, buffered = [], 0
+    if buffer:
+        stats.merge(ReportStats.from_frame(pd.concat(buffer, ignore_index=True), top_k))
+    return stats
+
+def compute_report_stats(start_date=None, end_date=None, store=None, workers=None, batch_rows=REPORT_BATCH_ROWS,
+                         top_k=REPORT_TOP_K):
+    """Summarize the staged transactions in [start_date, end_date] with a process pool.
+
+    The part files are split into a few tasks per worker; each task streams
+    its files in batches and returns a small ReportStats, merged here as
+    results arrive. Memory per worker is bounded by ``batch_rows`` whatever
+    the data size.
+    """
+    store = store or TransactionStore(LocalFileSystemStore(STAGING_ROOT))
+    keys = [key for day_keys in store.partitions(start_date, end_date).values() for key in day_keys]
+    workers = workers or os.cpu_count() or 1
+    summarize = partial(summarize_partitions, store, columns=REPORT_COLUMNS, batch_rows=batch_rows, top_k=top_k)
+    if workers == 1 or len(keys) <= 1:
+        return summarize(keys)
+    tasks = [keys[i::workers * 4] for i in range(min(len(keys), workers * 4))]
+    total = ReportStats(top_k)
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        for stats in pool.map(summarize, tasks):
+            total.merge(stats)
+    return total
+
+def generate_audit_report(start_date=None, end_date=None, gateway=None, store=None, workers=None, narrate=True):
+    """Summarize the period's transactions and, if ``narrate``, have the model write the report from the summary.
+
+    The model is reached through ``gateway`` (the Flask backend's
+    llm_gateway.LLMGateway); without one the summary is returned as is.
+    """
+    summary = compute_report_stats(start_date, end_date, store=store, workers=workers).to_text()
+    if not narrate or gateway is None:
+        return summary
+    prompt = f"Generate audit report based on transaction data.\n\n{summary}"
+    # If the model is unavailable the report still carries the figures.
+    fallback = f"Audit report (narrative unavailable)\n\n{summary}"
+    audit_report = gateway.complete(prompt, fallback=fallback, **REPORT_COMPLETION_PARAMS)
     return audit_report
 
 def upload_to_sharepoint(report):
@@ -19,8 +218,13 @@ def upload_to_sharepoint(report):
     # Replace with actual SharePoint SDK code for uploading report
 
 if __name__ == "__main__":
+    # Run from a checkout: the LLM gateway is the one the Flask backend uses.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Backend", "flask"))
+    from llm_gateway import LLMGateway
+
     # Generate audit report
-    audit_report_text = generate_audit_report()
+    openai.api_key = AZURE_OPENAI_API_KEY
+    audit_report_text = generate_audit_report(gateway=LLMGateway(max_concurrency=4, timeout=REPORT_TIMEOUT))
 
     # Upload report to SharePoint
     upload_to_sharepoint(audit_report_text)
\ No newline at end of file
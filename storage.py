@@ -0,0 +1,221 @@
+"""Staging storage for transaction data.
+
+ObjectStore is the small key/value interface an object store (Azure Blob,
+S3) offers; LocalFileSystemStore implements it on a local directory.
+TransactionStore keeps transactions on top of it as date-partitioned
+Parquet:
+
+    transactions/date=2024-01-31/part-<uuid>.parquet
+    transactions/date=2024-01-31/part-<run>-<chunk>.parquet   (write_frames with a run id)
+
+Readers name the date range and columns they need, so only those
+partitions are opened and only those column chunks are decoded; row
+filters are pushed down to the Parquet row-group statistics.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+STAGING_ROOT = "staging"
+ROW_GROUP_SIZE = 128 * 1024
+
+
+class ObjectStore:
+    """Flat keys ("a/b/c.parquet") mapped to immutable blobs."""
+
+    def put(self, key, data):
+        with self.open_write(key) as f:
+            f.write(data)
+
+    def get(self, key):
+        with self.open_read(key) as f:
+            return f.read()
+
+    def open_write(self, key):
+        raise NotImplementedError
+
+    def open_read(self, key):
+        raise NotImplementedError
+
+    def list(self, prefix=""):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """A filesystem path for ``key`` if the blob lives on local disk, else None."""
+        return None
+
+
+class LocalFileSystemStore(ObjectStore):
+    def __init__(self, root=STAGING_ROOT):
+        self.root = os.path.abspath(root)
+
+    @contextmanager
+    def open_write(self, key):
+        """Write to a temporary file and rename it into place, so readers never see a partial blob."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def open_read(self, key):
+        return open(self._path(key), "rb")
+
+    def list(self, prefix=""):
+        start = self._path(prefix) if prefix else self.root
+        base = start if os.path.isdir(start) else os.path.dirname(start)
+        keys = []
+        for directory, _, files in os.walk(base):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key):
+        return self._path(key)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"Key {key!r} escapes the store root")
+        return path
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    return pd.Timestamp(value).date().isoformat()
+
+
+class TransactionStore:
+    def __init__(self, store=None, prefix="transactions", timestamp_column="timestamp"):
+        self.store = store or LocalFileSystemStore()
+        self.prefix = prefix
+        self.timestamp_column = timestamp_column
+
+    def write(self, df, row_group_size=ROW_GROUP_SIZE, name=None):
+        """Append ``df`` as one new part file per day present in it; returns the keys written.
+
+        Parts are named ``part-<name>.parquet`` when ``name`` is given, so
+        writing the same name again replaces them instead of adding rows.
+        """
+        if df.empty:
+            return []
+        days = pd.to_datetime(df[self.timestamp_column]).dt.floor("D").to_numpy()
+        order = np.argsort(days, kind="stable")
+        days = days[order]
+        table = pa.Table.from_pandas(df.iloc[order], preserve_index=False)
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        ends = np.r_[starts[1:], len(days)]
+        keys = []
+        for start, end in zip(starts, ends):
+            day = pd.Timestamp(days[start]).date().isoformat()
+            key = f"{self.prefix}/date={day}/part-{name or uuid.uuid4().hex}.parquet"
+            with self.store.open_write(key) as f:
+                pq.write_table(table.slice(start, end - start), f, row_group_size=row_group_size,
+                               compression="zstd")
+            keys.append(key)
+        return keys
+
+    def write_frames(self, frames, run_id=None):
+        """Write an iterable of DataFrames; returns (rows, frames written).
+
+        With a ``run_id`` the parts are named after it and the frame number,
+        and parts left by an earlier attempt with the same run id are
+        removed first, so repeating a run does not duplicate rows.
+        """
+        if run_id is not None:
+            self.delete_run(run_id)
+        rows = chunks = 0
+        for df in frames:
+            self.write(df, name=f"{run_id}-{chunks:05d}" if run_id is not None else None)
+            rows += len(df)
+            chunks += 1
+        return rows, chunks
+
+    def partitions(self, start_date=None, end_date=None):
+        """{day: [keys]} for the partitions within [start_date, end_date]."""
+        start, end = _as_date(start_date), _as_date(end_date)
+        partitions = {}
+        for key in self.store.list(f"{self.prefix}/date="):
+            day = key[len(self.prefix) + 6:].split("/", 1)[0]
+            if (start is None or day >= start) and (end is None or day <= end):
+                partitions.setdefault(day, []).append(key)
+        return partitions
+
+    def read_table(self, columns=None, start_date=None, end_date=None, filters=None, memory_map=True):
+        """Read the given columns of the days in [start_date, end_date] as an Arrow table.
+
+        ``filters`` are pyarrow-style predicates such as ``[("amount", ">", 1000)]``
+        and are evaluated against row-group statistics before any data is
+        decoded. Local blobs are memory-mapped rather than read into memory.
+        """
+        keys = [key for day_keys in self.partitions(start_date, end_date).values() for key in day_keys]
+        if not keys:
+            return pa.table({column: pa.array([], pa.null()) for column in columns or []})
+        expression = pq.filters_to_expression(filters) if filters else None
+        paths = [self.store.local_path(key) for key in keys]
+        if all(paths):
+            dataset = ds.dataset(paths, format="parquet", filesystem=pafs.LocalFileSystem(use_mmap=memory_map))
+            return dataset.to_table(columns=columns, filter=expression)
+        return pa.concat_tables(
+            pq.read_table(pa.BufferReader(self.store.get(key)), columns=columns, filters=expression) for key in keys
+        )
+
+    def read(self, columns=None, start_date=None, end_date=None, filters=None, memory_map=True):
+        """Like read_table(), as a pandas DataFrame."""
+        return self.read_table(columns, start_date, end_date, filters, memory_map).to_pandas()
+
+    def iter_batches(self, key, columns=None, batch_size=ROW_GROUP_SIZE):
+        """Yield one part file as DataFrames of at most ``batch_size`` rows.
+
+        Requested columns the file does not have are skipped. Only one batch
+        is decoded at a time, so memory stays bounded for any file size.
+        """
+        path = self.store.local_path(key)
+        parquet = pq.ParquetFile(path, memory_map=True) if path else pq.ParquetFile(pa.BufferReader(self.store.get(key)))
+        if columns is not None:
+            columns = [column for column in columns if column in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+    def delete_run(self, run_id):
+        """Delete the parts written by write_frames() with ``run_id``."""
+        marker = f"/part-{run_id}-"
+        for key in self.store.list(f"{self.prefix}/date="):
+            if marker in key:
+                self.store.delete(key)
+
+    def delete_partition(self, day):
+        for key in self.partitions(day, day).get(_as_date(day), []):
+            self.store.delete(key)
@@ -0,0 +1,75 @@
+"""Make the pipeline scripts, mock_services and the Flask backend importable."""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, "Backend", "flask")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from mock_services import MockCompletionServer  # noqa: E402
+
+
+@pytest.fixture
+def completion_server(monkeypatch):
+    """A MockCompletionServer that openai (and so the LLM gateway) talks to."""
+    import openai
+
+    with MockCompletionServer(tokens=10, first_token_delay=0.05, token_delay=0.05) as server:
+        monkeypatch.setattr(openai, "api_base", server.api_base)
+        monkeypatch.setattr(openai, "api_key", "test")
+        yield server
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """(main module, test client, employee token) for the Flask app on a scratch SQLite database."""
+    directory = tmp_path_factory.mktemp("backend")
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory / 'test.db'}"
+    os.environ["JOB_WORKERS"] = "0"
+    cwd = os.getcwd()
+    os.chdir(directory)  # app.log, the LLM cache and the job queue are created in the working directory
+    try:
+        import main
+
+        with main.app.app_context():
+            main.db.create_all()
+            user = main.User(username="employee", email="employee@example.com", password="x", role="employee")
+            main.db.session.add(user)
+            main.db.session.commit()
+            token = make_token(main, user.id)
+        yield main, main.app.test_client(), token
+    finally:
+        os.chdir(cwd)
+
+
+def make_token(main, user_id):
+    import jwt
+
+    return jwt.encode({"user_id": user_id, "exp": datetime.utcnow() + timedelta(hours=1)},
+                      main.app.config["SECRET_KEY"], algorithm="HS256")
+
+
+@pytest.fixture(scope="session")
+def admin_token(backend):
+    main = backend[0]
+    with main.app.app_context():
+        admin = main.User(username="admin", email="admin@example.com", password="x", role="admin")
+        main.db.session.add(admin)
+        main.db.session.commit()
+        return make_token(main, admin.id)
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll ``predicate`` until it returns something truthy or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result or time.monotonic() > deadline:
+            return result
+        time.sleep(0.05)
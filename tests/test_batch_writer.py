@@ -0,0 +1,48 @@
+import threading
+
+from batch_writer import BatchWriter
+
+
+def test_flush_waits_for_the_batch_being_written():
+    written = []
+    taken = threading.Event()
+    release = threading.Event()
+
+    def slow_flush(batch):
+        taken.set()
+        release.wait(5)
+        written.extend(batch)
+
+    writer = BatchWriter(slow_flush, batch_size=10, flush_interval=0.01)
+    writer.submit("first")
+    assert taken.wait(5)  # the writer thread now holds "first" and has not written it
+
+    flushed = []
+    flusher = threading.Thread(target=lambda: flushed.append(writer.flush(timeout=5)))
+    flusher.start()
+    flusher.join(0.2)
+    assert flusher.is_alive()
+
+    release.set()
+    flusher.join(5)
+    assert flushed == [True]
+    assert written == ["first"]
+    writer.close()
+
+
+def test_flush_gives_up_after_timeout():
+    release = threading.Event()
+    taken = threading.Event()
+
+    def stuck_flush(batch):
+        taken.set()
+        release.wait(5)
+
+    writer = BatchWriter(stuck_flush, flush_interval=0.01)
+    writer.submit("stuck")
+    assert taken.wait(5)
+
+    assert writer.flush(timeout=0.05) is False
+    release.set()
+    assert writer.flush(timeout=5) is True
+    writer.close()
@@ -0,0 +1,32 @@
+from conftest import wait_for
+
+
+def audit_actions(main):
+    with main.app.app_context():
+        return [entry.action for entry in main.AuditLog.query.all()]
+
+
+def test_completed_stream_is_audited(backend, completion_server):
+    main, client, token = backend
+
+    response = client.post("/api/chat/stream", json={"message": "stream to the end"}, headers={"Authorization": token})
+
+    body = response.get_data(as_text=True)
+    assert response.mimetype == "text/event-stream"
+    assert body.count("event: token") == 10
+    assert "event: done" in body
+    assert wait_for(lambda: "Chat: stream to the end" in audit_actions(main))
+
+
+def test_client_disconnect_still_writes_the_audit_entry(backend, completion_server):
+    main, client, token = backend
+    interrupted = main.chat_stream_metrics.stats()["interrupted"]
+
+    response = client.post("/api/chat/stream", json={"message": "hang up early"}, headers={"Authorization": token},
+                           buffered=False)
+    assert next(iter(response.response)).startswith(b"event: token")
+    response.close()  # what the WSGI server does when the client goes away
+
+    assert wait_for(lambda: "Chat: hang up early (interrupted)" in audit_actions(main))
+    assert main.chat_stream_metrics.stats()["interrupted"] == interrupted + 1
+    assert completion_server.requests == 1
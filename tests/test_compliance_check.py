@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.mark.parametrize("bad", [[1, 2], {"id": 1}, "3", 1.5, True, None])
+def test_batch_rejects_non_integer_ids_with_their_index(backend, bad):
+    main, client, token = backend
+
+    response = client.post("/api/compliance_check/batch", json={"transaction_ids": [1, 2, bad]},
+                           headers={"Authorization": token})
+
+    assert response.status_code == 400
+    assert response.get_json()["index"] == 2
+
+
+def test_batch_reports_unknown_ids(backend):
+    main, client, token = backend
+
+    response = client.post("/api/compliance_check/batch", json={"transaction_ids": [999, 1000]},
+                           headers={"Authorization": token})
+
+    assert response.status_code == 200
+    assert response.get_json()["not_found"] == [999, 1000]
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_gateway import LLMGateway, LLMUnavailable
+
+PARAMS = {"engine": "test", "max_tokens": 20}
+
+
+def test_identical_concurrent_prompts_share_one_upstream_call(completion_server):
+    completion_server.first_token_delay = 0.3  # keep the first request in flight while the rest arrive
+    gateway = LLMGateway(max_concurrency=4, timeout=5)
+    callers = 16
+    ready = threading.Barrier(callers)
+
+    def ask(_):
+        ready.wait()
+        return gateway.complete("same question", **PARAMS)
+
+    with ThreadPoolExecutor(callers) as pool:
+        answers = list(pool.map(ask, range(callers)))
+
+    assert completion_server.requests == 1
+    assert answers == [completion_server.reply("same question")] * callers
+    stats = gateway.stats()
+    assert stats["calls"] == callers
+    assert stats["coalesced"] == callers - 1
+
+
+def test_complete_many_sends_each_distinct_prompt_once(completion_server):
+    gateway = LLMGateway(batch_size=5, timeout=5)
+    prompts = [f"prompt {i % 8}" for i in range(20)]
+
+    answers = gateway.complete_many(prompts, **PARAMS)
+
+    assert answers == [completion_server.reply(prompt) for prompt in prompts]
+    assert completion_server.requests == 2
+    assert sorted(completion_server.prompts) == sorted(set(prompts))
+
+
+def test_failures_raise_or_fall_back(completion_server):
+    completion_server.status = 500
+    gateway = LLMGateway(timeout=5)
+
+    assert gateway.complete("question", fallback="busy", **PARAMS) == "busy"
+    with pytest.raises(LLMUnavailable):
+        gateway.complete("question", **PARAMS)
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from mock_services import MockWebhookServer
+from notifications import WebhookNotifier, make_session, post_with_retry
+
+
+@pytest.fixture
+def webhook():
+    with MockWebhookServer() as server:
+        yield server
+
+
+def test_post_retries_until_the_webhook_accepts(webhook):
+    webhook.fail_every = 2
+    session = make_session(1)
+    post_with_retry(session, webhook.url, {"text": "first"}, backoff=0.01)
+    response = post_with_retry(session, webhook.url, {"text": "second"}, backoff=0.01)
+
+    assert response.status_code == 200
+    assert webhook.attempts == 3  # the second message's first attempt got a 503
+    assert [message["text"] for message in webhook.messages] == ["first", "second"]
+
+
+def test_post_gives_up_after_max_retries(webhook):
+    webhook.fail_every = 1
+
+    with pytest.raises(RuntimeError, match="after 3 attempts"):
+        post_with_retry(make_session(1), webhook.url, {"text": "lost"}, max_retries=2, backoff=0.01)
+    assert webhook.attempts == 3
+    assert webhook.messages == []
+
+
+def test_post_honours_retry_after(webhook):
+    webhook.rate_limit = 1
+    session = make_session(1)
+    post_with_retry(session, webhook.url, {"text": "first"}, backoff=0.01)
+    started = time.monotonic()
+    post_with_retry(session, webhook.url, {"text": "second"}, backoff=0.01)
+
+    assert time.monotonic() - started >= 1.0
+    assert webhook.throttled == 1
+    assert len(webhook.messages) == 2
+
+
+def test_notifier_delivers_every_batch_through_transient_failures(webhook):
+    webhook.fail_every = 3
+    notifier = WebhookNotifier(webhook.url, batch_size=2, max_concurrency=1, rate=None, backoff=0.01)
+
+    result = notifier.send([f"update {i}" for i in range(10)])
+
+    assert result == {"messages": 5, "sent": 5, "failed": 0}
+    assert webhook.attempts == 7
+    assert [message["text"] for message in webhook.messages][0] == "update 0\n\nupdate 1"
+
+
+def test_notifier_counts_undeliverable_messages_without_raising(webhook):
+    webhook.fail_every = 1
+    notifier = WebhookNotifier(webhook.url, max_retries=1, rate=None, backoff=0.01)
+
+    assert notifier.send(["a", "b"]) == {"messages": 1, "sent": 0, "failed": 1}
+    assert webhook.attempts == 2
+    assert notifier.stats() == {"messages": 1, "sent": 0, "failed": 1}
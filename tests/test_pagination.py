@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import wait_for
+
+
+@pytest.fixture(scope="module")
+def transactions(backend):
+    main, client, token = backend
+    for amount in range(1, 4):
+        response = client.post("/api/transaction", json={"amount": amount, "type": "deposit", "description": "page"},
+                               headers={"Authorization": token})
+        assert response.status_code == 200
+    return client, token
+
+
+@pytest.mark.parametrize("query, rows", [("per_page=0", 1), ("per_page=-1", 1), ("page=0", 3), ("page=-3&per_page=-1", 1)])
+@pytest.mark.parametrize("cursor", [False, True])
+def test_out_of_range_page_arguments_are_clamped(transactions, query, rows, cursor):
+    client, token = transactions
+    url = f"/api/transactions?{query}" + ("&cursor=" if cursor else "")
+
+    response = client.get(url, headers={"Authorization": token})
+
+    assert response.status_code == 200
+    assert len(response.get_json()["transactions"]) == rows
+
+
+def test_per_page_is_capped(backend, transactions, admin_token):
+    main, client, token = backend
+    main.app.config["MAX_PER_PAGE"], limit = 2, main.app.config["MAX_PER_PAGE"]
+    try:
+        body = client.get("/api/transactions?per_page=1000", headers={"Authorization": token}).get_json()
+        logs = client.get("/api/audit_logs?per_page=0", headers={"Authorization": admin_token})
+    finally:
+        main.app.config["MAX_PER_PAGE"] = limit
+
+    assert len(body["transactions"]) == 2
+    assert body["pages"] == (body["total"] + 1) // 2
+    assert logs.status_code == 200
+    assert len(logs.get_json()["logs"]) == 1
+
+
+def test_legacy_totals_include_rows_written_since_the_last_page(backend, admin_token):
+    main, client, token = backend
+    headers = {"Authorization": token}
+
+    def transactions_total():
+        return client.get("/api/transactions", headers=headers).get_json()["total"]
+
+    def audit_total():
+        return client.get("/api/audit_logs", headers={"Authorization": admin_token}).get_json()["total"]
+
+    before, audited = transactions_total(), audit_total()
+    client.post("/api/transaction", json={"amount": 5, "type": "deposit", "description": "one"}, headers=headers)
+    assert transactions_total() == before + 1
+
+    body = "\n".join('{"amount": %d, "type": "deposit", "description": "bulk"}' % amount for amount in (6, 7))
+    response = client.post("/api/transactions/bulk", data=body,
+                           headers={**headers, "Content-Type": "application/x-ndjson", "Idempotency-Key": "totals"})
+    assert response.status_code == 200
+    assert transactions_total() == before + 3
+
+    # Both writes were audited; the batched audit writer commits them shortly.
+    assert wait_for(lambda: audit_total() >= audited + 2)
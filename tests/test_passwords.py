@@ -0,0 +1,31 @@
+import logging
+import sys
+
+import pytest
+
+import passwords
+from passwords import PasswordHasher, check_hash
+
+BCRYPT_HASH = "$2b$12$" + "a" * 53
+
+
+def test_bcrypt_hash_without_bcrypt_is_a_mismatch(monkeypatch, caplog):
+    monkeypatch.setattr(passwords, "_missing_libraries", set())
+    monkeypatch.setitem(sys.modules, "bcrypt", None)  # makes "import bcrypt" fail
+
+    with caplog.at_level(logging.ERROR, logger="passwords"):
+        assert check_hash(BCRYPT_HASH, "secret") is False
+        assert check_hash(BCRYPT_HASH, "secret") is False
+    assert len(caplog.records) == 1
+    assert "bcrypt" in caplog.records[0].getMessage()
+
+
+@pytest.mark.parametrize("scheme", ["scrypt", "pbkdf2"])
+def test_verify_round_trip(scheme):
+    hasher = PasswordHasher(scheme, params={"n": 2 ** 10} if scheme == "scrypt" else {"iterations": 1000})
+    try:
+        stored = hasher.hash("secret")
+        assert hasher.verify(stored, "secret") == (True, None)
+        assert hasher.verify(stored, "wrong") == (False, None)
+    finally:
+        hasher.close()
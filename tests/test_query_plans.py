@@ -0,0 +1,25 @@
+from query_plans import explain, full_scans
+
+
+def test_full_scans_flags_index_walks():
+    plan = ["SEARCH t USING INDEX ix_t_user (user_id=?)", "SCAN u USING INDEX ix_u_ts", "SCAN v"]
+
+    assert full_scans("sqlite", plan) == ["SCAN u USING INDEX ix_u_ts", "SCAN v"]
+
+
+def test_endpoint_queries_seek_into_an_index(backend):
+    main = backend[0]
+
+    with main.app.app_context():
+        queries = main.endpoint_queries()
+        assert set(main.FULL_SCAN_QUERIES) <= set(queries)
+        scans = {}
+        with main.db.engine.connect() as connection:
+            for name, statement in queries.items():
+                with connection.begin():
+                    plan = explain(connection, statement)
+                assert plan, name
+                if name not in main.FULL_SCAN_QUERIES:
+                    scans[name] = full_scans(connection.dialect.name, plan)
+
+    assert {name: lines for name, lines in scans.items() if lines} == {}
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture
+def report(backend):
+    main, client, token = backend
+    response = client.post("/api/compliance_reports", json={"report_type": "aml", "content": "quarterly findings " * 50},
+                           headers={"Authorization": token})
+    assert response.status_code == 201
+    return client, token, f"/api/compliance_reports/{response.get_json()['report_id']}/content"
+
+
+def test_content_etag_revalidates(report):
+    client, token, url = report
+    etag = client.get(url, headers={"Authorization": token}).headers["ETag"]
+    gzip_etag = client.get(url, headers={"Authorization": token, "Accept-Encoding": "gzip"}).headers["ETag"]
+    assert etag != gzip_etag
+
+    for if_none_match in (etag, gzip_etag, f"W/{etag}", f'"stale", {gzip_etag}', "*"):
+        response = client.get(url, headers={"Authorization": token, "If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+
+    response = client.get(url, headers={"Authorization": token, "If-None-Match": '"stale"'})
+    assert response.status_code == 200